@@ -0,0 +1,180 @@
+import numpy as np
+
+
+# values kept for every neighborhood and for the world at every step
+FIELDS = ("count", "temp_sum", "temp_min", "temp_max", "temp_p10", "temp_p50", "temp_p90", "hvac_power", "grid_draw")
+QUANTILES = (0.1, 0.5, 0.9)
+
+COUNT, TEMP_SUM, TEMP_MIN, TEMP_MAX, TEMP_P10, TEMP_P50, TEMP_P90, HVAC_POWER, GRID_DRAW = range(len(FIELDS))
+
+
+class Aggregates:
+    """Per-step aggregates of the homes of every neighborhood and of the whole world.
+
+    For every step, keeps the number of homes, the sum, minimum, maximum and 10th/50th/90th percentiles of their
+    inner temperatures, and the total energy (J) used by their HVAC systems and drawn from the grid during the step
+    (the hvac_power and grid_draw fields). The values of a step are computed once, right after the world steps, from
+    the temperatures of every home and the loads summed by neighborhood, so reading them never touches the homes.
+
+    Values are held in a single (steps x groups x fields) array, growing by doubling, where group i is neighborhood i
+    and the last group is the world.
+    """
+
+    def __init__(self, group_sizes, capacity=0) -> None:
+        """Constructor for the aggregates
+
+        :param group_sizes: number of homes of every neighborhood, in the order of the world's homes
+        :type group_sizes: list
+        :param capacity: number of steps to preallocate
+        :type capacity: int
+        """
+
+        self.group_sizes = list(group_sizes)
+        self.num_groups = len(self.group_sizes)
+        self._starts = np.concatenate(([0], np.cumsum(self.group_sizes, dtype=np.int64)))
+
+        self.values = np.zeros((max(capacity, 1), self.num_groups + 1, len(FIELDS)))
+        self._size = 0
+
+    @property
+    def world(self) -> int:
+        """Get the group of the whole world"""
+        return self.num_groups
+
+    def __len__(self) -> int:
+        return self._size
+
+    def record(self, step, temps, loads) -> None:
+        """Record the aggregates of consecutive steps
+
+        :param step: first step, right after the last recorded one
+        :type step: int
+        :param temps: inner temperature of every home at every step, one row per step
+        :type temps: numpy array of shape (steps, homes)
+        :param loads: HVAC power and grid draw of every neighborhood at every step
+        :type loads: numpy array of shape (steps, neighborhoods, 2)
+        :return: Nothing
+        """
+
+        if step != self._size:
+            raise ValueError("Aggregates of step {} recorded after step {}".format(step, self._size - 1))
+
+        temps = np.asarray(temps, dtype=np.float64)
+        loads = np.asarray(loads, dtype=np.float64)
+        count = len(temps)
+
+        self._reserve(count)
+        rows = self.values[self._size:self._size + count]
+        if len(set(self.group_sizes)) == 1:
+            # neighborhoods of the same size are computed at once
+            self._fill(rows[:, :self.num_groups], temps.reshape(count, self.num_groups, -1), loads)
+        else:
+            for group in range(self.num_groups):
+                self._fill(rows[:, group:group + 1], temps[:, None, self._starts[group]:self._starts[group + 1]],
+                           loads[:, group:group + 1])
+        self._fill(rows[:, self.world:], temps[:, None], loads.sum(axis=1)[:, None])
+
+        self._size += count
+
+    def extend(self, values) -> None:
+        """Append aggregates computed earlier, e.g. read back from a checkpoint
+
+        :param values: aggregates of consecutive steps, following the last recorded one
+        :type values: numpy array of shape (steps, groups, fields)
+        :return: Nothing
+        """
+
+        self._reserve(len(values))
+        self.values[self._size:self._size + len(values)] = values
+        self._size += len(values)
+
+    def _reserve(self, count) -> None:
+        """Double the capacity of the values until count more steps fit"""
+
+        capacity = len(self.values)
+        while capacity < self._size + count:
+            capacity *= 2
+
+        if capacity > len(self.values):
+            values = np.zeros((capacity,) + self.values.shape[1:])
+            values[:self._size] = self.values[:self._size]
+            self.values = values
+
+    @staticmethod
+    def _fill(rows, temps, loads) -> None:
+        """Compute the aggregates of groups of the same size over consecutive steps
+
+        :param rows: aggregates to fill, of shape (steps, groups, fields)
+        :param temps: temperatures of the homes of every group, of shape (steps, groups, homes)
+        :param loads: HVAC power and grid draw of every group, of shape (steps, groups, 2)
+        """
+
+        rows[..., COUNT] = temps.shape[2]
+        rows[..., HVAC_POWER:GRID_DRAW + 1] = loads
+        if not temps.shape[2]:
+            rows[..., TEMP_SUM:TEMP_P90 + 1] = np.nan
+            return
+
+        rows[..., TEMP_SUM] = temps.sum(axis=2)
+
+        # sorting is several times faster than np.quantile over many small groups, and gives the extremes
+        ordered = np.sort(temps, axis=2)
+        rows[..., TEMP_MIN] = ordered[..., 0]
+        rows[..., TEMP_MAX] = ordered[..., -1]
+
+        # linear interpolation between the closest ranks, like np.quantile
+        position = np.array(QUANTILES) * (temps.shape[2] - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, temps.shape[2] - 1)
+        low = ordered[..., lower]
+        rows[..., TEMP_P10:TEMP_P90 + 1] = low + (ordered[..., upper] - low) * (position - lower)
+
+    def truncate(self, size) -> None:
+        """Forget the aggregates of every step from step size onwards
+
+        :param size: number of steps to keep
+        :type size: int
+        :return: Nothing
+        """
+
+        self._size = max(0, min(self._size, size))
+
+    def get(self, step, group) -> dict:
+        """Returns the aggregates of a group at a step
+
+        :param step: recorded step
+        :type step: int
+        :param group: neighborhood id, or the world group
+        :type group: int
+        :return: dict of every field, and of the mean temperature
+        """
+
+        if not 0 <= step < self._size:
+            raise IndexError("no aggregates recorded for step {}".format(step))
+
+        row = self.values[step, group]
+        values = {field: float(value) for field, value in zip(FIELDS, row)}
+        values["count"] = int(row[COUNT])
+        values["temp_mean"] = float(row[TEMP_SUM] / row[COUNT]) if row[COUNT] else None
+        return values
+
+    def series(self, field, group, start, stop) -> np.ndarray:
+        """Returns a field of a group over a range of recorded steps
+
+        :param field: name of the field, or "temp_mean"
+        :type field: str
+        :param group: neighborhood id, or the world group
+        :type group: int
+        :param start: first step
+        :type start: int
+        :param stop: step after the last one
+        :type stop: int
+        :return: value at every step of the range
+        """
+
+        stop = min(stop, self._size)
+        if field == "temp_mean":
+            rows = self.values[start:stop, group]
+            return rows[:, TEMP_SUM] / rows[:, COUNT]
+
+        return self.values[start:stop, group, FIELDS.index(field)]
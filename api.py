@@ -1,10 +1,41 @@
 import flask
 from world import World
+from runner import WorldRunner
+from rwlock import ReadWriteLock
+import frames
+import downsample
+import aggregates
+from energy import flow_names
+from colors import color_indices, gradient_colors
 import os
 import json
+import math
+import time
+import functools
+import numpy as np
+from metrics import RequestMetrics
 
 app = flask.Flask(__name__)
 world = None
+runner = None
+# written while the world is advanced or modified and read while it is read, so requests never see it in the
+# middle of a step and read it concurrently
+world_lock = ReadWriteLock()
+# latency of the requests of every route, exported on /metrics
+request_metrics = RequestMetrics()
+
+
+@app.before_request
+def start_request_timer():
+	flask.g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request_latency(response):
+	start = flask.g.get('request_start')
+	if start is not None:
+		request_metrics.observe(flask.request.endpoint or 'unknown', time.perf_counter() - start)
+	return response
 
 
 def c2f(temp):
@@ -16,6 +47,24 @@ def f2c(temp):
     f_temp = (temp - 32.0) * 5.0 / 9.0
     return f_temp
 
+
+def reading(route):
+	"""Run a route while holding the world lock for reading"""
+	@functools.wraps(route)
+	def reading_route(*args, **kwargs):
+		with world_lock.read():
+			return route(*args, **kwargs)
+	return reading_route
+
+
+def writing(route):
+	"""Run a route while holding the world lock for writing"""
+	@functools.wraps(route)
+	def writing_route(*args, **kwargs):
+		with world_lock.write():
+			return route(*args, **kwargs)
+	return writing_route
+
 # landing page
 @app.route('/', methods=['GET'])
 def home():
@@ -76,6 +125,16 @@ def setup_world(num_ngh_=None, num_homes_=None, run_time_=None, lower_t_=None, u
 
 	season = flask.request.form['season']
 	weather = flask.request.form['weather']
+	engine = flask.request.form.get('engine', 'object')
+	log_interval = int(flask.request.form.get('log_interval', 15))
+	log_columns = flask.request.form.getlist('log_columns') or ["temperature"]
+	record_energy = flask.request.form.get('record_energy', 'off') in ('on', 'true', '1')
+	phase_timers = flask.request.form.get('phase_timers', 'off') in ('on', 'true', '1')
+	seed = flask.request.form.get('seed', '')
+	seed = int(seed) if seed else None
+	memory_budget = flask.request.form.get('memory_budget', '')
+	memory_budget = int(float(memory_budget) * 1024 * 1024) if memory_budget else None  # MB to bytes
+	dt = int(flask.request.form.get('dt', '') or 1)
 
 	logging_dir = "{}/logging/".format(abs_path)
 	if not os.path.isdir(logging_dir):
@@ -85,72 +144,264 @@ def setup_world(num_ngh_=None, num_homes_=None, run_time_=None, lower_t_=None, u
 	if not os.path.isdir(data_dir):
 		os.makedirs(data_dir)
 
-	log = True
-	world = World(num_ngh, num_homes, run_time, log)
-	world.make_world(season, weather, min_length, max_length, min_width, max_width, lower_t, upper_t)
+	global runner
+	if runner is not None:
+		runner.close()
 
-	return flask.render_template('world.html', world_info = world)
+	with world_lock.write():
+		if world is not None:
+			world.close()
 
+		log = True
+		world = World(num_ngh, num_homes, run_time, log, engine, log_interval=log_interval, log_columns=log_columns,
+					  record_energy=record_energy, seed=seed, phase_timers=phase_timers, memory_budget=memory_budget,
+					  dt=dt)
+		world.make_world(season, weather, min_length, max_length, min_width, max_width, lower_t, upper_t)
+		runner = WorldRunner(world, world_lock)
 
-@app.route('/world/step', methods=['GET'])
-def step():
+		return render_world()
+
+
+def render_world():
+	"""Render the world page with the current temperature and color of every home"""
 	global world
+
+	temps = world.get_int_temps()
+	return flask.render_template('world.html', world_info = world, temps = temps.tolist(),
+								 colors = world.get_colors(temps=temps).tolist())
+
+
+# advance the world in the background, the page shows the step it is at
+@app.route('/world/step', methods=['GET', 'POST'])
+def step():
+	global world, runner
 	
-	num_steps = int(flask.request.form['num_steps'])
+	num_steps = int(flask.request.values['num_steps'])
 	
-	for i in range(0, num_steps):
-		world.step()
+	runner.start(steps=num_steps)
 	
-	return flask.render_template('world.html', world_info = world)
+	with world_lock.read():
+		return render_world()
+
+
+# control the background runner of the world
+@app.route('/world/run', methods=['GET'])
+@app.route('/world/run/<command>', methods=['GET', 'POST'])
+def run_world(command=None):
+	"""Start, pause, resume or stop the background run of the world, and report its progress
+
+	start takes speed=<simulated seconds per second> (as fast as possible by default) and steps=<number of steps>
+	(until the end of the simulation by default).
+	"""
+	global runner
+
+	if command is None:
+		progress = runner.progress()
+	elif command == 'start':
+		progress = runner.start(flask.request.values.get('speed', type=float),
+								flask.request.values.get('steps', type=int))
+	elif command == 'pause':
+		progress = runner.pause()
+	elif command == 'resume':
+		progress = runner.resume()
+	elif command == 'stop':
+		progress = runner.stop()
+	else:
+		flask.abort(404, "Unknown run command '{}'".format(command))
+
+	return flask.jsonify(progress)
 
 # get the data of the world at a step, if provided one. otherwise,
 # proceed to the next step
 @app.route('/st=<int:step_to>/get_data/<temp_scale>', methods=['GET'])
 @app.route('/st=/get_data/<temp_scale>', methods=['GET'])
 def get_step_data(step_to = None, temp_scale = 'celsius'):
-	global world
-	world_data = dict()
+	global world, runner
+
+	frame_format = flask.request.args.get('format', 'json')
+	if frame_format not in frames.FORMATS:
+		flask.abort(400, "Unknown frame format '{}'".format(frame_format))
 
-	# determine if the world needs to step forward
+	color_mode = get_color_mode(frame_format)
+	since = flask.request.args.get('since', type=int)
+
+	# determine if the world needs to step forward. While the runner advances it, the current step is returned
 	if step_to is not None:
 		step_to = int(step_to)
+	elif runner is not None and runner.running:
+		step_to = world.get_time()
 	else:
-		world.step()
-		step_to = world.world_clock.value
+		with world_lock.write():
+			# check the request before stepping, so a rejected one leaves the world where it was
+			if since is not None and not 0 <= since <= world.world_clock.value + 1:
+				flask.abort(400, "Step {} has not been simulated".format(since))
+			world.step()
+			step_to = world.world_clock.value
 
-	if temp_scale == 'celsius':
-		world_data['outside_temp'] = world.get_temp(step_to)
-	else:
-		world_data['outside_temp'] = c2f(world.get_temp(step_to))
+	with world_lock.read():
+		if not 0 <= step_to <= world.world_clock.value:
+			flask.abort(400, "Step {} has not been simulated".format(step_to))
+		if since is not None and not 0 <= since <= world.world_clock.value:
+			flask.abort(400, "Step {} has not been simulated".format(since))
+
+		payload = get_frame(step_to, temp_scale, frame_format, color_mode, since)
+	if frame_format == 'binary':
+		return flask.Response(payload, mimetype='application/octet-stream')
+
+	return flask.Response(payload, mimetype='application/json')
+
+
+def get_color_mode(frame_format):
+	"""Read the colors query argument of a frame request
+
+	colors=1 (or index) adds the color index of every home (see colors.color_indices), colors=hex its hex color
+	code. Binary frames only carry color indices.
+
+	:param frame_format: requested frame format
+	:type frame_format: str
+	:return: None, 'index' or 'hex'
+	"""
+	colors = flask.request.args.get('colors', '0').lower()
+	if colors in ('0', 'false', 'no'):
+		return None
+	if colors in ('1', 'true', 'yes', 'index'):
+		return 'index'
+	if colors == 'hex' and frame_format != 'binary':
+		return 'hex'
+
+	flask.abort(400, "Unknown colors '{}' for {} frames".format(colors, frame_format))
+
+
+def get_frame(step_to, temp_scale, frame_format, color_mode=None, since=None):
+	"""Build a frame of every home at a step. The world lock must be held
+
+	'json' frames are the nested object of every neighborhood and home, with their temperature and hex color.
+	'array' and 'binary' frames are flat (see frames.py), optionally with the colors of color_mode and, with a
+	since step, only holding the homes whose temperature changed since that step.
+
+	:param step_to: step of the frame
+	:type step_to: int
+	:param temp_scale: 'celsius' or 'fahrenheit'
+	:type temp_scale: str
+	:param frame_format: 'json', 'array' or 'binary'
+	:type frame_format: str
+	:param color_mode: None, 'index' or 'hex'
+	:type color_mode: str
+	:param since: step of a previous frame, None for a full frame
+	:type since: int
+	:return: JSON document or binary frame
+	"""
+	global world
 
-	world_data['step'] = step_to
+	outside_temp = world.get_temp(step_to)
+	if temp_scale != 'celsius':
+		outside_temp = c2f(outside_temp)
 
-	for i in range(0, world.num_neighborhoods):
-		world_data[i] = dict()
-		
-		for j in range(0, world.num_homes):
-			home = world.neighborhoods[i].homes[j]
-			
-			if temp_scale == 'celsius':
-				world_data[i][j] = {
-						'temp': home.get_int_temp(step_to), 
-						'color': home.color_gradient(step_to)
-						}
-			else:
+	temps = world.get_int_temps(step_to)
+
+	if frame_format == 'json':
+		world_data = dict()
+		world_data['outside_temp'] = outside_temp
+		world_data['step'] = step_to
+
+		colors = world.get_colors(temps=temps).tolist()
+		if temp_scale != 'celsius':
+			temps = c2f(temps)
+		temps = temps.tolist()
+
+		k = 0
+		for i in range(0, world.num_neighborhoods):
+			world_data[i] = dict()
+
+			for j in range(0, world.num_homes):
 				world_data[i][j] = {
-						'temp': c2f(home.get_int_temp(step_to)), 
-						'color': home.color_gradient(step_to)
+						'temp': temps[k],
+						'color': colors[k]
 						}
+				k += 1
+
+		return json.dumps(world_data)
+
+	homes = None
+	if since is not None:
+		homes = frames.changed_homes(temps, world.get_int_temps(since))
+		temps = temps[homes]
+
+	colors = None
+	if color_mode == 'index':
+		lower_grad, upper_grad = world.get_temp_grads()
+		colors = color_indices(temps, lower_grad if homes is None else lower_grad[homes])
+	elif color_mode == 'hex':
+		lower_grad, upper_grad = world.get_temp_grads()
+		if homes is not None:
+			lower_grad, upper_grad = lower_grad[homes], upper_grad[homes]
+		colors = gradient_colors(temps, lower_grad, upper_grad)
+
+	if temp_scale != 'celsius':
+		temps = c2f(temps)
+
+	if frame_format == 'binary':
+		return frames.encode_binary(step_to, outside_temp, temps, colors, since, homes)
 
-	return json.dumps(world_data)
+	return frames.encode_array(step_to, outside_temp, temps, colors, since, homes)
+
+
+# follow the world as it runs: frames are pushed as Server-Sent Events while a background thread advances it
+@app.route('/world/stream/<temp_scale>', methods=['GET'])
+def stream_frames(temp_scale = 'celsius'):
+	"""Stream frames of the world while it runs
+
+	Query arguments: every=<steps> sends a frame every that many steps (1 by default), format=array (default) or
+	json, colors as for get_data, and delta=1 only sends the homes that changed since the previous frame. A client
+	that falls behind skips to the latest frame.
+	"""
+	global world, runner
+
+	frame_format = flask.request.args.get('format', 'array')
+	if frame_format not in ('json', 'array'):
+		flask.abort(400, "Unknown stream frame format '{}'".format(frame_format))
+
+	color_mode = get_color_mode(frame_format)
+	every = max(flask.request.args.get('every', 1, type=int), 1)
+	delta = flask.request.args.get('delta', '0').lower() in ('1', 'true', 'yes')
+	stream_runner = runner
+
+	def generate():
+		subscription = stream_runner.subscribe(every)
+		try:
+			sent = None
+			with world_lock.read():
+				step_to = world.get_time()
+
+			while step_to is not None:
+				with world_lock.read():
+					frame = get_frame(step_to, temp_scale, frame_format, color_mode, sent if delta else None)
+				yield "event: frame\ndata: {}\n\n".format(frame)
+				sent = step_to
+
+				step_to = stream_runner.next_frame(sent, every, timeout=15)
+				while step_to is None and stream_runner.running:
+					# keep the connection open while the runner is slower than a frame per timeout
+					yield ": waiting\n\n"
+					step_to = stream_runner.next_frame(sent, every, timeout=15)
+
+			yield "event: end\ndata: {}\n\n".format(json.dumps({'step': sent}))
+
+		finally:
+			stream_runner.unsubscribe(subscription)
+
+	return flask.Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
 
 # get information about a neighborhood, house, or device at a time step
 @app.route('/st=<int:step_to>/<int:neighborhood_id>', methods=['GET'])
 @app.route('/st=<int:step_to>/<int:neighborhood_id>/<int:house_id>', methods=['GET'])
 @app.route('/st=<int:step_to>/<int:neighborhood_id>/<int:house_id>/<device>', methods=['GET'])
+@writing
 def get_info_data(step_to=None, neighborhood_id=None, house_id=None, device=None):
 	global world
 	info = dict()
+	# syncing writes the engine state into every home object, so the route holds the lock for writing
+	world.sync_homes()
 
 	if neighborhood_id is not None:
 		neighborhood_id = int(neighborhood_id)
@@ -184,7 +435,11 @@ def get_info_data(step_to=None, neighborhood_id=None, house_id=None, device=None
 							'max_capacity': home.battery.max_capacity,
 							'current_capacity': home.battery.current_capacity,
 							'amps': home.battery.amps,
-							'voltage': home.battery.voltage
+							'voltage': home.battery.voltage,
+							'charge_efficiency': home.battery.charge_efficiency,
+							'discharge_efficiency': home.battery.discharge_efficiency,
+							'charge_rate': rate_limit(home.battery.charge_rate),
+							'discharge_rate': rate_limit(home.battery.discharge_rate)
 							}
 
 			elif device == "pv":
@@ -228,8 +483,286 @@ def get_info_data(step_to=None, neighborhood_id=None, house_id=None, device=None
 	return json.dumps(info)
 
 
+def rate_limit(rate):
+	"""A battery rate limit as JSON, None when the battery has none"""
+	return rate if math.isfinite(rate) else None
+
+
+# series of a house or of every house of a neighborhood over a range of steps, downsampled to a number of points
+@app.route('/series/<int:neighborhood_id>', methods=['GET'])
+@app.route('/series/<int:neighborhood_id>/<int:house_id>', methods=['GET'])
+@reading
+def get_series(neighborhood_id=None, house_id=None):
+	"""Get the temperature, battery charge and grid draw series of houses between two steps
+
+	Query arguments: from=<step> (0 by default), to=<step> (the current step by default, included),
+	points=<number> (1000 by default) and method=lttb (default, at least 3 points) or minmax (at least 2 points) to
+	downsample each series to at most that many points, vars=temp,charge (default) or grid, when the energy flows
+	are recorded, to pick the series, and scale=celsius (default) or fahrenheit.
+	"""
+	global world
+
+	start, stop, points, method = get_range()
+	variables = flask.request.args.get('vars', 'temp,charge').split(',')
+	temp_scale = flask.request.args.get('scale', 'celsius')
+
+	for variable in variables:
+		if variable not in SERIES:
+			flask.abort(400, "Unknown series '{}'".format(variable))
+
+	if not 0 <= neighborhood_id < world.num_neighborhoods:
+		flask.abort(404, "No neighborhood {}".format(neighborhood_id))
+	homes = world.neighborhoods[neighborhood_id].homes
+	if house_id is not None and not 0 <= house_id < len(homes):
+		flask.abort(404, "No house {} in neighborhood {}".format(house_id, neighborhood_id))
+
+	info = {'neighborhood_id': neighborhood_id, 'from': start, 'to': stop - 1, 'method': method}
+
+	if house_id is not None:
+		info['house_id'] = house_id
+		info['series'] = home_series(homes[house_id], variables, start, stop, points, method, temp_scale)
+	else:
+		info['homes'] = {home.h_id: home_series(home, variables, start, stop, points, method, temp_scale)
+						 for home in homes}
+
+	return flask.jsonify(info)
+
+
+def temp_series(home, start, stop, temp_scale):
+	"""Temperatures of a house from step start up to step stop"""
+	temps = home.temp_range(start, stop)
+	if temp_scale != 'celsius':
+		temps = c2f(temps)
+	return start, temps
+
+
+def charge_series(home, start, stop, temp_scale):
+	"""Battery charges of a house at the end of the steps from start up to stop"""
+	return start, home.battery.charge_range(start, stop)
+
+
+def grid_series(home, start, stop, temp_scale):
+	"""Energy drawn from the grid by a house during the steps from start up to stop"""
+	if not world.record_energy:
+		flask.abort(400, "The energy flows of the houses are not recorded")
+	flows = world.get_flows(home.n_id, home.h_id, start, stop)
+	return start, flows[:, flow_names(world.device_names).index('grid')]
+
+
+# series that can be requested from /series
+SERIES = {
+	'temp': temp_series,
+	'charge': charge_series,
+	'grid': grid_series,
+}
+
+
+def home_series(home, variables, start, stop, points, method, temp_scale):
+	"""Read and downsample series of a house
+
+	:return: dict of the steps and values kept of every series
+	"""
+	series = dict()
+
+	for variable in variables:
+		first, values = SERIES[variable](home, start, stop, temp_scale)
+		series[variable] = downsample_series(first, values, points, method)
+
+	return series
+
+
+def downsample_series(first, values, points, method):
+	"""Downsample the values of consecutive steps from step first
+
+	:return: dict of the steps and values kept
+	"""
+	steps = np.arange(first, first + len(values))
+
+	if method == 'minmax':
+		kept = downsample.minmax(values, points)
+	else:
+		kept = downsample.lttb(steps, values, points)
+
+	return {'steps': steps[kept].tolist(), 'values': values[kept].tolist()}
+
+
+# aggregates of the world and of its neighborhoods, at a step or as series over a range of steps
+@app.route('/aggregates', methods=['GET'])
+@app.route('/aggregates/<int:neighborhood_id>', methods=['GET'])
+@reading
+def get_aggregates(neighborhood_id=None):
+	"""Get the aggregates of the world and of every neighborhood, or of one neighborhood, at a step
+
+	Query arguments: step=<step> (the current step by default) and scale=celsius (default) or fahrenheit.
+	"""
+	global world
+
+	step = flask.request.args.get('step', world.get_time(), type=int)
+	temp_scale = flask.request.args.get('scale', 'celsius')
+
+	if not 0 <= step <= world.get_time():
+		flask.abort(400, "Step {} has not been simulated".format(step))
+	if neighborhood_id is not None and not 0 <= neighborhood_id < world.num_neighborhoods:
+		flask.abort(404, "No neighborhood {}".format(neighborhood_id))
+
+	info = {'step': step}
+
+	if neighborhood_id is not None:
+		info['neighborhood_id'] = neighborhood_id
+		info['aggregates'] = scale_aggregates(world.get_aggregates(step, neighborhood_id), temp_scale)
+	else:
+		info['world'] = scale_aggregates(world.get_aggregates(step), temp_scale)
+		info['neighborhoods'] = [scale_aggregates(world.get_aggregates(step, i), temp_scale)
+								 for i in range(world.num_neighborhoods)]
+
+	return flask.jsonify(info)
+
+
+@app.route('/aggregates/series', methods=['GET'])
+@app.route('/aggregates/series/<int:neighborhood_id>', methods=['GET'])
+@reading
+def get_aggregate_series(neighborhood_id=None):
+	"""Get aggregates of the world, or of a neighborhood, between two steps
+
+	Query arguments: from=<step> (0 by default), to=<step> (the current step by default, included),
+	points=<number> (1000 by default) and method=lttb (default) or minmax to downsample each series to at most that
+	many points, vars=temp_mean,hvac_power,grid_draw (default) to pick among the aggregates, and scale=celsius
+	(default) or fahrenheit.
+	"""
+	global world
+
+	start, stop, points, method = get_range()
+	variables = flask.request.args.get('vars', 'temp_mean,hvac_power,grid_draw').split(',')
+	temp_scale = flask.request.args.get('scale', 'celsius')
+
+	for variable in variables:
+		if variable not in aggregates.FIELDS and variable != 'temp_mean':
+			flask.abort(400, "Unknown aggregate '{}'".format(variable))
+	if neighborhood_id is not None and not 0 <= neighborhood_id < world.num_neighborhoods:
+		flask.abort(404, "No neighborhood {}".format(neighborhood_id))
+
+	group = world.aggregates.world if neighborhood_id is None else neighborhood_id
+	info = {'from': start, 'to': stop - 1, 'method': method, 'series': dict()}
+	if neighborhood_id is not None:
+		info['neighborhood_id'] = neighborhood_id
+
+	for variable in variables:
+		values = world.aggregates.series(variable, group, start, stop)
+		if variable == 'temp_sum' and temp_scale != 'celsius':
+			values = c2f(values) + 32.0 * (world.aggregates.series('count', group, start, stop) - 1)
+		elif variable.startswith('temp_') and temp_scale != 'celsius':
+			values = c2f(values)
+		info['series'][variable] = downsample_series(start, values, points, method)
+
+	return flask.jsonify(info)
+
+
+# grid load of the world or of a neighborhood, and energy flows of the houses
+@app.route('/energy/grid', methods=['GET'])
+@app.route('/energy/grid/<int:neighborhood_id>', methods=['GET'])
+@reading
+def get_grid_load(neighborhood_id=None):
+	"""Get the energy drawn from the grid by the world, or by a neighborhood, at every step between two steps
+
+	Also returns the peak load (its step and value) and the total energy drawn over the range, computed before
+	downsampling. Query arguments: from=<step> (0 by default), to=<step> (the current step by default, included),
+	points=<number> (1000 by default) and method=lttb (default) or minmax, as for /series.
+	"""
+	global world
+
+	start, stop, points, method = get_range()
+	if neighborhood_id is not None and not 0 <= neighborhood_id < world.num_neighborhoods:
+		flask.abort(404, "No neighborhood {}".format(neighborhood_id))
+
+	group = world.aggregates.world if neighborhood_id is None else neighborhood_id
+	load = world.aggregates.series('grid_draw', group, start, stop)
+	peak = int(np.argmax(load))
+
+	info = {'from': start, 'to': stop - 1, 'method': method,
+			'peak': {'step': start + peak, 'grid_draw': float(load[peak])},
+			'total': float(load.sum()),
+			'grid_draw': downsample_series(start, load, points, method)}
+	if neighborhood_id is not None:
+		info['neighborhood_id'] = neighborhood_id
+
+	return flask.jsonify(info)
+
+
+@app.route('/energy/<int:neighborhood_id>', methods=['GET'])
+@app.route('/energy/<int:neighborhood_id>/<int:house_id>', methods=['GET'])
+@reading
+def get_energy_flows(neighborhood_id=None, house_id=None):
+	"""Get the energy flows of a house, or their sum over the houses of a neighborhood, between two steps
+
+	Flows are the energy (J) produced by the PV arrays, stored in and drawn from the batteries, used by the HVAC
+	systems, drawn from the grid and used by every device during each step. Query arguments: from, to, points and
+	method as for /series, and vars=<flow>,<flow> to pick the flows (every flow by default).
+	"""
+	global world
+
+	if not world.record_energy:
+		flask.abort(400, "The energy flows of the houses are not recorded")
+
+	start, stop, points, method = get_range()
+	names = flow_names(world.device_names)
+	variables = flask.request.args.get('vars', ','.join(names)).split(',')
+
+	for variable in variables:
+		if variable not in names:
+			flask.abort(400, "Unknown energy flow '{}'".format(variable))
+	if not 0 <= neighborhood_id < world.num_neighborhoods:
+		flask.abort(404, "No neighborhood {}".format(neighborhood_id))
+	if house_id is not None and not 0 <= house_id < len(world.neighborhoods[neighborhood_id].homes):
+		flask.abort(404, "No house {} in neighborhood {}".format(house_id, neighborhood_id))
+
+	flows = world.get_flows(neighborhood_id, house_id, start, stop)
+	info = {'neighborhood_id': neighborhood_id, 'from': start, 'to': stop - 1, 'method': method,
+			'series': {variable: downsample_series(start, flows[:, names.index(variable)], points, method)
+					   for variable in variables}}
+	if house_id is not None:
+		info['house_id'] = house_id
+
+	return flask.jsonify(info)
+
+
+def get_range():
+	"""Read the from, to, points and method query arguments of a series request
+
+	:return: first step, step after the last one, number of points and downsampling method
+	"""
+	start = flask.request.args.get('from', 0, type=int)
+	stop = flask.request.args.get('to', world.get_time(), type=int) + 1
+	points = flask.request.args.get('points', 1000, type=int)
+	method = flask.request.args.get('method', 'lttb')
+
+	if method not in downsample.METHODS:
+		flask.abort(400, "Unknown downsampling method '{}'".format(method))
+	if points < downsample.MIN_POINTS[method]:
+		flask.abort(400, "The {} method keeps at least {} points".format(method, downsample.MIN_POINTS[method]))
+	if not 0 <= start < stop <= world.get_time() + 1:
+		flask.abort(400, "Steps {} to {} have not been simulated".format(start, stop - 1))
+
+	return start, stop, points, method
+
+
+def scale_aggregates(values, temp_scale):
+	"""Aggregates of a step, with the temperatures in the requested scale"""
+	if temp_scale == 'celsius':
+		return values
+
+	scaled = dict(values)
+	for field, value in values.items():
+		if field == 'temp_sum':
+			scaled[field] = c2f(value) + 32.0 * (values['count'] - 1)
+		elif field.startswith('temp_') and value is not None:
+			scaled[field] = c2f(value)
+
+	return scaled
+
+
 @app.route('/world/data')
 @app.route('/world/data/<int:step>')
+@reading
 def get_world_data(step=None):
 	global world
 	info = dict()
@@ -239,14 +772,76 @@ def get_world_data(step=None):
 		info['world_temp'] = world.outside_temp.value
 	else:
 		info['clock'] = int(step)
-		info['world_temp'] = world.temp_history[int(step)]
+		info['world_temp'] = world.get_temp(int(step))
 
 	return json.dumps(info)
 
+# phase timers of the world and request latencies, for Prometheus
+@app.route('/metrics', methods=['GET'])
+@reading
+def get_metrics():
+	"""Export the histograms of the phase timers of the world (when they are on) and of the latency of every route
+	in the Prometheus text format
+	"""
+	global world
+
+	lines = list()
+	if world is not None:
+		lines.extend(["# HELP simulation_step Current step of the world", "# TYPE simulation_step gauge",
+					  "simulation_step {}".format(world.get_time())])
+		if world.timers is not None:
+			lines.extend(world.timers.lines())
+	lines.extend(request_metrics.lines())
+
+	return flask.Response("\n".join(lines) + "\n", mimetype='text/plain; version=0.0.4')
+
+
+# turn the phase timers of the world on or off
+@app.route('/metrics/timers/<state>', methods=['GET', 'POST'])
+@writing
+def set_phase_timers(state):
+	global world
+
+	if state not in ('on', 'off'):
+		flask.abort(404, "Unknown timer state '{}', expected 'on' or 'off'".format(state))
+	world.set_phase_timers(state == 'on')
+
+	return flask.jsonify({'phase_timers': world.timers is not None})
+
+
+# memory held by every subsystem of the world, and allocations between two reports
+@app.route('/debug/memory', methods=['GET'])
+@reading
+def get_memory_report():
+	"""Report the memory held by every subsystem of the world, projected at the last step of the run, see
+	World.memory_report. ?top=N sets the number of source lines listed when allocations are traced
+	"""
+	global world
+
+	if world is None:
+		flask.abort(404, "No world is set up")
+
+	return flask.jsonify(world.memory_report(int(flask.request.args.get('top', 10))))
+
+
+# turn the tracing of allocations with tracemalloc on or off
+@app.route('/debug/memory/tracing/<state>', methods=['GET', 'POST'])
+@writing
+def set_memory_tracing(state):
+	global world
+
+	if state not in ('on', 'off'):
+		flask.abort(404, "Unknown tracing state '{}', expected 'on' or 'off'".format(state))
+	world.set_memory_tracing(state == 'on')
+
+	return flask.jsonify({'memory_tracing': world.memory_tracer is not None})
+
+
 # interact with the devices in a house or a common device of all houses in
 # a neighborhood
 @app.route('/dev/<device>/<cmd>/<int:neighborhood_id>', methods=['GET'])
 @app.route('/dev/<device>/<cmd>/<int:neighborhood_id>/<int:house_id>', methods=['GET'])
+@writing
 def device_api(device=None, cmd=None, neighborhood_id=None, house_id=None):
 	global world
 	
@@ -256,6 +851,7 @@ def device_api(device=None, cmd=None, neighborhood_id=None, house_id=None):
 	else:
 		homes = list()
 		neighborhood_id = int(neighborhood_id)
+		world.sync_homes()
 
 		cmd_list = cmd.split('_')
 
@@ -309,6 +905,8 @@ def device_api(device=None, cmd=None, neighborhood_id=None, house_id=None):
 				for home in homes:
 					home.devices["pool_pump"].turn_off()
 
+		world.sync_engine()
+
 	return flask.redirect(flask.url_for('get_info_data', step_to = world.world_clock.value,
 										neighborhood_id = neighborhood_id, house_id = house_id,
 										device = device))
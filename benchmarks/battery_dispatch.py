@@ -0,0 +1,87 @@
+"""Per-step cost of charging and discharging the batteries of 100k homes.
+
+Compares the old battery step, where every home charged its own battery object from its PV array and then drew its
+consumption from it (two history samples appended per home), with one vectorized pass of the storage bank, with
+lossless unlimited batteries and with efficiency and rate limits.
+
+    python benchmarks/battery_dispatch.py [num_homes] [steps]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from es import StorageBank, CAPACITY
+from history import History
+
+
+class ObjectBattery:
+    """Battery as a per-home object, as ElectricalStorage was before the storage bank"""
+
+    def __init__(self, capacity) -> None:
+        self.max_capacity = CAPACITY
+        self.current_capacity = 0.0
+        self.charge_history = History(capacity)
+
+    def charge(self, w) -> None:
+        if self.current_capacity + w < self.max_capacity:
+            self.current_capacity += w
+        self.charge_history.append(self.current_capacity)
+
+    def discharge(self, w) -> None:
+        if self.current_capacity - w >= 0:
+            self.current_capacity -= w
+        self.charge_history.append(self.current_capacity)
+
+
+def object_step(batteries, produced, consumed) -> None:
+    """Battery part of Building.step and consume_energy before the storage bank, for every home"""
+
+    for battery, pv, consumption in zip(batteries, produced, consumed):
+        battery.charge(pv)
+        if consumption > battery.current_capacity:
+            battery.discharge(battery.current_capacity)
+        else:
+            battery.discharge(consumption)
+
+
+def measure(step, num_steps) -> float:
+    """Returns the mean time of a step in ms"""
+
+    start = time.perf_counter()
+    for i in range(num_steps):
+        step(i + 1)
+
+    return (time.perf_counter() - start) / num_steps * 1000
+
+
+def main(num_homes=100000, num_steps=60) -> None:
+    rng = np.random.default_rng(0)
+    produced = np.full(num_homes, 5 * 300 / 3600)
+    # a third of the homes draw less than their PV array produces
+    consumed = rng.choice([0.0, 0.2, 2000.0], num_homes)
+
+    batteries = [ObjectBattery(2 * num_steps) for i in range(num_homes)]
+    pv, demand = produced.tolist(), consumed.tolist()
+    objects = measure(lambda step: object_step(batteries, pv, demand), num_steps)
+
+    bank = StorageBank(num_homes, num_steps)
+    bank.pv_output[:] = produced
+    lossless = measure(lambda step: bank.dispatch(step, consumed), num_steps)
+
+    bank = StorageBank(num_homes, num_steps)
+    bank.pv_output[:] = produced
+    bank.configure(charge_efficiency=0.95, discharge_efficiency=0.95, charge_rate=0.3, discharge_rate=1500)
+    limited = measure(lambda step: bank.dispatch(step, consumed), num_steps)
+
+    print("{} homes, {} steps".format(num_homes, num_steps))
+    print("battery objects:  {:8.2f} ms/step".format(objects))
+    print("bank, lossless:   {:8.2f} ms/step ({:.0f}x)".format(lossless, objects / lossless))
+    print("bank, limited:    {:8.2f} ms/step ({:.0f}x)".format(limited, objects / limited))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
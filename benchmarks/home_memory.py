@@ -0,0 +1,40 @@
+"""Memory taken by every home of a world.
+
+Builds a world for a single step (so the histories take next to nothing), measures the memory allocated while
+generating it, and breaks one home down into the objects it is made of (the object itself plus its attribute
+dictionary, when it has one). With attribute dictionaries on every object and both HVAC units created up front, a
+home took about 2450 bytes; slotted, with the unused HVAC unit created lazily, about 1820 bytes.
+
+    python benchmarks/home_memory.py [num_homes]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory import home_parts, shallow_size
+from world import World
+
+
+def main(num_homes=10000) -> None:
+    tracemalloc.start()
+    world = World(1, num_homes, 1, log_interval=0, seed=0)
+    before = tracemalloc.get_traced_memory()[0]
+    world.make_world("summer", "sunny")
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    home = world.neighborhoods[0].homes[0]
+    parts = home_parts(home)
+    print("{} homes: {:.0f} bytes per home".format(num_homes, (after - before) / num_homes))
+    for name, obj in parts.items():
+        slotted = " (slotted)" if hasattr(type(obj), "__slots__") else ""
+        print("  {:<12} {:6d} bytes{}".format(name, shallow_size(obj), slotted))
+    print("  {:<12} {:6d} bytes".format("total", sum(shallow_size(obj) for obj in parts.values())))
+
+    world.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
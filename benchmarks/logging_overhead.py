@@ -0,0 +1,59 @@
+"""Cost of the simulation log when stepping home objects.
+
+Steps the same world without a log, then with the log written by a background thread, logging every home, one
+home in 10 and one home in 100 (the default) at DEBUG, and every home with the homes and thermostats at WARNING.
+With 1000 homes, logging one home in 100 costs about 5% of a step and logging every home about 3 times a step.
+Before the log deferred its formatting and writes, logging every home (the only choice) made a step about 8 times
+slower.
+
+    python benchmarks/logging_overhead.py [num_homes] [steps]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from world import World
+
+SETTINGS = (
+    ("no log", None),
+    ("every home", dict()),
+    ("1 home in 10", dict(log_sample=10)),
+    ("1 home in 100", dict(log_sample=100)),
+    ("homes at WARNING", dict(log_levels={"home": "WARNING", "thermostat": "WARNING"})),
+)
+
+
+def measure(num_homes, num_steps, settings) -> float:
+    """Returns the mean CPU time of a step in ms, counting the writer thread of the log"""
+
+    world = World(4, num_homes // 4, num_steps, settings is not None, log_interval=0, seed=0, **(settings or {}))
+    world.make_world("summer", "sunny")
+
+    start = time.process_time()
+    for step in range(num_steps):
+        world.step()
+    world.close()
+
+    return (time.process_time() - start) / num_steps * 1000
+
+
+def main(num_homes=1000, num_steps=200, repeat=5) -> None:
+    # the log and the configuration of the world are written to the working directory
+    os.chdir(tempfile.mkdtemp())
+
+    # settings take turns, so a slower moment of the machine does not land on a single one
+    best = [float("inf")] * len(SETTINGS)
+    for i in range(repeat):
+        for k, (name, settings) in enumerate(SETTINGS):
+            best[k] = min(best[k], measure(num_homes, num_steps, settings))
+
+    print("{} homes, {} steps".format(num_homes, num_steps))
+    for (name, settings), step in zip(SETTINGS, best):
+        print("{:<18} {:8.2f} ms/step ({:+.0%})".format(name, step, step / best[0] - 1))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,70 @@
+"""Per-step cost of reading the world clock and outside temperature at 10k homes.
+
+Compares the old read path, where every home reads the synchronized ``mp.Value`` clock and temperature (one lock
+acquisition per read), with the step context handed down by ``World.step``.
+
+    python benchmarks/step_context.py [num_neighborhoods] [num_homes] [steps]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import multiprocessing as mp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from world import World
+
+
+def locked_step(world) -> None:
+    """World.step as it was before the step context: every home reads the synchronized shared values"""
+
+    world.world_clock.value += 1
+    for neighborhood in world.neighborhoods:
+        for home in neighborhood.homes:
+            home.step()
+
+    world.outside_temp.value = world.temp_change()
+    world.temp_history.append(world.outside_temp.value)
+
+
+def measure(world, step, num_steps) -> float:
+    """Returns the mean time of a step in ms"""
+
+    start = time.perf_counter()
+    for i in range(num_steps):
+        step()
+
+    return (time.perf_counter() - start) / num_steps * 1000
+
+
+def main(num_neighborhoods=10, num_homes=1000, num_steps=60) -> None:
+    random.seed(0)
+    world = World(num_neighborhoods, num_homes, 2 * num_steps + 1, data_dir=tempfile.mkdtemp())
+    # never reach a data log tick, only the stepping is measured
+    world.data_log_time = -(10 ** 9)
+    world.make_world("spring", "sunny")
+
+    # the homes keep the world's values, swap in synchronized ones to measure the old read path
+    clock, outside_temp = mp.Value('i', 0), mp.Value('d', world.outside_temp.value)
+    for neighborhood in world.neighborhoods:
+        for home in neighborhood.homes:
+            home.world_clock, home.outside_temp = clock, outside_temp
+
+    world.world_clock, world.outside_temp = clock, outside_temp
+    locked = measure(world, lambda: locked_step(world), num_steps)
+
+    unlocked_clock = mp.Value('i', clock.value, lock=False)
+    unlocked_temp = mp.Value('d', outside_temp.value, lock=False)
+    world.world_clock, world.outside_temp = unlocked_clock, unlocked_temp
+    context = measure(world, world.step, num_steps)
+
+    print("{} homes, {} steps".format(num_neighborhoods * num_homes, num_steps))
+    print("locked reads:  {:8.2f} ms/step".format(locked))
+    print("step context:  {:8.2f} ms/step".format(context))
+    print("saved:         {:8.2f} ms/step ({:.1f}%)".format(locked - context, 100 * (locked - context) / locked))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
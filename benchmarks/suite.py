@@ -0,0 +1,260 @@
+"""Throughput and memory benchmark suite of the simulation.
+
+Builds worlds with World.make_world at several sizes and settings (engine, log, data log interval) and measures,
+for each of them, the construction time, the steps per second, the latency percentiles of a step and the peak RSS.
+The API routes read on every frame (get_step_data and get_info_data) are timed through Flask's test client, without
+a server. Every case runs in a fresh interpreter, so its peak RSS is its own.
+
+Results are written as JSON, with the commit and the versions they were measured with. Passing the results of an
+earlier run with --compare prints how much faster or slower every case got.
+
+    python benchmarks/suite.py [--quick] [--steps 200] [--only vector] [--output results.json]
+                               [--compare baseline.json]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+PACKAGE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PACKAGE)
+
+# (num_neighborhoods, num_homes) of the scaling cases
+SIZES = ((1, 100), (4, 250), (10, 1000))
+QUICK_SIZES = ((1, 50), (2, 100))
+
+# latency percentiles reported for steps and requests
+PERCENTILES = (50, 90, 99)
+
+
+def world_cases(sizes) -> list:
+    """Cases stepping worlds: every size with each engine, then the log and data logs at the middle size"""
+
+    cases = list()
+    for engine in ("object", "vector"):
+        for num_neighborhoods, num_homes in sizes:
+            cases.append({"kind": "world", "engine": engine, "num_neighborhoods": num_neighborhoods,
+                          "num_homes": num_homes, "log": False, "log_interval": 0})
+
+    num_neighborhoods, num_homes = sizes[len(sizes) // 2]
+    for engine in ("object", "vector"):
+        base = {"kind": "world", "engine": engine, "num_neighborhoods": num_neighborhoods, "num_homes": num_homes}
+        cases.append(dict(base, log=True, log_interval=0))
+        for log_interval in (60, 15, 1):
+            cases.append(dict(base, log=False, log_interval=log_interval))
+
+    return cases
+
+
+def api_cases(sizes) -> list:
+    """Cases requesting the API routes read on every frame, for a world of the middle size"""
+
+    num_neighborhoods, num_homes = sizes[len(sizes) // 2]
+    routes = (
+        # steps the world and returns every home, as the page does without a background run
+        ("get_step_data", "/st=/get_data/celsius"),
+        ("get_step_data", "/st={step}/get_data/celsius"),
+        ("get_step_data", "/st={step}/get_data/celsius?format=array"),
+        ("get_info_data", "/st={step}/0"),
+        ("get_info_data", "/st={step}/0/0/battery"),
+    )
+
+    return [{"kind": "api", "engine": engine, "num_neighborhoods": num_neighborhoods, "num_homes": num_homes,
+             "log": False, "log_interval": 0, "route": route, "url": url}
+            for engine in ("object", "vector") for route, url in routes]
+
+
+def case_name(case) -> str:
+    """Short unique name of a case, used to match it with the same case of another run"""
+
+    name = "{kind}/{engine}/{num_neighborhoods}x{num_homes}".format(**case)
+    if case["kind"] == "api":
+        return "{} {}".format(name, case["url"])
+    if case["log"]:
+        name += "/log"
+    if case["log_interval"]:
+        name += "/csv{}".format(case["log_interval"])
+    return name
+
+
+def latencies(times) -> dict:
+    """Percentiles, mean and maximum of a list of durations in s, in ms"""
+
+    times = np.asarray(times) * 1000
+    result = {"p{}".format(p): float(np.percentile(times, p)) for p in PERCENTILES}
+    result.update(mean=float(times.mean()), max=float(times.max()))
+    return result
+
+
+def peak_rss() -> float:
+    """Peak resident set size of this process in MB, None where it cannot be read"""
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def build(case, num_steps):
+    """Build the world of a case with World.make_world, returning it and the time it took"""
+
+    from world import World
+
+    start = time.perf_counter()
+    world = World(case["num_neighborhoods"], case["num_homes"], num_steps, case["log"], case["engine"],
+                  log_interval=case["log_interval"], seed=0, data_dir=os.getcwd())
+    world.make_world("summer", "sunny")
+    return world, time.perf_counter() - start
+
+
+def run_world(case, num_steps) -> dict:
+    """Step the world of a case and time every step"""
+
+    world, construct = build(case, num_steps)
+
+    times = list()
+    start = time.perf_counter()
+    for i in range(num_steps):
+        step_start = time.perf_counter()
+        world.step()
+        times.append(time.perf_counter() - step_start)
+    world.flush_data()
+    elapsed = time.perf_counter() - start
+    world.close()
+
+    return {"construct_s": construct, "steps": num_steps, "steps_per_s": num_steps / elapsed,
+            "step_ms": latencies(times)}
+
+
+def run_api(case, num_steps) -> dict:
+    """Request an API route of a case num_steps times through Flask's test client and time every request"""
+
+    try:
+        import api
+    except ImportError as error:
+        return {"skipped": "the API cannot be imported ({})".format(error)}
+
+    # the world steps once per request of the stepping route, and is first advanced so the other ones read history
+    world, construct = build(case, 2 * num_steps)
+    world.advance(num_steps // 2)
+    api.world = world
+    client = api.app.test_client()
+
+    times = list()
+    for i in range(num_steps):
+        url = case["url"].format(step=world.get_time())
+        start = time.perf_counter()
+        response = client.get(url)
+        times.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError("GET {} returned {}".format(url, response.status_code))
+    world.close()
+
+    return {"construct_s": construct, "requests": num_steps, "requests_per_s": num_steps / sum(times),
+            "request_ms": latencies(times)}
+
+
+def run_case(case, num_steps) -> dict:
+    """Run a case in this process, from a scratch working directory (make_world, the log and the data logs write
+    to it)"""
+
+    os.chdir(tempfile.mkdtemp(prefix="benchmark-"))
+    result = run_world(case, num_steps) if case["kind"] == "world" else run_api(case, num_steps)
+    result["peak_rss_mb"] = peak_rss()
+    return result
+
+
+def run_isolated(case, num_steps) -> dict:
+    """Run a case in a fresh interpreter and return its result"""
+
+    process = subprocess.run([sys.executable, os.path.abspath(__file__), "--case", json.dumps(case),
+                              "--steps", str(num_steps)], capture_output=True, text=True)
+    if process.returncode != 0:
+        return {"error": process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "failed"}
+
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def environment() -> dict:
+    """Commit and versions the results are measured with"""
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PACKAGE, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {"commit": commit, "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "cpus": os.cpu_count()}
+
+
+def speed(result) -> float:
+    """Throughput of a result, in steps or requests per second"""
+
+    return result.get("steps_per_s", result.get("requests_per_s"))
+
+
+def describe(name, result, baseline=None) -> str:
+    """One line summary of the result of a case"""
+
+    if "error" in result or "skipped" in result:
+        return "{:<60} {}".format(name, result.get("error", result.get("skipped")))
+
+    latency = result.get("step_ms", result.get("request_ms"))
+    line = "{:<60} {:9.1f}/s  p50 {:8.2f} ms  p99 {:8.2f} ms  build {:6.2f} s  rss {:7.1f} MB".format(
+        name, speed(result), latency["p50"], latency["p99"], result["construct_s"], result["peak_rss_mb"] or 0)
+    if baseline is not None and speed(baseline):
+        line += "  {:+.0%}".format(speed(result) / speed(baseline) - 1)
+    return line
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="small worlds and few steps, to check the suite runs")
+    parser.add_argument("--steps", type=int, default=None, help="steps (or requests) timed per case")
+    parser.add_argument("--only", default=None, help="only run the cases whose name contains this text")
+    parser.add_argument("--output", default="benchmark.json", help="JSON file the results are written to")
+    parser.add_argument("--compare", default=None, help="JSON results of an earlier run to compare with")
+    parser.add_argument("--case", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    num_steps = args.steps or (20 if args.quick else 200)
+
+    if args.case is not None:
+        print(json.dumps(run_case(json.loads(args.case), num_steps)))
+        return
+
+    sizes = QUICK_SIZES if args.quick else SIZES
+    cases = [case for case in world_cases(sizes) + api_cases(sizes)
+             if args.only is None or args.only in case_name(case)]
+
+    baseline = dict()
+    if args.compare is not None:
+        with open(args.compare) as baseline_file:
+            baseline = {case["name"]: case["result"] for case in json.load(baseline_file)["cases"]}
+
+    results = list()
+    for case in cases:
+        name = case_name(case)
+        result = run_isolated(case, num_steps)
+        results.append({"name": name, "params": case, "result": result})
+        print(describe(name, result, baseline.get(name)), flush=True)
+
+    with open(args.output, 'w') as output:
+        json.dump({"environment": environment(), "steps": num_steps, "cases": results}, output, indent=2)
+    print("Results written to {}".format(args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
 from abc import ABC, abstractmethod
 from thermostat import Thermostat
-import multiprocessing as mp
+from history import History
+from slab import StateSlab
+from context import StepContext
+from metrics import DISABLED
+from colors import color_table
 import materials as material
 import devices
 import es
+import generation
 import random
-import math
+import numpy as np
 
 
 # converts celsius to fahrenheit
@@ -26,11 +31,79 @@ def ft2m(ft):
     return m
 
 
+class HomeConstants:
+    """Physics constants of a single home.
+
+    Computed once when the home is generated and shared with its thermostat and HVAC units, so the per-step
+    physics does not recompute geometry. Updated in place whenever the home's dimensions or walls change.
+    """
+
+    air_specific_r = 287.058  # J/(kg * K) based on mean molar mass for dry air (28.96 g/mol)
+    air_heat_cap = 0.718  # J/(kg * K) based on c_v value for dry air @ 300 K
+    std_pressure = 101325  # Pa (STP)
+    r_constant = 8.314  # universal gas constant
+    heat_cap = (5 * r_constant) / 2  # heat capacity of an ideal gas at constant volume (7R/2 for constant pressure)
+
+    __slots__ = ("length", "width", "height", "w_area", "r_volume", "rm_vp", "wall_r")
+
+    def __init__(self, length, width, height, walls) -> None:
+        """Constructor for home constants
+
+        :param length: length of the house (m)
+        :type length: float
+        :param width: width of the house (m)
+        :type width: float
+        :param height: height of the house (m)
+        :type height: float
+        :param walls: wall material of the house
+        :type walls: Material
+        """
+
+        self.length = None
+        self.width = None
+        self.height = None
+        self.w_area = None
+        self.r_volume = None
+        self.rm_vp = None
+        self.wall_r = None
+
+        self.update(length, width, height, walls)
+
+    @property
+    def sizes(self):
+        """Get sizes of the house [length, width, height]"""
+        return [self.length, self.width, self.height]
+
+    def update(self, length, width, height, walls) -> None:
+        """Recompute the constants from the dimensions and walls of the house
+
+        :return: Nothing
+        """
+
+        self.length = length
+        self.width = width
+        self.height = height
+
+        self.w_area = 2 * ((length * height) + (width * height))  # m^2
+        self.r_volume = length * width * height  # m^3
+        self.rm_vp = self.r_volume * self.std_pressure
+        self.wall_r = walls.R
+
+
 class Building(ABC):
-    """Abstract Class for Building Types"""
+    """Abstract Class for Building Types
+
+    Homes and their components are slotted classes, so large worlds do not carry an attribute dictionary per object.
+    """
+
+    __slots__ = ("_length", "_width", "_height", "_num_floors", "_n_id", "_h_id", "_lower_temp_grad",
+                 "_upper_temp_grad", "outside_temp", "world_clock", "_log", "logger", "thermostat", "_walls",
+                 "_constants", "battery", "_pv", "sharedInfo", "_num_steps", "_typecode", "temp_history",
+                 "history_store", "devices", "dt")
 
     @abstractmethod
-    def __init__(self, n_id_, i, amb_t, world_clock_, logger_=None) -> None:
+    def __init__(self, n_id_, i, amb_t, world_clock_, logger_=None, num_steps=0, typecode='d',
+                 shared_info=None, battery=None, dt=1) -> None:
         """Constructor for homes
 
         :param n_id_: ID of neighborhood containing home
@@ -41,11 +114,22 @@ class Building(ABC):
         :type amb_t: multiprocessing variable
         :param world_clock_: World Clock
         :type world_clock_: multiprocessing variable
-        :param logger_: log file to write log messages to
-        :type: logger_: log object
+        :param logger_: log of the simulation, handing out the loggers of the home and its thermostat
+        :type: logger_: SimulationLog
+        :param num_steps: number of steps preallocated in the histories of the home
+        :type num_steps: int
+        :param typecode: storage typecode of the histories ('d' for doubles, 'f' for floats)
+        :type typecode: str
+        :param shared_info: view of the home's slot in a state slab. Default None, which allocates a private slab
+        :type shared_info: memoryview
+        :param battery: battery of the home, a slot of a storage bank. Default None, which allocates a private bank
+        :type battery: ElectricalStorage
+        :param dt: length of a step (s)
+        :type dt: int
         :return: Nothing
         """
 
+        self.dt = dt
         self._length = -1
         self._width = -1
         self._height = -1
@@ -58,17 +142,50 @@ class Building(ABC):
 
         self.outside_temp = amb_t
         self.world_clock = world_clock_
-        self.logger = logger_
+        # None unless the home is sampled by the simulation log
+        self._log = logger_
+        self.logger = None if logger_ is None else logger_.home(n_id_, i)
 
         self.thermostat = None
-        self.walls = None
-        self.battery = None
+        self._walls = None
+        self._constants = None
+        # charged and discharged by its storage bank once every home stepped
+        if battery is None:
+            battery = es.StorageBank(1, num_steps, typecode, dt=dt).battery(0)
+        self.battery = battery
         self.pv = None
 
         self.devices = dict()
-        self.temp_history = list()
+        self._num_steps = num_steps
+        self._typecode = typecode
+        self.temp_history = History(num_steps + 1, typecode)
+        self.history_store = None
+
+        # [internal temperature, internal pressure, ...], shared with the thermostat and HVAC units
+        if shared_info is None:
+            shared_info = StateSlab(1).view(0)
+        self.sharedInfo = shared_info
+
+    @property
+    def pv(self):
+        """Get PV array of the home"""
+        return self._pv
 
-        self.sharedInfo = mp.Array('d', range(4))
+    @pv.setter
+    def pv(self, value):
+        """Set PV array of the home, whose output charges the battery"""
+        self._pv = value
+        self.battery.pv_output = 0 if value is None else value.produce(self.dt)
+
+    @property
+    def grid_draw(self):
+        """Get energy drawn from the grid during the last step"""
+        return self.battery.grid
+
+    @grid_draw.setter
+    def grid_draw(self, value):
+        """Set energy drawn from the grid during the last step"""
+        self.battery.grid = value
 
     @property
     def n_id(self):
@@ -99,6 +216,7 @@ class Building(ABC):
     def length(self, value):
         """Set house length"""
         self._length = value
+        self._refresh_constants()
 
     @property
     def width(self):
@@ -109,6 +227,7 @@ class Building(ABC):
     def width(self, value):
         """Set house width"""
         self._width = value
+        self._refresh_constants()
 
     @property
     def height(self):
@@ -119,6 +238,39 @@ class Building(ABC):
     def height(self, value):
         """Set house height"""
         self._height = value
+        self._refresh_constants()
+
+    @property
+    def walls(self):
+        """Get wall material of the house"""
+        return self._walls
+
+    @walls.setter
+    def walls(self, value):
+        """Set wall material of the house"""
+        self._walls = value
+        self._refresh_constants()
+
+    @property
+    def lower_temp_grad(self):
+        """Get lower temperature gradient used to color the house"""
+        return self._lower_temp_grad
+
+    @property
+    def upper_temp_grad(self):
+        """Get upper temperature gradient used to color the house"""
+        return self._upper_temp_grad
+
+    @property
+    def constants(self):
+        """Get precomputed physics constants of the house. None until the house is generated"""
+        return self._constants
+
+    def _refresh_constants(self) -> None:
+        """Update the physics constants after the dimensions or walls of the house changed"""
+
+        if self._constants is not None:
+            self._constants.update(self._length, self._width, self._height, self._walls)
 
     @property
     def num_floors(self):
@@ -131,13 +283,15 @@ class Building(ABC):
         self._num_floors = value
 
     @abstractmethod
-    def generate(self, lower_t, upper_t) -> None:
+    def generate(self, lower_t, upper_t, walls=None) -> None:
         """Randomly generates home
 
         :param lower_t: lower temperature gradient (used for determining temperature color of home)
         :type lower_t: int
         :param upper_t: higher temperature gradient (used for determining temperature color of home)
         :type upper_t: int
+        :param walls: wall material of the home. Default None, which draws one
+        :type walls: Material
         :return: Nothing
         """
 
@@ -150,60 +304,132 @@ class Building(ABC):
         self._upper_temp_grad = upper_t
 
         # select wall material properties
-        wall_type = random.randint(1, 3)
-        if wall_type == 1:
-            self.walls = material.LowEfficiency()
-        elif wall_type == 2:
-            self.walls = material.MedEfficiency()
-        elif wall_type == 3:
-            self.walls = material.HighEfficiency()
-        else:
-            self.walls = material.BrickWall()
+        if walls is None:
+            wall_type = random.randint(1, 3)
+            if wall_type == 1:
+                walls = material.LowEfficiency()
+            elif wall_type == 2:
+                walls = material.MedEfficiency()
+            elif wall_type == 3:
+                walls = material.HighEfficiency()
+            else:
+                walls = material.BrickWall()
+        self.walls = walls
 
         self.sharedInfo[0] = self.outside_temp.value
         self.sharedInfo[1] = 101325  # internal pressure, PA
         self.temp_history.append(self.sharedInfo[0])
 
-        sizes = [self.length, self.width, self.height]
-        self.thermostat = Thermostat(sizes, self.sharedInfo, self.world_clock, self.logger)
+        self._constants = HomeConstants(self.length, self.width, self.height, self.walls)
+        self.thermostat = Thermostat(self._constants, self.sharedInfo, self.world_clock, self.thermostat_logger(),
+                                     self.dt)
+
+    def restore(self, length, width, height, walls, lower_t, upper_t) -> None:
+        """Rebuilds a home from saved properties instead of generating it, e.g. when resuming from a checkpoint
+
+        The state of the home (temperatures, thermostat, devices, battery) is restored separately.
+
+        :param length: length of the house (m)
+        :type length: float
+        :param width: width of the house (m)
+        :type width: float
+        :param height: height of the house (m)
+        :type height: float
+        :param walls: wall material
+        :type walls: Material
+        :param lower_t: lower temperature gradient (used for determining temperature color of home)
+        :type lower_t: int
+        :param upper_t: higher temperature gradient (used for determining temperature color of home)
+        :type upper_t: int
+        :return: Nothing
+        """
+
+        self.length = length
+        self.width = width
+        self.height = height
+        self.walls = walls
+
+        self._lower_temp_grad = lower_t
+        self._upper_temp_grad = upper_t
+
+        self._constants = HomeConstants(self.length, self.width, self.height, self.walls)
+        self.thermostat = Thermostat(self._constants, self.sharedInfo, self.world_clock, self.thermostat_logger(),
+                                     self.dt)
+
+    def thermostat_logger(self):
+        """Get the logger of the thermostat of the home
+
+        :return: logger, None when the thermostat does not log
+        """
+
+        if self._log is None:
+            return None
+        return self._log.home(self._n_id, self._h_id, "thermostat")
+
+    def context(self) -> StepContext:
+        """Returns a step context holding the current world clock and outside temperature"""
+
+        return StepContext.read(self.world_clock, self.outside_temp, self.dt)
 
     @abstractmethod
-    def step(self) -> None:
+    def step(self, ctx=None) -> None:
         """Proceeds the house a single step.
 
-        Calculates next temperature and energy consumption of all devices.
+        Calculates next temperature and energy consumption of all devices. The consumption is the demand of the
+        home's battery, which its storage bank draws once every home of the world stepped.
 
+        :param ctx: clock, outside temperature and phase timers of the step. Default None, which reads the shared
+            world values
+        :type ctx: StepContext
         :return: Nothing
         """
 
-        self.battery.charge(self.pv.produce())
+        if ctx is None:
+            ctx = self.context()
+
+        # phases are timed only when the timers are on, the laps of DISABLED do nothing
+        timers = ctx.timers or DISABLED
+        start = timers.start()
 
         # approach ambient temperature if HVAC is off
         if not self.thermostat.running():
-            self.approach_amb()
+            start = timers.lap("home.thermostat", start)
+            self.approach_amb(ctx)
+            start = timers.lap("home.approach_amb", start)
 
         else:
             # determine if the HVAC should be turned off
-            if self.world_clock.value > self.thermostat.get_end_time():
-                self.thermostat.fan_off()
-                self.approach_amb()
+            if ctx.clock > self.thermostat.get_end_time():
+                self.thermostat.fan_off(ctx.clock)
+                start = timers.lap("home.thermostat", start)
+                self.approach_amb(ctx)
+                start = timers.lap("home.approach_amb", start)
 
             else:
                 self.thermostat.step(self.thermostat.calc_temp_delta())
+                start = timers.lap("home.thermostat", start)
 
                 if self.logger is not None:
-                    self.logger.debug("\t\tInner Temperature: {:.3f}, end_time: {}".format(self.sharedInfo[0],
-                                                                                        self.thermostat.get_end_time()))
+                    self.logger.debug("\t\tInner Temperature: %.3f, end_time: %s", self.sharedInfo[0],
+                                      self.thermostat.get_end_time())
+                    start = timers.lap("log", start)
 
-        self.consume_energy()
+        self.battery.demand = self.consume_energy(ctx)
+        start = timers.lap("home.consume_energy", start)
         self.temp_history.append(self.sharedInfo[0])
+        timers.lap("home.history", start)
 
-    def consume_energy(self) -> int:
+    def consume_energy(self, ctx=None) -> int:
         """Calculates consumption of all devices and systems within a house
 
+        :param ctx: clock and outside temperature of the step. Default None, which reads the shared world values
+        :type ctx: StepContext
         :return: Energy consumption
         """
 
+        if ctx is None:
+            ctx = self.context()
+
         hvac_consumption = 0
         device_consumption = 0
 
@@ -211,63 +437,49 @@ class Building(ABC):
             hvac_consumption = self.thermostat.get_power()
 
         for key, device in self.devices.items():
-            if device.check_run_time(self.world_clock.value) is True:
-                device.turn_off(self.world_clock.value)
+            if device.state == 1 and device.check_run_time(ctx.clock, ctx.dt) is True:
+                device.turn_off(ctx.clock)
 
             device_consumption += device.consumption
 
-        total_consumption = device_consumption + hvac_consumption
-
-        # if the total consumption is greater than the current charge
-        # held by the house's battery, then fully discharge the battery and
-        # return the amount of energy needed from the grid. Else, return 0
-        if total_consumption > self.battery.current_charge():
-            energy_needed = total_consumption - self.battery.current_charge()
-
-            self.battery.discharge(total_consumption - energy_needed)
-            return energy_needed
-
-        else:
-            self.battery.discharge(total_consumption)
-            return 0
+        # devices draw their power (W) for the dt seconds of the step
+        return device_consumption * ctx.dt + hvac_consumption
 
     # TO-DO: Calculate heat loss through roof conduction
-    def approach_amb(self) -> None:
+    def approach_amb(self, ctx=None) -> None:
         """Approach the ambient temperature.
 
         If the HVAC fan is off, approach the ambient world temperature at a rate dependent on the wall materials.
+        A step of dt seconds compounds dt one-second steps at the air density and ambient temperature of its start.
 
+        :param ctx: clock and outside temperature of the step. Default None, which reads the shared world values
+        :type ctx: StepContext
         :return: Nothing
         """
 
-        if self.logger is not None:
-            self.logger.debug("\t\tApproaching Ambient Temperature ({:.3f}) (off since {})".format(
-                self.outside_temp.value, self.thermostat.get_end_time()))
-
-        air_specific_r = 287.058  # J/(kg * K) based on mean molar mass for dry air (28.96 g/mol)
-        air_heat_cap = 0.718  # J/(kg * K) based on c_v value for dry air @ 300 K
-        air_density = self.sharedInfo[1] / (air_specific_r * (self.sharedInfo[0] + 273))  # kg/m^3
+        if ctx is None:
+            ctx = self.context()
 
-        w_area = 2 * ((self.length * self.height) + (self.width * self.height))
-        r_volume = self.length * self.width * self.height
-
-        # constants
-        sun_temp = 5800  # K
-        sun_radius = 6.96 * (10 ** 5)  # km
-        o = (5.6703 * (10 ** -8))  # W/(m^2 * K^-4)
-        distance_sun2earth = 1.496 * (10 ** 8)  # km
+        if self.logger is not None:
+            self.logger.debug("\t\tApproaching Ambient Temperature (%.3f) (off since %s)", ctx.outside_temp,
+                              self.thermostat.get_end_time())
 
-        # calculate radiation from sun to outside of wall
-        solar_rad = o * (4 * math.pi * sun_radius ** 2) * (sun_temp ** 4)  # W
-        solar_i = solar_rad / (4 * math.pi * (distance_sun2earth ** 2))  # W/m^2
+        consts = self._constants
+        inner_temp = self.sharedInfo[0]
+        air_density = self.sharedInfo[1] / (consts.air_specific_r * (inner_temp + 273))  # kg/m^3
 
         # calculate amount of heat conducted through a single uniform wall (no layers)
-        w_conducted_heat = (w_area * (self.outside_temp.value - self.sharedInfo[0])) / self.walls.R
+        w_conducted_heat = (consts.w_area * (ctx.outside_temp - inner_temp)) / consts.wall_r
 
         # calculate amount that internal temperature raises by after adding the
         # heat conducted through the walls into the room
-        temp_change = w_conducted_heat / (air_density * r_volume * air_heat_cap)
-        self.sharedInfo[0] += temp_change
+        if ctx.dt == 1:
+            temp_change = w_conducted_heat / (air_density * consts.r_volume * consts.air_heat_cap)
+        else:
+            # share of the difference to the ambient temperature conducted in a second, compounded over the step
+            rate = consts.w_area / (consts.wall_r * air_density * consts.r_volume * consts.air_heat_cap)
+            temp_change = (ctx.outside_temp - inner_temp) * (1 - (1 - rate) ** ctx.dt)
+        self.sharedInfo[0] = inner_temp + temp_change
 
     def color_gradient(self, step_num=None) -> str:
         """Determine color of house depending on temperature
@@ -282,60 +494,52 @@ class Building(ABC):
         else:
             internal_temp = self.get_int_temp()
 
-        r = 255
-        g = 255
-        b = 255
-
-        t_c = int(round((c2f(internal_temp) - self._lower_temp_grad)))
-        diff = int(math.ceil((self._upper_temp_grad - self._lower_temp_grad) / 4))
+        return color_table(self._lower_temp_grad, self._upper_temp_grad).color(internal_temp)
 
-        if t_c >= (diff * 4):
-            g = 0
-            b = 0
+    def get_int_temp(self, step_num=None) -> float:
+        """Returns internal temperature of a house at a specified time
 
-        elif t_c >= (diff * 3):
-            g = int(round(g * (1 - ((t_c % diff) * (1 / diff)))))
-            b = 0
+        :param step_num: Step to retrieve temperature from. Default is None, which means the current step
+        :type step_num: int
+        :return: temperature at step
+        """
 
-        elif t_c >= (diff * 2):
-            r = int(round(r * ((t_c % diff) * (1 / diff))))
-            b = 0
+        if step_num is None:
+            step_num = self.world_clock.value
 
-        elif t_c >= diff:
-            r = 0
-            b = int(round(b * (1 - ((t_c % diff) * (1 / diff)))))
+        if self.history_store is not None and 0 <= step_num < self.temp_history.start:
+            return self.history_store.read("temp", self.n_id, self.h_id, step_num)
+        return self.temp_history[step_num]
 
-        elif t_c >= 0:
-            r = 0
-            g = int(g * round((t_c % diff) * (1 / diff), 2))
+    def temp_range(self, start, stop) -> np.ndarray:
+        """Returns the internal temperatures of a house over a range of steps
 
-        else:
-            r = 0
-            g = 0
+        :param start: first step
+        :type start: int
+        :param stop: step after the last one
+        :type stop: int
+        :return: temperature at every step of the range
+        """
 
-        color_code = '%02x%02x%02x' % (r, g, b)
-        hex_int = int(color_code, 16)
+        parts = list()
+        held = self.temp_history.start
+        if self.history_store is not None and start < held:
+            parts.append(self.history_store.read_range("temp", self.n_id, self.h_id, start, min(stop, held)))
+            start = min(stop, held)
 
-        if t_c < 0:
-            hex_int -= abs(t_c) * 4
-        elif t_c > (diff * 4):
-            t_c -= (diff * 4)
-            hex_int -= t_c * (131072 * 2)
+        parts.append(np.asarray(self.temp_history[start:stop], dtype=np.float64))
+        return np.concatenate(parts)
 
-        return str.format('#{:06x}', hex_int)
+    def attach_store(self, store) -> None:
+        """Read the temperature and charge samples dropped from memory from a history store
 
-    def get_int_temp(self, step_num=None) -> float:
-        """Returns internal temperature of a house at a specified time
-
-        :param step_num: Step to retrieve temperature from. Default is None, which means the current step
-        :type step_num: int
-        :return: temperature at step
+        :param store: history store, holding the homes of a neighborhood as the columns of a group
+        :type store: ChunkStore
+        :return: Nothing
         """
 
-        if step_num is not None:
-            return self.temp_history[step_num]
-        else:
-            return self.temp_history[self.world_clock.value]
+        self.history_store = store
+        self.battery.attach_store(store, self.n_id, self.h_id)
 
     def get_target_temp(self) -> int:
         """Returns the current target temperature of the house"""
@@ -351,7 +555,10 @@ class Building(ABC):
 class Residential(Building):
     """Residential Building Concrete Object"""
 
-    def __init__(self, n_id, i, inhabitants, amb_t, world_clock, logger_) -> None:
+    __slots__ = ("num_residents", "has_basement", "has_pool", "num_windows")
+
+    def __init__(self, n_id, i, inhabitants, amb_t, world_clock, logger_, num_steps=0, typecode='d',
+                 shared_info=None, battery=None, dt=1) -> None:
         """Constructor for residential buildings
 
         :param n_id: ID of neighborhood containing home
@@ -364,18 +571,29 @@ class Residential(Building):
         :type amb_t: multiprocessing variable
         :param world_clock: World Clock
         :type world_clock: multiprocessing variable
-        :param logger_: log file to write log messages to
-        :type: logger_: log object
+        :param logger_: log of the simulation, handing out the loggers of the home and its thermostat
+        :type: logger_: SimulationLog
+        :param num_steps: number of steps preallocated in the histories of the home
+        :type num_steps: int
+        :param typecode: storage typecode of the histories ('d' for doubles, 'f' for floats)
+        :type typecode: str
+        :param shared_info: view of the home's slot in a state slab. Default None, which allocates a private slab
+        :type shared_info: memoryview
+        :param battery: battery of the home, a slot of a storage bank. Default None, which allocates a private bank
+        :type battery: ElectricalStorage
+        :param dt: length of a step (s)
+        :type dt: int
         """
 
-        super().__init__(n_id, i, amb_t, world_clock, logger_)
+        super().__init__(n_id, i, amb_t, world_clock, logger_, num_steps, typecode, shared_info, battery, dt)
         self.num_residents = inhabitants
-        self.has_basement = bool(random.getrandbits(1))
+        # drawn by generate
+        self.has_basement = None
         self.has_pool = 1
         self.num_windows = 0
 
     def generate(self, min_length=None, max_length=None, min_width=None, max_width=None,
-                 lower_t_=32, upper_t_=78) -> None:
+                 lower_t_=32, upper_t_=78, draws=None) -> None:
         """Generates a residential building and its devices
 
         :param min_length: minimum length of house
@@ -390,13 +608,25 @@ class Residential(Building):
         :type lower_t_: int
         :param upper_t_: higher temperature gradient (used for determining temperature color of home)
         :type upper_t_: int
+        :param draws: values drawn for the home by generation.sample_neighborhood. Default None, which draws them
+            from the random module
+        :type draws: dict
         :return: Nothing
         """
 
-        # sizes taken approximated from average size of middle income home (40x40 ft) in the United States
-        self.num_floors = random.randint(1, 3)
-        self.length = 40 + random.randint(-10, 10)
-        self.width = 40 + random.randint(-10, 10)
+        walls = None
+        if draws is not None:
+            self.has_basement = draws["has_basement"]
+            self.num_floors = draws["num_floors"]
+            self.length = draws["length"]
+            self.width = draws["width"]
+            walls = generation.walls(draws)
+        else:
+            self.has_basement = bool(random.getrandbits(1))
+            # sizes taken approximated from average size of middle income home (40x40 ft) in the United States
+            self.num_floors = random.randint(1, 3)
+            self.length = 40 + random.randint(-10, 10)
+            self.width = 40 + random.randint(-10, 10)
         self.height = 8
         if min_length is not None:
             min_length = int(min_length)
@@ -420,10 +650,9 @@ class Residential(Building):
             self.devices["pool_pump"] = devices.PoolPump(2, 8)
 
         self.devices["evcs"] = devices.EVCS(1, 200)
-        self.battery = es.ElectricalStorage()
         self.pv = es.SolarPanel(5, 300)  # typical wattage of a solar panel
 
-        super().generate(lower_t_, upper_t_)
+        super().generate(lower_t_, upper_t_, walls)
 
         self.thermostat.set_target_temp(f2c(72))
         self.thermostat.set_mode(1)
@@ -436,7 +665,11 @@ class Residential(Building):
         f_area = self.length * self.width
         self.num_windows = round((f_area * 0.15) / 15)
 
-    def step(self) -> None:
-        """Step the house forward"""
+    def step(self, ctx=None) -> None:
+        """Step the house forward
+
+        :param ctx: clock and outside temperature of the step. Default None, which reads the shared world values
+        :type ctx: StepContext
+        """
 
-        super().step()
+        super().step(ctx)
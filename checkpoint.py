@@ -0,0 +1,447 @@
+import os
+import json
+import numpy as np
+import devices
+import es
+import materials
+from history import History
+from neighborhood import Neighborhood
+from building import Residential
+from aggregates import Aggregates
+from energy import flow_names
+
+
+VERSION = 8
+FULL = "full.npz"
+DELTA = "delta_{:012d}.npz"
+
+# device classes that can be saved, by name
+DEVICE_TYPES = {"PoolPump": devices.PoolPump, "EVCS": devices.EVCS}
+
+# world constructor arguments saved with a full checkpoint
+SETTINGS = ("num_neighborhoods", "num_homes", "num_steps", "log", "engine_type", "workers", "history_typecode",
+            "log_interval", "log_columns", "log_queue", "history_dir", "chunk_steps", "cache_chunks",
+            "checkpoint_dir", "checkpoint_every", "record_energy", "battery_config",
+            "seed", "log_levels", "log_sample", "memory_budget", "dt", "data_dir")
+
+
+def _times(values) -> np.ndarray:
+    """Pack optional times or temperatures into a float array, None becoming NaN"""
+    return np.array([np.nan if value is None else value for value in values], np.float64)
+
+
+def _time(value):
+    """Unpack a time packed by _times"""
+    return None if np.isnan(value) else int(value)
+
+
+def _homes(world) -> list:
+    return [home for neighborhood in world.neighborhoods for home in neighborhood.homes]
+
+
+def _device_names(homes) -> list:
+    return sorted({name for home in homes for name in home.devices})
+
+
+def _state(world, homes, names) -> dict:
+    """Arrays of the state of every home that changes while the world runs"""
+
+    thermostats = [home.thermostat for home in homes]
+    state = {
+        "temp": np.array([home.sharedInfo[0] for home in homes]),
+        "pressure": np.array([home.sharedInfo[1] for home in homes]),
+        "target_temp": np.array([thermostat.target_temp for thermostat in thermostats], np.float64),
+        "mode": np.array([thermostat.mode for thermostat in thermostats], np.int8),
+        "start_time": _times(thermostat.start_time for thermostat in thermostats),
+        "end_time": _times(thermostat.end_time for thermostat in thermostats),
+        "start_temp": _times(thermostat.start_temp for thermostat in thermostats),
+        "ac_on": np.array([thermostat.get_hvac_modes()[0] for thermostat in thermostats], np.int8),
+        "furnace_on": np.array([thermostat.get_hvac_modes()[1] for thermostat in thermostats], np.int8),
+        "charge": np.array([home.battery.current_capacity for home in homes], np.float64),
+        "grid_draw": np.array([home.grid_draw for home in homes], np.float64),
+    }
+
+    for j, name in enumerate(names):
+        present = [home.devices.get(name) for home in homes]
+        state["dev_state_{}".format(j)] = np.array([-1 if device is None else device.state
+                                                    for device in present], np.int8)
+        state["dev_on_{}".format(j)] = _times(None if device is None else device.on_time for device in present)
+        state["dev_off_{}".format(j)] = _times(None if device is None else device.off_time for device in present)
+        state["dev_power_{}".format(j)] = _times(None if device is None else device.power for device in present)
+
+    return state
+
+
+def _config(homes, names) -> dict:
+    """Arrays of the generated configuration of every home, which never changes while the world runs"""
+
+    walls = [home.walls for home in homes]
+    config = {
+        "num_residents": np.array([home.num_residents for home in homes], np.int64),
+        "has_basement": np.array([home.has_basement for home in homes], np.bool_),
+        "has_pool": np.array([home.has_pool for home in homes], np.int64),
+        "num_windows": np.array([home.num_windows for home in homes], np.int64),
+        "num_floors": np.array([home.num_floors for home in homes], np.int64),
+        "length": np.array([home.length for home in homes], np.float64),
+        "width": np.array([home.width for home in homes], np.float64),
+        "height": np.array([home.height for home in homes], np.float64),
+        "lower_temp_grad": np.array([home.lower_temp_grad for home in homes], np.float64),
+        "upper_temp_grad": np.array([home.upper_temp_grad for home in homes], np.float64),
+        "wall_type": np.array([list(materials.WALL_TYPES).index(wall.type) for wall in walls], np.int8),
+        "wall_r": np.array([wall.R for wall in walls], np.float64),
+        "wall_mass": np.array([wall.mass for wall in walls], np.float64),
+        "wall_thickness": np.array([wall.thickness for wall in walls], np.float64),
+        "wall_e": np.array([wall.e for wall in walls], np.float64),
+        "pv_cells": np.array([home.pv.num_cells for home in homes], np.float64),
+        "pv_wattage": np.array([home.pv.wattage for home in homes], np.float64),
+    }
+
+    batteries = [home.battery for home in homes]
+    for name in es.PARAMETERS:
+        attribute = "max_capacity" if name == "capacity" else name
+        config["battery_" + name] = np.array([getattr(battery, attribute) for battery in batteries], np.float64)
+
+    kinds = list(DEVICE_TYPES)
+    for j, name in enumerate(names):
+        present = [home.devices.get(name) for home in homes]
+        config["dev_type_{}".format(j)] = np.array([-1 if device is None else kinds.index(type(device).__name__)
+                                                    for device in present], np.int8)
+        config["dev_param_{}".format(j)] = _times(None if device is None else _device_param(device)
+                                                  for device in present)
+        config["dev_run_time_{}".format(j)] = _times(None if device is None else device.run_time
+                                                     for device in present)
+
+    return config
+
+
+def _device_param(device) -> float:
+    """Constructor argument of a device that is not part of its state"""
+
+    if isinstance(device, devices.PoolPump):
+        return device.horsepower
+    return device.level
+
+
+def _histories(world, homes, since) -> dict:
+    """Arrays of the history samples recorded since a step
+
+    Samples already moved to the history store are left out, they are read back from the store when loading.
+    """
+
+    first = max(since, world.temp_history.start)
+    last = world.world_clock.value
+    temps = np.empty((max(last - first + 1, 0), len(homes)))
+    charges = np.empty_like(temps)
+    for k, home in enumerate(homes):
+        temps[:, k] = home.temp_history[first:last + 1]
+        charges[:, k] = home.battery.charge_history[first:last + 1]
+
+    histories = {
+        "history_first": np.array([first], np.int64),
+        "world_temps": np.asarray(world.temp_history[first:last + 1], np.float64),
+        "temps": temps,
+        "charges": charges,
+        "aggregates_first": np.array([since], np.int64),
+        "aggregates": world.aggregates.values[since:last + 1],
+    }
+
+    if world.record_energy:
+        histories["flows"] = np.array(world.flow_rows(first, last + 1))
+
+    return histories
+
+
+def _write(path, name, meta, arrays) -> None:
+    """Atomically write a checkpoint file, so a crash while saving leaves the previous checkpoints intact"""
+
+    arrays["meta"] = np.frombuffer(json.dumps(meta).encode(), np.uint8)
+    temporary = os.path.join(path, name + ".tmp")
+    with open(temporary, 'wb') as checkpoint_file:
+        np.savez(checkpoint_file, **arrays)
+    os.replace(temporary, os.path.join(path, name))
+
+
+def _read(path, name):
+    """Returns the metadata and arrays of a checkpoint file"""
+
+    with np.load(os.path.join(path, name)) as checkpoint_file:
+        arrays = {key: checkpoint_file[key] for key in checkpoint_file.files}
+    return json.loads(arrays.pop("meta").tobytes().decode()), arrays
+
+
+def save(world, path, delta=False) -> None:
+    """Save a full or delta checkpoint of a world. See World.save_checkpoint
+
+    :param world: world to save
+    :type world: World
+    :param path: checkpoint directory
+    :type path: str
+    :param delta: save a delta checkpoint, only holding what changed since the previous checkpoint
+    :type delta: bool
+    :return: Nothing
+    """
+
+    if path is None:
+        raise ValueError("No checkpoint directory given")
+    if delta and world.checkpoint_time is None:
+        raise ValueError("A delta checkpoint needs a previous checkpoint")
+
+    os.makedirs(path, exist_ok=True)
+    world.sync_homes()
+    if world.history_store is not None:
+        # the store index must match the histories left out of the checkpoint
+        world.history_store.flush()
+
+    homes = _homes(world)
+    names = _device_names(homes)
+    clock = world.world_clock.value
+
+    meta = {
+        "version": VERSION,
+        "delta": delta,
+        "clock": clock,
+        "outside_temp": world.outside_temp.value,
+        "data_log_time": world.data_log_time,
+        "devices": names,
+    }
+    arrays = _state(world, homes, names)
+
+    if delta:
+        arrays.update(_histories(world, homes, world.checkpoint_time + 1))
+        _write(path, DELTA.format(clock), meta, arrays)
+
+    else:
+        meta["settings"] = {name: getattr(world, name) for name in SETTINGS}
+        meta["climate"] = [world.season, world.weather, world.lo_temp, world.hi_temp]
+        arrays.update(_config(homes, names))
+        arrays.update(_histories(world, homes, 0))
+        _write(path, FULL, meta, arrays)
+
+        # deltas of the previous full checkpoint no longer apply
+        for name in os.listdir(path):
+            if name.startswith("delta_"):
+                os.remove(os.path.join(path, name))
+
+    world.checkpoint_time = clock
+
+
+def _restore_home(world, neighborhood, i, k, config, names) -> Residential:
+    """Rebuild home i of a neighborhood from row k of the saved configuration"""
+
+    home = Residential(neighborhood.id, i, int(config["num_residents"][k]), world.outside_temp, world.world_clock,
+                       world.simulation_log, world.history_window, world.history_typecode, neighborhood.slab.view(i),
+                       neighborhood.batteries[i], world.dt)
+    home.has_basement = bool(config["has_basement"][k])
+    home.has_pool = int(config["has_pool"][k])
+    home.num_windows = int(config["num_windows"][k])
+    home.num_floors = int(config["num_floors"][k])
+
+    kinds = list(DEVICE_TYPES)
+    for j, name in enumerate(names):
+        kind = int(config["dev_type_{}".format(j)][k])
+        if kind < 0:
+            continue
+
+        param = float(config["dev_param_{}".format(j)][k])
+        if kinds[kind] == "PoolPump":
+            device = devices.PoolPump(param, 0)
+            device.run_time = float(config["dev_run_time_{}".format(j)][k])
+        else:
+            device = devices.EVCS(int(param), 0)
+        home.devices[name] = device
+
+    home.pv = es.SolarPanel(config["pv_cells"][k], config["pv_wattage"][k])
+    for name in es.PARAMETERS:
+        setattr(home.battery, "max_capacity" if name == "capacity" else name, float(config["battery_" + name][k]))
+    wall = materials.restore(list(materials.WALL_TYPES)[config["wall_type"][k]], float(config["wall_r"][k]),
+                             float(config["wall_mass"][k]), float(config["wall_thickness"][k]),
+                             float(config["wall_e"][k]))
+    home.restore(float(config["length"][k]), float(config["width"][k]), float(config["height"][k]), wall,
+                 float(config["lower_temp_grad"][k]), float(config["upper_temp_grad"][k]))
+
+    return home
+
+
+def _restore_state(homes, state, names) -> None:
+    """Set the state of every home from saved state arrays"""
+
+    for k, home in enumerate(homes):
+        thermostat = home.thermostat
+
+        home.sharedInfo[0] = float(state["temp"][k])
+        home.sharedInfo[1] = float(state["pressure"][k])
+
+        thermostat.target_temp = float(state["target_temp"][k])
+        thermostat.mode = int(state["mode"][k])
+        thermostat.start_time = _time(state["start_time"][k])
+        thermostat.end_time = _time(state["end_time"][k])
+        start_temp = state["start_temp"][k]
+        thermostat.start_temp = None if np.isnan(start_temp) else float(start_temp)
+        thermostat.set_hvac_modes(int(state["ac_on"][k]), int(state["furnace_on"][k]))
+
+        home.battery.current_capacity = float(state["charge"][k])
+        home.grid_draw = float(state["grid_draw"][k])
+
+        for j, name in enumerate(names):
+            device = home.devices.get(name)
+            if device is None:
+                continue
+
+            device.state = int(state["dev_state_{}".format(j)][k])
+            device.on_time = _time(state["dev_on_{}".format(j)][k])
+            device.off_time = _time(state["dev_off_{}".format(j)][k])
+            device.consumption = float(state["dev_power_{}".format(j)][k])
+
+
+def load(cls, path, **kwargs):
+    """Resume a world from a checkpoint directory. See World.load_checkpoint
+
+    :param cls: world class
+    :type cls: type
+    :param path: checkpoint directory
+    :type path: str
+    :param kwargs: constructor arguments overriding the saved ones
+    :return: resumed world
+    """
+
+    meta, full = _read(path, FULL)
+    if meta["version"] != VERSION:
+        raise ValueError("Unsupported checkpoint version {}".format(meta["version"]))
+
+    parts = [(meta, full)]
+    for name in sorted(os.listdir(path)):
+        if name.startswith("delta_") and name.endswith(".npz"):
+            delta_meta, delta = _read(path, name)
+            if delta_meta["clock"] > meta["clock"]:
+                parts.append((delta_meta, delta))
+
+    settings = dict(meta["settings"])
+    arguments = {
+        "log": settings["log"],
+        "engine": settings["engine_type"],
+        "workers": settings["workers"],
+        "float32_history": settings["history_typecode"] == 'f',
+        "log_interval": settings["log_interval"],
+        "log_columns": settings["log_columns"],
+        "log_queue": settings["log_queue"],
+        "history_dir": settings["history_dir"],
+        "chunk_steps": settings["chunk_steps"],
+        "cache_chunks": settings["cache_chunks"],
+        "checkpoint_dir": settings["checkpoint_dir"],
+        "checkpoint_every": settings["checkpoint_every"],
+        "record_energy": settings["record_energy"],
+        "battery": settings["battery_config"],
+        "seed": settings["seed"],
+        "log_levels": settings["log_levels"],
+        "log_sample": settings["log_sample"],
+        "memory_budget": settings["memory_budget"],
+        "dt": settings["dt"],
+        # checkpoints saved before the data logs could be moved hold no data_dir
+        "data_dir": settings.get("data_dir"),
+    }
+    arguments.update(kwargs)
+    if arguments["dt"] != settings["dt"]:
+        raise ValueError("A run cannot be resumed with steps of {} s instead of {} s".format(arguments["dt"],
+                                                                                           settings["dt"]))
+    if arguments["record_energy"] and not settings["record_energy"] and settings["history_dir"] is not None:
+        raise ValueError("Energy flows cannot be recorded from the middle of a run with a history store")
+
+    # the store of the run is reopened below instead of being replaced
+    history_dir = arguments.pop("history_dir")
+    world = cls(settings["num_neighborhoods"], settings["num_homes"], settings["num_steps"] * settings["dt"],
+                history_dir=None, **arguments)
+    world.history_dir = history_dir
+
+    last_meta, last = parts[-1]
+    clock = last_meta["clock"]
+    names = meta["devices"]
+    homes_per_neighborhood = settings["num_homes"]
+
+    first = 0
+    if history_dir is not None:
+        world.open_history_store('a')
+        store = world.history_store
+
+        # forget the chunks saved after the last checkpoint, then continue from the end of the store
+        store.truncate("temp", "world", clock + 1)
+        first = store.end("temp", "world")
+        for i in range(world.num_neighborhoods):
+            store.truncate("temp", i, first)
+            store.truncate("charge", i, first)
+            store.truncate("energy", i, first)
+
+    # assemble the histories held in memory from every checkpoint file, later files overriding earlier ones
+    world_temps = np.empty(clock - first + 1)
+    temps = np.empty((clock - first + 1, world.num_neighborhoods * homes_per_neighborhood))
+    charges = np.empty_like(temps)
+    flows = None
+    for part_meta, part in parts:
+        start = int(part["history_first"][0])
+        skip = max(first - start, 0)
+        rows = part["temps"][skip:]
+        temps[start + skip - first:start + skip - first + len(rows)] = rows
+        charges[start + skip - first:start + skip - first + len(rows)] = part["charges"][skip:]
+        world_temps[start + skip - first:start + skip - first + len(rows)] = part["world_temps"][skip:]
+
+        if world.record_energy and "flows" in part:
+            if flows is None:
+                # flows of a run that did not record them are left at zero
+                flows = np.zeros((clock - first + 1,) + part["flows"].shape[1:])
+            flows[start + skip - first:start + skip - first + len(rows)] = part["flows"][skip:]
+
+    world.season, world.weather, world.lo_temp, world.hi_temp = meta["climate"]
+    world.outside_temp.value = last_meta["outside_temp"]
+    world.world_clock.value = clock
+    world.data_log_time = last_meta["data_log_time"]
+    world.temp_history = History(world.history_window + 1, world.history_typecode, first)
+    world.temp_history.extend(world_temps)
+
+    # the charge histories held in memory start at the same step as the temperature histories
+    world.storage.base = first
+    world.storage.reserve(clock)
+    world.storage.history[:len(charges)] = charges
+    world.storage.end[0] = first + len(charges)
+
+    k = 0
+    for i in range(world.num_neighborhoods):
+        neighborhood = Neighborhood(i, homes_per_neighborhood, world.outside_temp, world.world_clock,
+                                    world.simulation_log, world.history_window, world.history_typecode,
+                                    world.slab.section(k, homes_per_neighborhood),
+                                    [world.storage.battery(k + h) for h in range(homes_per_neighborhood)], world.dt)
+
+        for h in range(homes_per_neighborhood):
+            home = _restore_home(world, neighborhood, h, k, full, names)
+            home.temp_history = History(world.history_window + 1, world.history_typecode, first)
+            home.temp_history.extend(temps[:, k])
+
+            neighborhood.homes.append(home)
+            k += 1
+
+        world.neighborhoods.append(neighborhood)
+
+    # the aggregates are never moved to the history store, every checkpoint file holds the steps it covers
+    aggregates = np.empty((clock + 1, world.num_neighborhoods + 1, last["aggregates"].shape[2]))
+    for part_meta, part in parts:
+        start = int(part["aggregates_first"][0])
+        aggregates[start:start + len(part["aggregates"])] = part["aggregates"]
+
+    world.aggregates = Aggregates([len(neighborhood.homes) for neighborhood in world.neighborhoods],
+                                  world.num_steps + 1)
+    world.aggregates.extend(aggregates)
+    for neighborhood in world.neighborhoods:
+        neighborhood.aggregates = world.aggregates
+
+    homes = _homes(world)
+    _restore_state(homes, last, names)
+
+    world.checkpoint_time = clock
+    world.setup_run(resume=True)
+
+    if world.record_energy:
+        if flows is None:
+            flows = np.zeros((clock - first + 1, len(homes), len(flow_names(world.device_names))))
+        world.put_flows(first, flows)
+
+    world.check_memory_budget()
+
+    return world
@@ -0,0 +1,342 @@
+import os
+import json
+import zlib
+import bisect
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+INDEX_FILE = "index.json"
+
+
+class ChunkStore:
+    """On-disk columnar store of history chunks.
+
+    Histories are grouped by variable (e.g. "temp", "charge") and by group (a neighborhood id, or "world"). Each
+    chunk holds a block of consecutive samples for every column of a group (one column per home), stored column
+    by column as the differences between consecutive samples, byte-shuffled and compressed with zlib, and
+    appended to the file of its variable and group. An index maps the first sample of each chunk to its place in
+    the file, so any sample is found with a binary search and a single chunk decompression. Recently written or
+    decompressed chunks are kept in a small LRU cache.
+
+    Chunks are compressed and written by a background thread. At most max_pending chunks wait for it, further
+    writes block until it catches up.
+    """
+
+    def __init__(self, path, mode='w', cache_chunks=16, level=1, max_pending=8) -> None:
+        """Constructor for a chunk store
+
+        :param path: directory of the store
+        :type path: str
+        :param mode: 'w' to create an empty store, replacing any previous one, 'r' to read an existing store, 'a'
+            to read an existing store and append chunks to it
+        :type mode: str
+        :param cache_chunks: number of decompressed chunks kept in memory
+        :type cache_chunks: int
+        :param level: zlib compression level
+        :type level: int
+        :param max_pending: maximum number of chunks waiting to be compressed
+        :type max_pending: int
+        """
+
+        if mode not in ('w', 'r', 'a'):
+            raise ValueError("Unknown chunk store mode '{}', expected 'w', 'r' or 'a'".format(mode))
+
+        self.path = path
+        self.mode = mode
+        self.cache_chunks = max(cache_chunks, 1)
+        self.level = level
+        self.max_pending = max(max_pending, 1)
+
+        self._index = dict()  # "variable/group" -> [[start, rows, columns, offset, nbytes, dtype], ...]
+        self._starts = dict()  # "variable/group" -> first sample of every chunk, for bisection
+        self._files = dict()
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chunk-store")
+        self._pending = list()
+
+        if mode == 'w':
+            os.makedirs(path, exist_ok=True)
+            for name in os.listdir(path):
+                if name.endswith(".chunks") or name == INDEX_FILE:
+                    os.remove(os.path.join(path, name))
+
+        else:
+            with open(os.path.join(path, INDEX_FILE)) as index_file:
+                self._index = json.load(index_file)
+            self._starts = {key: [chunk[0] for chunk in chunks] for key, chunks in self._index.items()}
+
+    @property
+    def nbytes(self) -> int:
+        """Get the number of compressed bytes held on disk"""
+        return sum(chunk[4] or 0 for chunks in self._index.values() for chunk in chunks)
+
+    @property
+    def cached_nbytes(self) -> int:
+        """Get the number of bytes of the decompressed chunks held in the cache"""
+        with self._lock:
+            return sum(chunk.nbytes for chunk in self._cache.values())
+
+    def end(self, variable, group) -> int:
+        """Returns the index after the last sample stored for a variable and group, 0 if none is stored
+
+        :param variable: name of the variable
+        :type variable: str
+        :param group: group of columns
+        :type group: int or str
+        :return: sample index
+        """
+
+        chunks = self._index.get(self._key(variable, group))
+        if not chunks:
+            return 0
+        return chunks[-1][0] + chunks[-1][1]
+
+    def truncate(self, variable, group, end) -> None:
+        """Forget every chunk of a variable and group that ends after sample end, e.g. to resume a run from an
+        earlier point. Their bytes stay in the file but are never read
+
+        :param variable: name of the variable
+        :type variable: str
+        :param group: group of columns
+        :type group: int or str
+        :param end: index after the last sample to keep
+        :type end: int
+        :return: Nothing
+        """
+
+        self.wait()
+        key = self._key(variable, group)
+
+        with self._lock:
+            chunks = self._index.get(key, list())
+            while chunks and chunks[-1][0] + chunks[-1][1] > end:
+                chunks.pop()
+                self._starts[key].pop()
+                self._cache.pop((key, len(chunks)), None)
+
+    def write(self, variable, group, start, block) -> None:
+        """Append a chunk of samples of every column of a group
+
+        :param variable: name of the variable
+        :type variable: str
+        :param group: group of columns
+        :type group: int or str
+        :param start: index of the first sample of the chunk, right after the last stored one
+        :type start: int
+        :param block: samples of the chunk, one row per column
+        :type block: numpy array of shape (columns, samples)
+        :return: Nothing
+        """
+
+        if self.mode == 'r':
+            raise ValueError("Chunk store is read-only")
+
+        key = self._key(variable, group)
+        if start != self.end(variable, group):
+            raise ValueError("Chunk of {} starts at {}, expected {}".format(key, start,
+                                                                            self.end(variable, group)))
+
+        # a copy in C order, whatever the layout of the block it comes from
+        block = np.array(block, order='C')
+        columns, rows = block.shape
+
+        with self._lock:
+            # the offset and size in the file are filled in once the chunk is written
+            entry = [start, rows, columns, None, None, block.dtype.str]
+            self._index.setdefault(key, list()).append(entry)
+            self._starts.setdefault(key, list()).append(start)
+            self._remember((key, len(self._index[key]) - 1), block)
+
+        self._pending = [future for future in self._pending if not future.done()]
+        if len(self._pending) >= self.max_pending:
+            self._pending.pop(0).result()
+        self._pending.append(self._writer.submit(self._append, key, entry, block))
+
+    def _append(self, key, entry, block) -> None:
+        """Writer thread: compress a chunk and append it to its file"""
+
+        # consecutive samples are close, so their differences (as integers) are mostly leading zero bytes, which
+        # byte shuffling groups together
+        integers = block.view(np.dtype("u{}".format(block.itemsize)))
+        delta = np.diff(integers, axis=1, prepend=integers.dtype.type(0))
+        shuffled = delta.view(np.uint8).reshape(-1, block.itemsize).T
+        data = zlib.compress(np.ascontiguousarray(shuffled).tobytes(), self.level)
+
+        with self._lock:
+            chunk_file = self._file(key)
+            chunk_file.seek(0, os.SEEK_END)
+            entry[3] = chunk_file.tell()
+            chunk_file.write(data)
+            entry[4] = len(data)
+
+    def read(self, variable, group, column, index) -> float:
+        """Returns a single sample
+
+        :param variable: name of the variable
+        :type variable: str
+        :param group: group of columns
+        :type group: int or str
+        :param column: column of the sample in its group
+        :type column: int
+        :param index: index of the sample
+        :type index: int
+        :return: sample
+        """
+
+        start, chunk = self.chunk(variable, group, index)
+        return float(chunk[column, index - start])
+
+    def read_all(self, variable, group, index) -> np.ndarray:
+        """Returns the sample of every column of a group at an index
+
+        :param variable: name of the variable
+        :type variable: str
+        :param group: group of columns
+        :type group: int or str
+        :param index: index of the samples
+        :type index: int
+        :return: one sample per column
+        """
+
+        start, chunk = self.chunk(variable, group, index)
+        return chunk[:, index - start]
+
+    def read_range(self, variable, group, column, start, stop) -> np.ndarray:
+        """Returns the samples of a column, or of a slice of columns, from index start up to, but not including,
+        index stop
+
+        :param variable: name of the variable
+        :type variable: str
+        :param group: group of columns
+        :type group: int or str
+        :param column: column of the samples in its group, or slice of columns
+        :type column: int or slice
+        :param start: index of the first sample
+        :type start: int
+        :param stop: index after the last sample
+        :type stop: int
+        :return: samples, one row per column for a slice of columns
+        """
+
+        parts = list()
+        index = start
+        while index < stop:
+            first, chunk = self.chunk(variable, group, index)
+            part = chunk[column, index - first:stop - first]
+            parts.append(part)
+            index += part.shape[-1]
+
+        if not parts:
+            return np.zeros(0)
+        return np.concatenate(parts, axis=-1)
+
+    def chunk(self, variable, group, index) -> tuple:
+        """Returns the decompressed chunk holding a sample, from the cache if possible
+
+        :param variable: name of the variable
+        :type variable: str
+        :param group: group of columns
+        :type group: int or str
+        :param index: index of a sample of the chunk
+        :type index: int
+        :return: index of the first sample of the chunk, and its samples with one row per column
+        """
+
+        key = self._key(variable, group)
+        starts = self._starts.get(key, [])
+
+        i = bisect.bisect_right(starts, index) - 1
+        if i < 0 or index >= starts[i] + self._index[key][i][1]:
+            raise IndexError("sample {} of {} is not in the history store".format(index, key))
+
+        with self._lock:
+            chunk = self._cache.get((key, i))
+            if chunk is not None:
+                self._cache.move_to_end((key, i))
+                return starts[i], chunk
+
+        if self._index[key][i][3] is None:
+            # evicted from the cache before being written
+            self.wait()
+
+        with self._lock:
+            start, rows, columns, offset, nbytes, dtype = self._index[key][i]
+            chunk_file = self._file(key)
+            chunk_file.seek(offset)
+            data = zlib.decompress(chunk_file.read(nbytes))
+
+            itemsize = np.dtype(dtype).itemsize
+            shuffled = np.frombuffer(data, np.uint8).reshape(itemsize, -1)
+            delta = np.ascontiguousarray(shuffled.T).view("u{}".format(itemsize)).reshape(columns, rows)
+            chunk = np.cumsum(delta, axis=1, dtype=delta.dtype).view(dtype)
+
+            self._remember((key, i), chunk)
+            return start, chunk
+
+    def wait(self) -> None:
+        """Wait until every chunk is written
+
+        :return: Nothing
+        """
+
+        while self._pending:
+            self._pending.pop(0).result()
+
+    def _remember(self, key, chunk) -> None:
+        """Put a chunk in the LRU cache, evicting the least recently used one if the cache is full"""
+
+        self._cache[key] = chunk
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_chunks:
+            self._cache.popitem(last=False)
+
+    def flush(self) -> None:
+        """Write the chunk files and the index to disk
+
+        :return: Nothing
+        """
+
+        if self.mode == 'r':
+            return
+
+        self.wait()
+        with self._lock:
+            for chunk_file in self._files.values():
+                chunk_file.flush()
+
+            with open(os.path.join(self.path, INDEX_FILE), 'w') as index_file:
+                json.dump(self._index, index_file)
+
+    def close(self) -> None:
+        """Flush the store and close its files
+
+        :return: Nothing
+        """
+
+        self.flush()
+        self._writer.shutdown()
+
+        with self._lock:
+            for chunk_file in self._files.values():
+                chunk_file.close()
+            self._files.clear()
+            self._cache.clear()
+
+    @staticmethod
+    def _key(variable, group) -> str:
+        return "{}/{}".format(variable, group)
+
+    def _file(self, key):
+        """Returns the open chunk file of a variable and group"""
+
+        chunk_file = self._files.get(key)
+        if chunk_file is None:
+            name = os.path.join(self.path, "{}.chunks".format(key.replace("/", "_")))
+            chunk_file = open(name, 'rb' if self.mode == 'r' else 'a+b')
+            self._files[key] = chunk_file
+
+        return chunk_file
@@ -0,0 +1,191 @@
+import math
+import functools
+import numpy as np
+
+
+# temperatures are quantized to whole degrees F, a table covers this many degrees around the gradient at first
+TABLE_MARGIN = 64
+
+
+def c2f(temp):
+    """Celsius -> fahrenheit, for scalars and arrays"""
+    return temp * 9.0 / 5.0 + 32.0
+
+
+def color_indices(temps, lower_grad) -> np.ndarray:
+    """Quantize temperatures to the color indices of ``Building.color_gradient``
+
+    The color of a home only depends on its temperature in whole degrees F above the lower gradient, which is the
+    index returned here. Indices are negative below the lower gradient and grow past the upper one.
+
+    :param temps: temperatures (C)
+    :type temps: numpy array
+    :param lower_grad: lower temperature gradient of every home (F)
+    :type lower_grad: numpy array or float
+    :return: color index of every temperature
+    """
+
+    # rounds halves to even, like round()
+    return np.rint(c2f(np.asarray(temps, dtype=np.float64)) - lower_grad).astype(np.int16)
+
+
+def gradient_color(t_c, diff) -> str:
+    """Color of a color index: blue below the lower gradient, through cyan, green and yellow, to red above the
+    upper gradient, darkening outside of it
+
+    :param t_c: color index, whole degrees F above the lower gradient
+    :type t_c: int
+    :param diff: degrees F between two base colors, a quarter of the gradient
+    :type diff: int
+    :return: String containing hex color code
+    """
+
+    r = 255
+    g = 255
+    b = 255
+
+    if t_c >= (diff * 4):
+        g = 0
+        b = 0
+
+    elif t_c >= (diff * 3):
+        g = int(round(g * (1 - ((t_c % diff) * (1 / diff)))))
+        b = 0
+
+    elif t_c >= (diff * 2):
+        r = int(round(r * ((t_c % diff) * (1 / diff))))
+        b = 0
+
+    elif t_c >= diff:
+        r = 0
+        b = int(round(b * (1 - ((t_c % diff) * (1 / diff)))))
+
+    elif t_c >= 0:
+        r = 0
+        g = int(g * round((t_c % diff) * (1 / diff), 2))
+
+    else:
+        r = 0
+        g = 0
+
+    color_code = '%02x%02x%02x' % (r, g, b)
+    hex_int = int(color_code, 16)
+
+    if t_c < 0:
+        hex_int -= abs(t_c) * 4
+    elif t_c > (diff * 4):
+        t_c -= (diff * 4)
+        hex_int -= t_c * (131072 * 2)
+
+    return str.format('#{:06x}', hex_int)
+
+
+class ColorTable:
+    """Lookup table from color indices to hex color codes for one pair of temperature gradients.
+
+    Colors are computed once per index, and the table grows when it is asked for an index outside of its range.
+    """
+
+    def __init__(self, lower_grad, upper_grad) -> None:
+        """Constructor for a color table
+
+        :param lower_grad: lower temperature gradient (F)
+        :type lower_grad: float
+        :param upper_grad: upper temperature gradient (F)
+        :type upper_grad: float
+        """
+
+        self.lower_grad = lower_grad
+        self.upper_grad = upper_grad
+        self.diff = int(math.ceil((upper_grad - lower_grad) / 4))
+
+        # first index of the table and the color of every index, replaced together so readers never mix them
+        self.table = (0, np.empty(0, dtype=object))
+        self._cover(-TABLE_MARGIN, 4 * self.diff + TABLE_MARGIN)
+
+    def _cover(self, first, last) -> tuple:
+        """Extend the table to every index from first to last, and return it"""
+
+        table_first, table_codes = self.table
+        first = min(first, table_first)
+        last = max(last, table_first + len(table_codes) - 1)
+
+        codes = np.empty(last - first + 1, dtype=object)
+        for t_c in range(first, last + 1):
+            codes[t_c - first] = gradient_color(t_c, self.diff)
+
+        self.table = (first, codes)
+        return self.table
+
+    def color(self, temp) -> str:
+        """Returns the color of a single temperature
+
+        :param temp: temperature (C)
+        :type temp: float
+        :return: String containing hex color code
+        """
+
+        t_c = int(round((c2f(temp) - self.lower_grad)))
+        first, codes = self.table
+        if not first <= t_c < first + len(codes):
+            first, codes = self._cover(t_c, t_c)
+
+        return codes[t_c - first]
+
+    def colors(self, temps) -> np.ndarray:
+        """Returns the color of every temperature of an array
+
+        :param temps: temperatures (C)
+        :type temps: numpy array
+        :return: hex color codes, as an array of strings
+        """
+
+        indices = color_indices(temps, self.lower_grad).astype(np.int64)
+        first, codes = self.table
+        if len(indices) and (indices.min() < first or indices.max() >= first + len(codes)):
+            first, codes = self._cover(int(indices.min()), int(indices.max()))
+
+        return codes[indices - first]
+
+
+@functools.lru_cache(maxsize=64)
+def color_table(lower_grad, upper_grad) -> ColorTable:
+    """Returns the shared color table of a pair of temperature gradients
+
+    :param lower_grad: lower temperature gradient (F)
+    :type lower_grad: float
+    :param upper_grad: upper temperature gradient (F)
+    :type upper_grad: float
+    :return: color table
+    """
+
+    return ColorTable(lower_grad, upper_grad)
+
+
+def gradient_colors(temps, lower_grads, upper_grads) -> np.ndarray:
+    """Returns the color of every home from its temperature and its own temperature gradients
+
+    :param temps: temperature of every home (C)
+    :type temps: numpy array
+    :param lower_grads: lower temperature gradient of every home (F)
+    :type lower_grads: numpy array
+    :param upper_grads: upper temperature gradient of every home (F)
+    :type upper_grads: numpy array
+    :return: hex color codes, as an array of strings
+    """
+
+    temps = np.asarray(temps, dtype=np.float64)
+    if len(temps) == 0:
+        return np.empty(0, dtype=object)
+
+    # homes of a world normally share a single pair of gradients
+    if (lower_grads == lower_grads[0]).all() and (upper_grads == upper_grads[0]).all():
+        return color_table(float(lower_grads[0]), float(upper_grads[0])).colors(temps)
+
+    codes = np.empty(len(temps), dtype=object)
+    pairs = np.stack([lower_grads, upper_grads], axis=1)
+    for lower_grad, upper_grad in np.unique(pairs, axis=0):
+        same = (lower_grads == lower_grad) & (upper_grads == upper_grad)
+        codes[same] = color_table(float(lower_grad), float(upper_grad)).colors(temps[same])
+
+    return codes
@@ -0,0 +1,77 @@
+"""Fixtures shared by the tests, run with ``python -m pytest -q`` from the repository root.
+
+Every test runs from a temporary directory, as make_world writes the configuration of the world to the working
+directory, and the worlds of the tests write their data logs there too.
+"""
+import pytest
+
+from world import World
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def make_world(workdir):
+    """Factory of small seeded summer worlds, closed at the end of the test"""
+
+    worlds = list()
+
+    def make(engine="vector", neighborhoods=2, homes=6, duration=600, hvac_every=3, **kwargs):
+        """Build a world and turn on the HVAC of one home in every hvac_every homes, 0 to leave them off"""
+
+        kwargs.setdefault("log_interval", 0)
+        kwargs.setdefault("seed", 7)
+        kwargs.setdefault("data_dir", str(workdir / "data"))
+        world = World(neighborhoods, homes, duration, engine=engine, **kwargs)
+        worlds.append(world)
+        world.make_world("summer", "sunny")
+
+        if hvac_every:
+            world.sync_homes()
+            for neighborhood in world.neighborhoods:
+                for home in neighborhood.homes[::hvac_every]:
+                    home.thermostat.fan_on(0)
+            world.sync_engine()
+        return world
+
+    yield make
+
+    for world in worlds:
+        world.close()
+
+
+@pytest.fixture
+def stepped(make_world):
+    """Step a world and return the temperatures and energy flows of every home at every step"""
+
+    def run(engine, steps, **kwargs):
+        world = make_world(engine, record_energy=True, **kwargs)
+        world.advance(steps)
+        world.sync_homes()
+        return world.temperature_rows(0, steps + 1), world.flow_rows(0, steps + 1)
+
+    return run
+
+
+@pytest.fixture
+def serve(make_world):
+    """Serve a world built by make_world through a test client of the API, its runner left idle"""
+
+    import api
+    from runner import WorldRunner
+
+    def start(*args, **kwargs):
+        world = make_world(*args, **kwargs)
+        api.world = world
+        api.runner = WorldRunner(world, api.world_lock)
+        return api.app.test_client(), world
+
+    yield start
+
+    if api.runner is not None:
+        api.runner.close()
+    api.world = api.runner = None
@@ -0,0 +1,42 @@
+class StepContext:
+    """World state shared by every home during a single step.
+
+    The world clock and outside temperature are read once per world step and handed down to the neighborhoods and
+    homes, so the per-home step code reads plain attributes instead of the shared ``multiprocessing`` values.
+    """
+
+    def __init__(self, clock, outside_temp, dt=1, timers=None) -> None:
+        """Constructor for a step context
+
+        :param clock: world clock value of the step being computed
+        :type clock: int
+        :param outside_temp: ambient temperature during the step (C)
+        :type outside_temp: float
+        :param dt: length of the step (s)
+        :type dt: int
+        :param timers: phase timers the homes add the time of their phases to. Default None, which means the
+            timers are off
+        :type timers: PhaseTimers
+        """
+
+        self.clock = clock
+        self.outside_temp = outside_temp
+        self.dt = dt
+        self.timers = timers
+
+    @classmethod
+    def read(cls, world_clock, outside_temp, dt=1, timers=None):
+        """Returns a context holding the current values of the shared world clock and outside temperature
+
+        :param world_clock: world clock
+        :type world_clock: multiprocessing Value
+        :param outside_temp: outside temperature
+        :type outside_temp: multiprocessing Value
+        :param dt: length of the step (s)
+        :type dt: int
+        :param timers: phase timers of the step, None when they are off
+        :type timers: PhaseTimers
+        :return: step context
+        """
+
+        return cls(world_clock.value, outside_temp.value, dt, timers)
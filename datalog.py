@@ -0,0 +1,209 @@
+import os
+import csv
+import queue
+import atexit
+import threading
+
+
+def home_temperature(home, step) -> float:
+    """Interior temperature of a home at a step, read from its temperature history"""
+    return home.get_int_temp(step)
+
+
+def home_target(home, step) -> float:
+    """Current target temperature of a home's thermostat"""
+    return home.get_target_temp()
+
+
+def home_charge(home, step) -> float:
+    """Current charge of a home's battery"""
+    return home.battery.current_charge()
+
+
+def home_grid(home, step) -> float:
+    """Energy a home drew from the grid during its last step"""
+    return home.grid_draw
+
+
+# columns that can be logged for every home. Only the temperature is read from a history, the other columns are
+# read from the state of the home when the row is captured
+COLUMNS = {
+    "temperature": home_temperature,
+    "target": home_target,
+    "charge": home_charge,
+    "grid": home_grid,
+}
+DEFAULT_COLUMNS = ("temperature",)
+
+# queue item telling the writer thread to stop
+_STOP = None
+
+
+class DataLogger:
+    """Writes the neighborhood data logs (``data/neighborhood_<id>.csv``) from a background thread.
+
+    The simulation thread only captures the values of a row, every file is kept open and rows are formatted and
+    written by a writer thread. Captured rows wait in a bounded queue: when the writer falls behind by queue_size
+    rows, capturing the next one blocks until it catches up, which bounds the memory held by pending rows.
+    """
+
+    def __init__(self, neighborhoods, columns=DEFAULT_COLUMNS, queue_size=256, data_dir=None, append=False) -> None:
+        """Constructor for the data logger. Creates the data logs and writes their headers
+
+        :param neighborhoods: neighborhoods to log, one file each
+        :type neighborhoods: list
+        :param columns: values logged for every home, among "temperature", "target", "charge" and "grid"
+        :type columns: tuple
+        :param queue_size: maximum number of captured rows waiting to be written
+        :type queue_size: int
+        :param data_dir: directory of the data logs. Default None, which means the data/ directory of the package
+        :type data_dir: str
+        :param append: append rows to existing data logs (e.g. of a resumed run) instead of creating new ones
+        :type append: bool
+        """
+
+        columns = tuple(columns)
+        for column in columns:
+            if column not in COLUMNS:
+                raise ValueError("Unknown data log column '{}', expected one of {}".format(
+                    column, ", ".join(COLUMNS)))
+
+        if not columns:
+            raise ValueError("At least one data log column is needed")
+
+        if data_dir is None:
+            abs_path, filename = os.path.split(os.path.realpath(__file__))
+            data_dir = "{}/data".format(abs_path)
+        os.makedirs(data_dir, exist_ok=True)
+
+        self.neighborhoods = neighborhoods
+        self.columns = columns
+        self.data_dir = data_dir
+
+        self._readers = [COLUMNS[column] for column in columns]
+        self._queue = queue.Queue(maxsize=max(queue_size, 1))
+        self._error = None
+
+        self._files = list()
+        for neighborhood in neighborhoods:
+            name = "{}/neighborhood_{}.csv".format(data_dir, neighborhood.id)
+            if append and os.path.exists(name):
+                data_file = open(name, 'a', newline='')
+            else:
+                data_file = open(name, 'w', newline='')
+                csv.writer(data_file).writerows(self.header(neighborhood))
+            self._files.append(data_file)
+
+        self._thread = threading.Thread(target=self._write, name="data-logger", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def live(self) -> bool:
+        """True if a column is read from the state of the homes rather than from their histories"""
+        return any(column != "temperature" for column in self.columns)
+
+    def header(self, neighborhood) -> list:
+        """Returns the header rows of a neighborhood's data log
+
+        :param neighborhood: neighborhood of the data log
+        :type neighborhood: Neighborhood
+        :return: list of rows
+        """
+
+        width = len(self.columns)
+        header = ['House:']
+        wall_config = ['Wall Type:']
+        temp_config = ['Target Temp:']
+        size_config = ['Size (m):']
+        column_names = ['Column:']
+
+        for i, home in enumerate(neighborhood.homes):
+            header.extend([i] * width)
+            wall_config.extend([home.get_wall_type()] * width)
+            temp_config.extend(["{:.4}".format(home.get_target_temp())] * width)
+            size_config.extend(["{:.2f} x {:.2f} x {:.2f}".format(home.length, home.width, home.height)] * width)
+            column_names.extend(self.columns)
+
+        temp_config.append("Outside Temp:")
+
+        rows = [header, wall_config, temp_config, size_config]
+        if self.columns != DEFAULT_COLUMNS:
+            rows.append(column_names)
+        rows.append(list())
+
+        return rows
+
+    def log(self, step, outside_temp) -> None:
+        """Capture one row per neighborhood and queue them for writing. Blocks while the queue is full
+
+        :param step: step to log
+        :type step: int
+        :param outside_temp: outside temperature to log with the step
+        :type outside_temp: float
+        :return: Nothing
+        """
+
+        if self._error is not None:
+            raise RuntimeError("The data logger failed") from self._error
+
+        values = [[read(home, step) for home in neighborhood.homes for read in self._readers]
+                  for neighborhood in self.neighborhoods]
+        self._queue.put((step, outside_temp, values))
+
+    def flush(self) -> None:
+        """Wait until every captured row is written to disk
+
+        :return: Nothing
+        """
+
+        self._queue.join()
+
+        if self._error is not None:
+            raise RuntimeError("The data logger failed") from self._error
+
+    def close(self) -> None:
+        """Write the remaining rows, stop the writer thread and close the data logs. Called at exit if the world
+        was not closed
+
+        :return: Nothing
+        """
+
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+        for data_file in self._files:
+            data_file.close()
+
+        atexit.unregister(self.close)
+
+    def _write(self) -> None:
+        """Writer thread loop: format and write queued rows until told to stop"""
+
+        writers = [csv.writer(data_file) for data_file in self._files]
+
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+
+            try:
+                if self._error is None:
+                    step, outside_temp, values = item
+                    outside_temp = "{:.5f}".format(outside_temp)
+
+                    for writer, row in zip(writers, values):
+                        writer.writerow([step] + ["{:.3f}".format(value) for value in row] + ["", outside_temp])
+
+                    if self._queue.empty():
+                        for data_file in self._files:
+                            data_file.flush()
+
+            except Exception as error:
+                # keep draining the queue so the simulation never blocks on a dead writer
+                self._error = error
+
+            finally:
+                self._queue.task_done()
@@ -2,6 +2,9 @@ from abc import ABC, abstractmethod
 
 
 class Devices(ABC):
+    # slotted, every home holding its own devices
+    __slots__ = ("_consumption", "_state", "_amps", "_on_time", "_off_time")
+
     @abstractmethod
     def __init__(self, consumption_):
         self._consumption = consumption_  # in watts
@@ -21,6 +24,11 @@ class Devices(ABC):
     def consumption(self, value):
         self._consumption = value
 
+    @property
+    def power(self):
+        # power drawn while the device is on, in watts
+        return self._consumption
+
     @property
     def state(self):
         return self._state
@@ -45,6 +53,11 @@ class Devices(ABC):
     def off_time(self, value):
         self._off_time = value
 
+    @property
+    def run_time(self):
+        # number of seconds the device runs before turning off, None if it runs until turned off
+        return None
+
     def turn_on(self, time):
         self.on_time = time
         self.state = 1
@@ -54,15 +67,17 @@ class Devices(ABC):
         self.state = 0
 
     @abstractmethod
-    def check_run_time(self, run_time, time):
-        # return true if it is time to turn the device off
-        if time > run_time + self._on_time:
+    def check_run_time(self, run_time, time, dt=1):
+        # return true if it is time to turn the device off, times are steps of dt seconds and run_time is in seconds
+        if (time - self._on_time) * dt > run_time:
             return True
         else:
             return False
 
 
 class PoolPump(Devices):
+    __slots__ = ("_horsepower", "_run_time")
+
     def __init__(self, h, run_time_):
         self._horsepower = h
         self._run_time = run_time_ * 3600  # hours to seconds
@@ -70,11 +85,25 @@ class PoolPump(Devices):
         consumption_ = self._horsepower * 745.7  # conversion from horsepower to watts
         super().__init__(consumption_)
 
-    def check_run_time(self, time):
-        super().check_run_time(self._run_time, time)
+    @property
+    def horsepower(self):
+        return self._horsepower
+
+    @property
+    def run_time(self):
+        return self._run_time
+
+    @run_time.setter
+    def run_time(self, value):
+        self._run_time = value
+
+    def check_run_time(self, time, dt=1):
+        return super().check_run_time(self._run_time, time, dt)
 
 
 class EVCS(Devices):
+    __slots__ = ("_level",)
+
     def __init__(self, level_, amps_):
         self._level = level_
 
@@ -85,5 +114,9 @@ class EVCS(Devices):
 
         super().__init__(consumption_)
 
-    def check_run_time(self, time):
+    @property
+    def level(self):
+        return self._level
+
+    def check_run_time(self, time, dt=1):
         pass
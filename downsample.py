@@ -0,0 +1,88 @@
+import numpy as np
+
+
+# ways of reducing a series to a number of points
+METHODS = ("lttb", "minmax")
+
+# fewest points each method can reduce a series to: the first and last samples for lttb plus one bucket, and the
+# lowest and highest samples of one bucket for minmax
+MIN_POINTS = {"lttb": 3, "minmax": 2}
+
+
+def minmax(values, points) -> np.ndarray:
+    """Pick the lowest and the highest sample of each of points / 2 buckets of equal length, in time order
+
+    Keeps every peak of the series, which suits plots of noisy or switching values (e.g. HVAC cycles).
+
+    :param values: samples of the series
+    :type values: numpy array
+    :param points: maximum number of samples to keep, at least 2
+    :type points: int
+    :return: sorted indices of the samples kept
+    """
+
+    if points < MIN_POINTS["minmax"]:
+        raise ValueError("minmax keeps at least {} points".format(MIN_POINTS["minmax"]))
+
+    n = len(values)
+    buckets = points // 2
+    if n <= points:
+        return np.arange(n)
+
+    bucket = np.repeat(np.arange(buckets), np.diff(np.linspace(0, n, buckets + 1).astype(np.int64)))
+
+    # sorted by bucket then value, the first sample of a bucket is its lowest and the last one its highest
+    order = np.lexsort((values, bucket))
+    ends = np.cumsum(np.bincount(bucket, minlength=buckets))
+    lowest = order[ends - np.bincount(bucket, minlength=buckets)]
+    highest = order[ends - 1]
+
+    return np.unique(np.concatenate([lowest, highest]))
+
+
+def lttb(steps, values, points) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: keep the first and the last sample, and from each of points - 2 buckets the
+    sample forming the largest triangle with the sample kept from the previous bucket and the mean of the next one
+
+    Keeps the visual shape of the series with few points.
+
+    :param steps: step of every sample
+    :type steps: numpy array
+    :param values: samples of the series
+    :type values: numpy array
+    :param points: maximum number of samples to keep, at least 3
+    :type points: int
+    :return: sorted indices of the samples kept
+    """
+
+    if points < MIN_POINTS["lttb"]:
+        raise ValueError("lttb keeps at least {} points".format(MIN_POINTS["lttb"]))
+
+    n = len(values)
+    if n <= points:
+        return np.arange(n)
+
+    x = np.asarray(steps, dtype=np.float64)
+    y = np.asarray(values, dtype=np.float64)
+
+    # buckets of the samples between the first and the last one
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+
+    # mean of every bucket, and of the last sample as a final bucket
+    sizes = np.diff(edges)
+    mean_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / sizes, x[-1])
+    mean_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / sizes, y[-1])
+
+    kept = np.empty(points, dtype=np.int64)
+    kept[0] = 0
+    kept[-1] = n - 1
+
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # twice the area of the triangles (a, j, mean of the next bucket) for every sample j of the bucket
+        area = np.abs((x[a] - mean_x[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (mean_y[i + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        kept[i + 1] = a
+
+    return kept
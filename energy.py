@@ -0,0 +1,151 @@
+import numpy as np
+
+
+# energy flows of a home during a step: produced by its PV array, stored in and drawn from its battery, used by its
+# HVAC system and drawn from the grid, followed by the energy used by each of its devices. Like every energy of the
+# simulation (battery charges, HVAC heat), flows are in J: the power of a source or a load (W) times dt
+FLOWS = ("pv", "charged", "discharged", "hvac", "grid")
+PV, CHARGED, DISCHARGED, HVAC, GRID = range(len(FLOWS))
+
+
+def flow_names(device_names) -> tuple:
+    """Returns the name of every flow recorded for homes with the given devices
+
+    :param device_names: names of the devices, in column order
+    :type device_names: list
+    :return: FLOWS followed by the device names
+    """
+
+    return FLOWS + tuple(device_names)
+
+
+def home_flows(home, device_names) -> list:
+    """Returns the energy flows of a home during the step it just took, in the order of flow_names
+
+    :param home: home that just stepped, whose battery was dispatched
+    :type home: Building
+    :param device_names: names of the devices with a column, in column order
+    :type device_names: list
+    :return: flows of the step
+    """
+
+    battery = home.battery
+    thermostat = home.thermostat
+
+    flows = [battery.pv_output, battery.stored, battery.drawn,
+             thermostat.get_power() if thermostat.running() else 0, battery.grid]
+    for name in device_names:
+        device = home.devices.get(name)
+        # devices draw their power (W) for the dt seconds of the step
+        flows.append(0 if device is None else device.consumption * home.dt)
+
+    return flows
+
+
+class EnergyLedger:
+    """Energy flows of every home at every step, in a single (steps x homes x flows) typed matrix.
+
+    Row 0 holds step ``start``, which moves forward when older steps are saved to a history store. The matrix is
+    preallocated for the expected number of steps and grows by doubling. Used by worlds stepped object by object,
+    the engines keep the flows next to their temperature histories.
+    """
+
+    def __init__(self, num_homes, device_names, capacity=0, typecode='d', start=0) -> None:
+        """Constructor for an energy ledger
+
+        :param num_homes: number of homes
+        :type num_homes: int
+        :param device_names: names of the devices with a column, in column order
+        :type device_names: list
+        :param capacity: number of steps to preallocate
+        :type capacity: int
+        :param typecode: storage typecode of the flows ('d' for doubles, 'f' for floats)
+        :type typecode: str
+        :param start: step of the first row, when earlier ones are held elsewhere
+        :type start: int
+        """
+
+        self.names = flow_names(device_names)
+        self.values = np.zeros((max(capacity, 1), num_homes, len(self.names)), np.dtype(typecode))
+        self._start = start
+        self._size = 0
+
+    @property
+    def start(self) -> int:
+        """Get the first step held in memory"""
+        return self._start
+
+    @property
+    def nbytes(self) -> int:
+        """Get the number of bytes of the preallocated matrix"""
+        return self.values.nbytes
+
+    def __len__(self) -> int:
+        return self._start + self._size
+
+    def record(self, step, flows) -> None:
+        """Record the flows of consecutive steps
+
+        :param step: first step, right after the last recorded one
+        :type step: int
+        :param flows: flows of every home at every step
+        :type flows: numpy array of shape (steps, homes, flows)
+        :return: Nothing
+        """
+
+        if step != len(self):
+            raise ValueError("Energy flows of step {} recorded after step {}".format(step, len(self) - 1))
+
+        count = len(flows)
+        capacity = len(self.values)
+        while capacity < self._size + count:
+            capacity *= 2
+
+        if capacity > len(self.values):
+            values = np.zeros((capacity,) + self.values.shape[1:], self.values.dtype)
+            values[:self._size] = self.values[:self._size]
+            self.values = values
+
+        self.values[self._size:self._size + count] = flows
+        self._size += count
+
+    def rows(self, start, stop) -> np.ndarray:
+        """Returns the flows of every home at every step of a range held in memory
+
+        :param start: first step
+        :type start: int
+        :param stop: step after the last one
+        :type stop: int
+        :return: (steps x homes x flows) view
+        """
+
+        if start < self._start or stop > len(self):
+            raise IndexError("energy flows of steps {} to {} are not in memory".format(start, stop - 1))
+
+        return self.values[start - self._start:stop - self._start]
+
+    def truncate(self, size) -> None:
+        """Forget the flows of every step from step size onwards
+
+        :param size: number of steps to keep
+        :type size: int
+        :return: Nothing
+        """
+
+        self._size = max(0, min(self._size, size - self._start))
+
+    def discard(self, step) -> None:
+        """Drop the rows of every step before step, once they are saved to a history store
+
+        :param step: first step to keep
+        :type step: int
+        :return: Nothing
+        """
+
+        count = min(step - self._start, self._size)
+        if count <= 0:
+            return
+
+        self.values[:self._size - count] = self.values[count:self._size]
+        self._size -= count
+        self._start += count
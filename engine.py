@@ -0,0 +1,405 @@
+import numpy as np
+from history import HistoryWindow
+from es import StorageBank
+from energy import FLOWS, PV, CHARGED, DISCHARGED, HVAC, GRID, flow_names
+
+
+class VectorEngine:
+    """Struct-of-arrays engine that advances every home of a world at once.
+
+    The engine copies the state of the generated home objects (temperatures, geometry, walls, HVAC, battery and
+    devices) into contiguous NumPy arrays and replays the per-object rules of ``Building.step`` with a handful of
+    array operations per step. Temperature histories are kept in a single (steps x homes) matrix and each home's
+    ``temp_history`` is pointed at its column, so ``get_int_temp`` and the API keep working unchanged. The first
+    row of the matrix holds step ``base``, which moves forward when older steps are saved to a history store.
+    Batteries and PV arrays are held by a storage bank with the same rows, which every home's battery is moved to.
+    The HVAC power and grid draw of every neighborhood are summed at every step into a (steps x neighborhoods x 2)
+    matrix of loads with the same rows, which the world aggregates read. When recording energy flows, the flows of
+    every home at every step are kept in a (steps x flows x homes) matrix with the same rows too, so each flow of a
+    step is written contiguously.
+    """
+
+    air_specific_r = 287.058  # J/(kg * K) based on mean molar mass for dry air (28.96 g/mol)
+    air_heat_cap = 0.718  # J/(kg * K) based on c_v value for dry air @ 300 K
+
+    def __init__(self, homes, capacity, allocate=np.zeros, typecode='d', flows=False, dt=1) -> None:
+        """Constructor for the vector engine
+
+        :param homes: homes to advance, in neighborhood order
+        :type homes: list
+        :param capacity: number of steps to preallocate in the temperature history
+        :type capacity: int
+        :param allocate: array factory taking (shape, dtype), used to place the state arrays
+        :type allocate: callable
+        :param typecode: storage typecode of the temperature history ('d' for doubles, 'f' for floats)
+        :type typecode: str
+        :param flows: record the energy flows of every home at every step
+        :type flows: bool
+        :param dt: length of a step (s)
+        :type dt: int
+        :return: Nothing
+        """
+
+        self.homes = list(homes)
+        self.num_homes = len(self.homes)
+        self.dt = dt
+        self._allocate = allocate
+
+        n = self.num_homes
+        self.device_names = sorted({name for home in self.homes for name in home.devices})
+        d = len(self.device_names)
+
+        # thermal state and geometry
+        self.temp = allocate(n, np.float64)
+        self.pressure = allocate(n, np.float64)
+        self.w_area = allocate(n, np.float64)
+        self.volume = allocate(n, np.float64)
+        self.wall_r = allocate(n, np.float64)
+
+        # HVAC state
+        self.mode = allocate(n, np.int8)
+        self.hvac_on = allocate(n, np.bool_)
+        self.start_time = allocate(n, np.int64)
+        self.end_time = allocate(n, np.int64)
+        self.start_temp = allocate(n, np.float64)
+        self.target_temp = allocate(n, np.float64)
+        self.hvac_power = allocate(n, np.float64)
+
+        # devices, one column per device name (absent devices draw nothing and never expire)
+        self.dev_present = allocate((n, d), np.bool_)
+        self.dev_state = allocate((n, d), np.int8)
+        self.dev_power = allocate((n, d), np.float64)
+        self.dev_on_time = allocate((n, d), np.int64)
+        self.dev_off_time = allocate((n, d), np.int64)
+        self.dev_run_time = allocate((n, d), np.float64)
+
+        self.history = allocate((capacity + 1, n), np.dtype(typecode))
+        self.base = min((home.temp_history.start for home in self.homes), default=0)
+        # step after the last one recorded in the history matrix
+        self.end = allocate(1, np.int64)
+        self.end[0] = max((len(home.temp_history) for home in self.homes), default=self.base)
+
+        # batteries and PV arrays, with their charge history
+        self.storage = StorageBank(n, capacity, typecode, self.base, allocate, dt)
+
+        # first home of every neighborhood, and HVAC power and grid draw of every neighborhood at every step
+        n_ids = np.array([home.n_id for home in self.homes])
+        self.group_starts = np.flatnonzero(np.diff(n_ids, prepend=n_ids[:1] - 1)) if n else np.zeros(0, np.int64)
+        self.loads = allocate((capacity + 1, len(self.group_starts), 2), np.float64)
+
+        self.flow_names = flow_names(self.device_names)
+        self.flows = allocate((capacity + 1, len(self.flow_names), n), np.dtype(typecode)) if flows else None
+
+        self.load()
+        self.attach()
+
+    def __getstate__(self) -> dict:
+        """State sent to the worker process stepping the engine: its arrays, without the home objects nor the array
+        factory"""
+
+        state = dict(vars(self))
+        state.update(homes=list(), _allocate=None)
+        return state
+
+    def load(self) -> None:
+        """Copy the current state of the home objects into the engine arrays
+
+        Must be called after homes are modified through their objects (e.g. thermostat commands from the API).
+
+        :return: Nothing
+        """
+
+        for k, home in enumerate(self.homes):
+            thermostat = home.thermostat
+            consts = home.constants
+
+            self.temp[k] = home.sharedInfo[0]
+            self.pressure[k] = home.sharedInfo[1]
+            self.w_area[k] = consts.w_area
+            self.volume[k] = consts.r_volume
+            self.wall_r[k] = consts.wall_r
+
+            self.mode[k] = thermostat.get_mode()
+            self.hvac_on[k] = thermostat.running()
+            self.start_time[k] = thermostat.get_start_time()
+            self.end_time[k] = thermostat.get_end_time()
+            self.start_temp[k] = thermostat.get_start_temp()
+            self.target_temp[k] = thermostat.get_target_temp()
+            self.hvac_power[k] = thermostat.get_power()
+
+            # batteries already moved to the storage bank are up to date
+            battery = home.battery
+            if battery.bank is not self.storage:
+                storage = self.storage
+                storage.charge[k] = battery.current_capacity
+                storage.max_charge[k] = battery.max_capacity
+                storage.charge_efficiency[k] = battery.charge_efficiency
+                storage.discharge_efficiency[k] = battery.discharge_efficiency
+                # rates are held per step
+                storage.charge_rate[k] = battery.charge_rate * self.dt
+                storage.discharge_rate[k] = battery.discharge_rate * self.dt
+                storage.pv_output[k] = battery.pv_output
+                storage.grid[k] = battery.grid
+
+            for j, name in enumerate(self.device_names):
+                device = home.devices.get(name)
+                if device is None:
+                    self.dev_present[k, j] = False
+                    self.dev_state[k, j] = 0
+                    self.dev_power[k, j] = 0
+                    self.dev_run_time[k, j] = np.inf
+                    continue
+
+                self.dev_present[k, j] = True
+                self.dev_state[k, j] = device.state
+                self.dev_power[k, j] = device._consumption
+                self.dev_on_time[k, j] = -1 if device.on_time is None else device.on_time
+                self.dev_off_time[k, j] = -1 if device.off_time is None else device.off_time
+                self.dev_run_time[k, j] = np.inf if device.run_time is None else device.run_time
+
+    def store(self) -> None:
+        """Write the engine state back into the home objects
+
+        :return: Nothing
+        """
+
+        for k, home in enumerate(self.homes):
+            thermostat = home.thermostat
+
+            home.sharedInfo[0] = float(self.temp[k])
+            home.sharedInfo[1] = float(self.pressure[k])
+
+            thermostat.end_time = int(self.end_time[k])
+            if not self.hvac_on[k]:
+                thermostat.set_hvac_modes(0, 0)
+
+            for j, name in enumerate(self.device_names):
+                if not self.dev_present[k, j]:
+                    continue
+
+                device = home.devices[name]
+                device.state = int(self.dev_state[k, j])
+                off_time = int(self.dev_off_time[k, j])
+                device.off_time = None if off_time < 0 else off_time
+
+    def attach(self) -> None:
+        """Point every home's temperature history at its column of the history matrix, and move every home's
+        battery to its slot of the storage bank
+
+        Steps already recorded by the home objects are copied into the matrices first.
+
+        :return: Nothing
+        """
+
+        rows = len(self.history)
+        storage = self.storage
+        for k, home in enumerate(self.homes):
+            recorded = home.temp_history[self.base:self.base + rows]
+            self.history[:len(recorded), k] = recorded
+            home.temp_history = HistoryWindow(self.history[:, k], self.base, self.end)
+
+            recorded = home.battery.charge_history[self.base:self.base + rows]
+            storage.history[:len(recorded), k] = recorded
+            storage.end[0] = max(storage.end[0], self.base + len(recorded))
+            home.battery.attach(storage, k)
+
+    def reserve(self, step) -> None:
+        """Make sure the history matrix can hold every step up to and including step
+
+        :param step: last step that will be recorded
+        :type step: int
+        :return: Nothing
+        """
+
+        while step - self.base >= len(self.history):
+            self._grow()
+
+    def _grow(self) -> None:
+        """Double the capacity of the history matrix"""
+
+        rows, n = self.history.shape
+        history = self._allocate((rows * 2, n), self.history.dtype)
+        history[:rows] = self.history
+        self.history = history
+
+        loads = self._allocate((rows * 2,) + self.loads.shape[1:], self.loads.dtype)
+        loads[:rows] = self.loads
+        self.loads = loads
+
+        if self.flows is not None:
+            flows = self._allocate((rows * 2,) + self.flows.shape[1:], self.flows.dtype)
+            flows[:rows] = self.flows
+            self.flows = flows
+
+        self.storage.reserve(self.base + rows * 2 - 1)
+        for k, home in enumerate(self.homes):
+            home.temp_history = HistoryWindow(self.history[:, k], self.base, self.end)
+
+    def discard(self, step) -> None:
+        """Drop the rows of every step before step, once they are saved to a history store
+
+        The remaining rows move to the top of the matrix, which keeps its size.
+
+        :param step: first step to keep
+        :type step: int
+        :return: Nothing
+        """
+
+        count = step - self.base
+        if count <= 0:
+            return
+
+        rows = len(self.history)
+        self.history[:rows - count] = self.history[count:]
+        self.loads[:rows - count] = self.loads[count:]
+        if self.flows is not None:
+            self.flows[:rows - count] = self.flows[count:]
+        self.storage.discard(step)
+        self.base = step
+
+        for k, home in enumerate(self.homes):
+            home.temp_history = HistoryWindow(self.history[:, k], self.base, self.end)
+
+    def temperatures(self, step) -> np.ndarray:
+        """Returns the temperature of every home at a recorded step still held in the history matrix
+
+        :param step: step to read, between base and the current clock
+        :type step: int
+        :return: one temperature per home, in neighborhood order
+        """
+
+        return self.history[step - self.base]
+
+    def temperature_rows(self, start, stop) -> np.ndarray:
+        """Returns the temperature of every home at every step of a range still held in the history matrix
+
+        :param start: first step
+        :type start: int
+        :param stop: step after the last one
+        :type stop: int
+        :return: one row of temperatures per step
+        """
+
+        return self.history[start - self.base:stop - self.base]
+
+    def load_rows(self, start, stop) -> np.ndarray:
+        """Returns the HVAC power and grid draw of every neighborhood at every step of a range still held in memory
+
+        :param start: first step
+        :type start: int
+        :param stop: step after the last one
+        :type stop: int
+        :return: (steps x neighborhoods x 2) loads
+        """
+
+        return self.loads[start - self.base:stop - self.base]
+
+    def flow_rows(self, start, stop) -> np.ndarray:
+        """Returns the energy flows of every home at every step of a range still held in memory
+
+        :param start: first step
+        :type start: int
+        :param stop: step after the last one
+        :type stop: int
+        :return: (steps x homes x flows) view
+        """
+
+        return self.flows[start - self.base:stop - self.base].transpose(0, 2, 1)
+
+    def put_flows(self, start, flows) -> None:
+        """Write the energy flows of consecutive steps computed outside of the engine (e.g. by a fast-forward)
+
+        :param start: first step
+        :type start: int
+        :param flows: flows of every home at every step
+        :type flows: numpy array of shape (steps, homes, flows)
+        :return: Nothing
+        """
+
+        self.reserve(start + len(flows) - 1)
+        self.flows[start - self.base:start - self.base + len(flows)] = np.transpose(flows, (0, 2, 1))
+
+    def close(self) -> None:
+        """Release the resources held by the engine. In-process arrays need no cleanup"""
+
+        pass
+
+    def step_batch(self, clock, outside_temps) -> None:
+        """Advance every home by one step per ambient temperature
+
+        :param clock: world clock value of the first step of the batch
+        :type clock: int
+        :param outside_temps: ambient temperature during each step of the batch
+        :type outside_temps: list
+        :return: Nothing
+        """
+
+        for i, outside_temp in enumerate(outside_temps):
+            self.step(clock + i, outside_temp)
+
+    def step(self, clock, outside_temp) -> None:
+        """Advance every home by one step
+
+        Mirrors ``Building.step``: run or stop the HVAC systems, let idle homes approach the ambient temperature,
+        then dispatch the energy consumed by HVAC systems and devices to the storage bank.
+
+        :param clock: world clock value of the step being computed
+        :type clock: int
+        :param outside_temp: ambient temperature during the step
+        :type outside_temp: float
+        :return: Nothing
+        """
+
+        # turn off HVAC systems that reached their end time
+        expired = self.hvac_on & (clock > self.end_time)
+        self.hvac_on[expired] = False
+        self.end_time[expired] = clock
+
+        # running systems move linearly towards the target temperature
+        active = self.hvac_on
+        span = self.end_time - self.start_time
+        delta = np.abs(self.start_temp - self.target_temp) / np.where(active, span, 1)
+        self.temp[active & (self.mode == 1)] -= delta[active & (self.mode == 1)]
+        self.temp[active & (self.mode == 2)] += delta[active & (self.mode == 2)]
+
+        # idle homes approach the ambient temperature through their walls
+        idle = ~active
+        temp = self.temp[idle]
+        air_density = self.pressure[idle] / (self.air_specific_r * (temp + 273))
+        if self.dt == 1:
+            w_conducted_heat = (self.w_area[idle] * (outside_temp - temp)) / self.wall_r[idle]
+            self.temp[idle] = temp + w_conducted_heat / (air_density * self.volume[idle] * self.air_heat_cap)
+        else:
+            # one-second steps compounded over the step, like Building.approach_amb
+            rate = self.w_area[idle] / (self.wall_r[idle] * air_density * self.volume[idle] * self.air_heat_cap)
+            self.temp[idle] = temp + (outside_temp - temp) * (1 - (1 - rate) ** self.dt)
+
+        # turn off devices that exceeded their run time (in seconds)
+        done = (self.dev_state == 1) & ((clock - self.dev_on_time) * self.dt > self.dev_run_time)
+        self.dev_state[done] = 0
+        self.dev_off_time[done] = clock
+
+        # charge the batteries, then draw the consumed energy from them, the rest comes from the grid
+        hvac = self.hvac_power * self.hvac_on
+        consumption = (self.dev_power * self.dev_state).sum(axis=1) * self.dt + hvac
+        if clock - self.base >= len(self.history):
+            self._grow()
+        self.history[clock - self.base] = self.temp
+        self.end[0] = clock + 1
+
+        storage = self.storage
+        storage.dispatch(clock, consumption)
+
+        if self.num_homes:
+            loads = self.loads[clock - self.base]
+            loads[:, 0] = np.add.reduceat(hvac, self.group_starts)
+            loads[:, 1] = np.add.reduceat(storage.grid, self.group_starts)
+
+        if self.flows is not None:
+            flows = self.flows[clock - self.base]
+            flows[PV] = storage.pv_output
+            flows[CHARGED] = storage.stored
+            flows[DISCHARGED] = storage.drawn
+            flows[HVAC] = hvac
+            flows[GRID] = storage.grid
+            flows[len(FLOWS):] = (self.dev_power * self.dev_state).T * self.dt
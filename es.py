@@ -1,49 +1,468 @@
+import numpy as np
+from history import HistoryWindow
+
+
+# default battery of a home
+AMPS = 415  # Ah
+VOLTAGE = 12  # V
+CAPACITY = AMPS * VOLTAGE * 3600  # J (multiply by 3600 to convert from W*hr to J)
+
+# battery parameters that can be configured, for every home of a bank or for a single battery
+PARAMETERS = ("capacity", "charge_efficiency", "discharge_efficiency", "charge_rate", "discharge_rate")
+
+
+class StorageBank:
+    """Batteries and PV arrays of many homes, charged and discharged in one vectorized pass per step.
+
+    Every step, each PV array produces its output, which charges its battery up to the battery's charge rate and
+    the room left in it, with the losses of its charge efficiency. Each home then draws the energy it consumed
+    from its battery, up to the discharge rate and the charge held, with the losses of its discharge efficiency,
+    and the rest from the grid. By default batteries are lossless and have no rate limits.
+
+    The charge of every battery at the end of every step is recorded in a single (steps x homes) matrix, one
+    sample per step, whose first row holds step ``base``. Homes hold an ``ElectricalStorage`` view of their slot.
+    """
+
+    def __init__(self, num_homes, capacity=0, typecode='d', start=0, allocate=np.zeros, dt=1) -> None:
+        """Constructor for a storage bank
+
+        :param num_homes: number of homes held by the bank
+        :type num_homes: int
+        :param capacity: number of steps to preallocate in the charge history
+        :type capacity: int
+        :param typecode: storage typecode of the charge history ('d' for doubles, 'f' for floats)
+        :type typecode: str
+        :param start: step held in the first row of the charge history
+        :type start: int
+        :param allocate: array factory taking (shape, dtype), used to place the arrays
+        :type allocate: callable
+        :param dt: length of a step (s)
+        :type dt: int
+        """
+
+        n = num_homes
+        self.num_homes = n
+        self.dt = dt
+        self._allocate = allocate
+
+        # battery parameters, the rates are in J per step (the rates given in W times dt)
+        self.max_charge = allocate(n, np.float64)
+        self.charge_efficiency = allocate(n, np.float64)
+        self.discharge_efficiency = allocate(n, np.float64)
+        self.charge_rate = allocate(n, np.float64)
+        self.discharge_rate = allocate(n, np.float64)
+        self.max_charge[:] = CAPACITY
+        self.charge_efficiency[:] = 1
+        self.discharge_efficiency[:] = 1
+        self.charge_rate[:] = np.inf
+        self.discharge_rate[:] = np.inf
+
+        # state, and energy produced and consumed by every home during a step
+        self.charge = allocate(n, np.float64)
+        self.pv_output = allocate(n, np.float64)
+        self.demand = allocate(n, np.float64)
+
+        # energy stored in and drawn from every battery, and drawn from the grid, during the last step
+        self.stored = allocate(n, np.float64)
+        self.drawn = allocate(n, np.float64)
+        self.grid = allocate(n, np.float64)
+
+        self.history = allocate((capacity + 1, n), np.dtype(typecode))
+        self.base = start
+        # step after the last one recorded in the charge history
+        self.end = allocate(1, np.int64)
+        self.end[0] = start
+
+    def __getstate__(self) -> dict:
+        """State sent to the worker process stepping the bank: its arrays, without the array factory"""
+
+        state = dict(vars(self))
+        state["_allocate"] = None
+        return state
+
+    def battery(self, i):
+        """Returns the battery of home i of the bank
+
+        :param i: index of the home in the bank
+        :type i: int
+        :return: view of the slot of the home
+        """
+
+        if not 0 <= i < self.num_homes:
+            raise IndexError("storage bank home index out of range")
+
+        return ElectricalStorage(self, i)
+
+    def configure(self, capacity=None, charge_efficiency=None, discharge_efficiency=None, charge_rate=None,
+                  discharge_rate=None) -> None:
+        """Set battery parameters of every home of the bank, the ones left to None are kept
+
+        :param capacity: maximum charge of a battery (J)
+        :type capacity: float
+        :param charge_efficiency: share of the energy produced by a PV array that is stored, in (0, 1]
+        :type charge_efficiency: float
+        :param discharge_efficiency: share of the energy drawn from a battery that reaches the home, in (0, 1]
+        :type discharge_efficiency: float
+        :param charge_rate: maximum power taken from a PV array (W), inf for no limit
+        :type charge_rate: float
+        :param discharge_rate: maximum power drawn from a battery (W), inf for no limit
+        :type discharge_rate: float
+        :return: Nothing
+        """
+
+        for name, value in zip(PARAMETERS, (capacity, charge_efficiency, discharge_efficiency, charge_rate,
+                                            discharge_rate)):
+            if value is None:
+                continue
+
+            check(name, value)
+            if name == "capacity":
+                self.max_charge[:] = value
+                np.minimum(self.charge, self.max_charge, out=self.charge)
+            elif name.endswith("rate"):
+                getattr(self, name)[:] = value * self.dt
+            else:
+                getattr(self, name)[:] = value
+
+    def reserve(self, step) -> None:
+        """Make sure the charge history can hold every step up to and including step
+
+        :param step: last step that will be recorded
+        :type step: int
+        :return: Nothing
+        """
+
+        while step - self.base >= len(self.history):
+            self._grow()
+
+    def _grow(self) -> None:
+        """Double the capacity of the charge history"""
+
+        rows, n = self.history.shape
+        history = self._allocate((rows * 2, n), self.history.dtype)
+        history[:rows] = self.history
+        self.history = history
+
+    def discard(self, step) -> None:
+        """Drop the rows of every step before step, once they are saved to a history store
+
+        The remaining rows move to the top of the matrix, which keeps its size.
+
+        :param step: first step to keep
+        :type step: int
+        :return: Nothing
+        """
+
+        count = step - self.base
+        if count <= 0:
+            return
+
+        rows = len(self.history)
+        self.history[:rows - count] = self.history[count:]
+        self.base = step
+
+    def record(self, step) -> None:
+        """Record the current charge of every battery as its charge at the end of step
+
+        :param step: step to record
+        :type step: int
+        :return: Nothing
+        """
+
+        if step - self.base >= len(self.history):
+            self._grow()
+        self.history[step - self.base] = self.charge
+        self.end[0] = step + 1
+
+    def dispatch(self, step, demand=None) -> None:
+        """Charge every battery from its PV array, then draw the demand of every home from its battery and the grid
+
+        :param step: step being computed, whose charges are recorded
+        :type step: int
+        :param demand: energy consumed by every home during the step. Default None, which uses the demand the homes
+            set through their battery
+        :type demand: numpy array
+        :return: Nothing
+        """
+
+        if demand is None:
+            demand = self.demand
+
+        # charge from the PV arrays, up to the charge rate and the room left in the batteries
+        np.minimum(self.pv_output, self.charge_rate, out=self.stored)
+        self.stored *= self.charge_efficiency
+        np.minimum(self.stored, self.max_charge - self.charge, out=self.stored)
+        np.maximum(self.stored, 0, out=self.stored)
+        self.charge += self.stored
+
+        # energy to draw from the batteries to cover the demand, up to the discharge rate and the charge held
+        wanted = demand / self.discharge_efficiency
+        np.minimum(wanted, self.discharge_rate, out=self.drawn)
+        np.minimum(self.drawn, self.charge, out=self.drawn)
+        self.charge -= self.drawn
+
+        # the rest comes from the grid
+        np.subtract(wanted, self.drawn, out=self.grid)
+        self.grid *= self.discharge_efficiency
+
+        self.record(step)
+
+    def run(self, i, demand, step, steps) -> tuple:
+        """Advance the battery of home i through consecutive steps of constant demand, in closed form
+
+        With a constant PV output and demand, every step adds the same energy a and draws the same energy w, so the
+        charge after step t is the linear ramp min(c1 - w + t * (a - w), max - w) clipped at 0, where c1 is the
+        charge after the first charging. Used by the fast-forward to skip the steps between two events.
+
+        :param i: index of the home in the bank
+        :type i: int
+        :param demand: energy consumed by the home during every step
+        :type demand: float
+        :param step: last step already computed
+        :type step: int
+        :param steps: number of steps to compute, from step + 1
+        :type steps: int
+        :return: energy stored in and drawn from the battery, and drawn from the grid, at every step
+        """
+
+        top = self.max_charge[i]
+        efficiency = self.discharge_efficiency[i]
+        added = min(self.pv_output[i], self.charge_rate[i]) * self.charge_efficiency[i]
+        wanted = demand / efficiency
+        draw = min(wanted, self.discharge_rate[i])
+
+        charge = self.charge[i]
+        first = min(charge + added, top)
+        after = np.maximum(np.minimum(first - draw + np.arange(steps) * (added - draw), top - draw), 0)
+
+        before = np.empty(steps)
+        before[0] = charge
+        before[1:] = after[:-1]
+        charged = np.minimum(before + added, top)
+        stored = charged - before
+        drawn = np.minimum(draw, charged)
+        grid = (wanted - drawn) * efficiency
+
+        self.reserve(step + steps)
+        self.history[step + 1 - self.base:step + steps + 1 - self.base, i] = after
+        self.end[0] = max(self.end[0], step + steps + 1)
+        self.charge[i] = after[-1]
+        self.stored[i], self.drawn[i], self.grid[i] = stored[-1], drawn[-1], grid[-1]
+
+        return stored, drawn, grid
+
+
+def check(name, value) -> None:
+    """Raise a ValueError if a battery parameter is out of range
+
+    :param name: name of the parameter, among PARAMETERS
+    :type name: str
+    :param value: value of the parameter
+    :type value: float
+    :return: Nothing
+    """
+
+    if name not in PARAMETERS:
+        raise ValueError("Unknown battery parameter '{}', expected one of {}".format(name, ", ".join(PARAMETERS)))
+    if name.endswith("efficiency") and not 0 < value <= 1:
+        raise ValueError("Battery {} must be in (0, 1], got {}".format(name.replace('_', ' '), value))
+    if not value >= 0:
+        raise ValueError("Battery {} must be positive, got {}".format(name.replace('_', ' '), value))
+
+
 class ElectricalStorage:
-    """Electrical Storage System, holds charges of backup power"""
+    """Electrical Storage System, holds charges of backup power
 
-    def __init__(self) -> None:
-        """Constructor for electrical storage system"""
+    A view of the slot of a home in a storage bank, which charges and discharges every battery of the world at
+    once after the homes stepped.
+    """
 
-        self._amps = 415  # Ah
-        self._voltage = 12  # V
-        self._max_capacity = self._amps * self._voltage * 3600  # Watts (multiply by 3600 to convert from W*hr to J)
-        self._current_capacity = float(0)
-        self._charge_history = list()
+    __slots__ = ("_bank", "_index", "_store")
 
-    def discharge(self, w) -> int:
-        """Discharge w Watts from the battery
+    def __init__(self, bank=None, index=0) -> None:
+        """Constructor for electrical storage system
 
-        :param w: Watts to remove from the battery
-        :type w: float
-        :return: 1 if the battery was successfully discharged, 0 otherwise
+        :param bank: storage bank holding the battery. Default None, which allocates a private bank
+        :type bank: StorageBank
+        :param index: index of the battery in the bank
+        :type index: int
         """
 
-        if (self._current_capacity - w) < 0:
-            self._charge_history.append(self._current_capacity)
-            return 0
-        else:
-            self._current_capacity -= w
-            self._charge_history.append(self._current_capacity)
-            return 1
+        self._bank = StorageBank(1) if bank is None else bank
+        self._index = index
 
-    def charge(self, w) -> int:
-        """Add w Watts to the battery
+        # history store holding the samples dropped from memory, as (store, group, column)
+        self._store = None
 
-        :param w: Watts to add to the battery
-        :type w: float
-        :return: 1 if the battery was successfully charged, 0 otherwise
+    def attach(self, bank, index) -> None:
+        """Move the battery to a slot of another bank, e.g. the one of an engine, which holds its state from now on
+
+        :param bank: storage bank
+        :type bank: StorageBank
+        :param index: index of the battery in the bank
+        :type index: int
+        :return: Nothing
         """
 
-        if (self._current_capacity + w) >= self._max_capacity:
-            self._charge_history.append(self._current_capacity)
-            return 0
-        else:
-            self._current_capacity += w
-            self._charge_history.append(self._current_capacity)
-            return 1
+        self._bank = bank
+        self._index = index
+
+    @property
+    def bank(self) -> StorageBank:
+        """Get the storage bank holding the battery"""
+        return self._bank
+
+    @property
+    def max_capacity(self) -> float:
+        """Get maximum capacity of the battery (in J)"""
+        return float(self._bank.max_charge[self._index])
+
+    @max_capacity.setter
+    def max_capacity(self, value):
+        """Set maximum capacity of the battery (in J)"""
+        check("capacity", value)
+        self._bank.max_charge[self._index] = value
+        self._bank.charge[self._index] = min(self._bank.charge[self._index], value)
+
+    @property
+    def amps(self) -> float:
+        """Get capacity of the battery (in Ah)"""
+        return self.max_capacity / (VOLTAGE * 3600)
+
+    @property
+    def voltage(self) -> float:
+        """Get voltage of the battery (in V)"""
+        return VOLTAGE
+
+    @property
+    def charge_efficiency(self) -> float:
+        """Get share of the energy produced by the PV array that is stored"""
+        return float(self._bank.charge_efficiency[self._index])
+
+    @charge_efficiency.setter
+    def charge_efficiency(self, value):
+        """Set share of the energy produced by the PV array that is stored"""
+        check("charge_efficiency", value)
+        self._bank.charge_efficiency[self._index] = value
+
+    @property
+    def discharge_efficiency(self) -> float:
+        """Get share of the energy drawn from the battery that reaches the home"""
+        return float(self._bank.discharge_efficiency[self._index])
+
+    @discharge_efficiency.setter
+    def discharge_efficiency(self, value):
+        """Set share of the energy drawn from the battery that reaches the home"""
+        check("discharge_efficiency", value)
+        self._bank.discharge_efficiency[self._index] = value
+
+    @property
+    def charge_rate(self) -> float:
+        """Get maximum power taken from the PV array (in W)"""
+        return float(self._bank.charge_rate[self._index] / self._bank.dt)
+
+    @charge_rate.setter
+    def charge_rate(self, value):
+        """Set maximum power taken from the PV array (in W)"""
+        check("charge_rate", value)
+        self._bank.charge_rate[self._index] = value * self._bank.dt
+
+    @property
+    def discharge_rate(self) -> float:
+        """Get maximum power drawn from the battery (in W)"""
+        return float(self._bank.discharge_rate[self._index] / self._bank.dt)
+
+    @discharge_rate.setter
+    def discharge_rate(self, value):
+        """Set maximum power drawn from the battery (in W)"""
+        check("discharge_rate", value)
+        self._bank.discharge_rate[self._index] = value * self._bank.dt
+
+    @property
+    def current_capacity(self) -> float:
+        """Get current charge of the battery (in J)"""
+        return float(self._bank.charge[self._index])
 
-    def current_charge(self, step=None) -> int:
-        """ Returns the charge of the battery, either at the current step or at a specified step
+    @current_capacity.setter
+    def current_capacity(self, value):
+        """Set current charge of the battery (in J)"""
+        self._bank.charge[self._index] = value
+
+    @property
+    def pv_output(self) -> float:
+        """Get energy produced by the PV array of the home per step (in J)"""
+        return float(self._bank.pv_output[self._index])
+
+    @pv_output.setter
+    def pv_output(self, value):
+        """Set energy produced by the PV array of the home per step (in J)"""
+        self._bank.pv_output[self._index] = value
+
+    @property
+    def demand(self) -> float:
+        """Get energy consumed by the home during the step being computed (in J)"""
+        return float(self._bank.demand[self._index])
+
+    @demand.setter
+    def demand(self, value):
+        """Set energy consumed by the home during the step being computed (in J)"""
+        self._bank.demand[self._index] = value
+
+    @property
+    def stored(self) -> float:
+        """Get energy stored in the battery during the last step (in J)"""
+        return float(self._bank.stored[self._index])
+
+    @property
+    def drawn(self) -> float:
+        """Get energy drawn from the battery during the last step (in J)"""
+        return float(self._bank.drawn[self._index])
+
+    @property
+    def grid(self) -> float:
+        """Get energy the home drew from the grid during the last step (in J)"""
+        return float(self._bank.grid[self._index])
+
+    @grid.setter
+    def grid(self, value):
+        """Set energy the home drew from the grid during the last step (in J)"""
+        self._bank.grid[self._index] = value
+
+    @property
+    def charge_history(self) -> HistoryWindow:
+        """Get the charge at the end of every step held in memory"""
+        return HistoryWindow(self._bank.history[:, self._index], self._bank.base, self._bank.end)
+
+    def run(self, demand, step, steps) -> tuple:
+        """Advance the battery through consecutive steps of constant demand. See StorageBank.run
+
+        :param demand: energy consumed by the home during every step
+        :type demand: float
+        :param step: last step already computed
+        :type step: int
+        :param steps: number of steps to compute, from step + 1
+        :type steps: int
+        :return: energy stored in and drawn from the battery, and drawn from the grid, at every step
+        """
+
+        return self._bank.run(self._index, demand, step, steps)
+
+    def attach_store(self, store, group, column) -> None:
+        """Read the charge samples dropped from memory from a history store
+
+        :param store: history store
+        :type store: ChunkStore
+        :param group: group of the battery in the store
+        :type group: int
+        :param column: column of the battery in its group
+        :type column: int
+        :return: Nothing
+        """
+
+        self._store = (store, group, column)
+
+    def current_charge(self, step=None) -> float:
+        """ Returns the charge of the battery, either at the current step or at the end of a specified step
 
 
         :param step: Step to evaluate. Default None
@@ -52,16 +471,44 @@ class ElectricalStorage:
         """
 
         if step is not None:
-            return self._charge_history[int(step)]
-        return self._current_capacity
+            step = int(step)
+            history = self.charge_history
+            if self._store is not None and 0 <= step < history.start:
+                store, group, column = self._store
+                return store.read("charge", group, column, step)
+            return float(history[step])
+        return self.current_capacity
+
+    def charge_range(self, start, stop) -> np.ndarray:
+        """Returns the charge of the battery at the end of every step of a range
+
+        :param start: first step
+        :type start: int
+        :param stop: step after the last one
+        :type stop: int
+        :return: charge at the end of every step of the range
+        """
+
+        parts = list()
+        history = self.charge_history
+        held = history.start
+        if self._store is not None and start < held:
+            store, group, column = self._store
+            parts.append(store.read_range("charge", group, column, start, min(stop, held)))
+            start = min(stop, held)
+
+        parts.append(np.asarray(history[start:stop], dtype=np.float64))
+        return np.concatenate(parts)
 
 
 class SolarPanel:
     """Photovoltaic Cell Array Object.
 
-    Created by each home at generation and charges the electrical storage system at each step
+    Created by each home at generation. Its output charges the home's battery at each step
     """
 
+    __slots__ = ("_num_cells", "_wattage", "_efficiency")
+
     def __init__(self, n, watts) -> None:
         """Constructor for Photovoltaic Cells
 
@@ -76,11 +523,27 @@ class SolarPanel:
         self._wattage = watts  # watts
         self._efficiency = 0.20
 
-    def produce(self) -> float:
-        """Calculate the amount of watts produced by the array PER STEP (second)
+    @property
+    def num_cells(self):
+        """Get number of cells in the array"""
+        return self._num_cells
 
-        :return: Watts produced per step (in Watts)
-        """
+    @property
+    def wattage(self):
+        """Get wattage of each cell"""
+        return self._wattage
 
-        return (self._num_cells * self._wattage) / 3600
+    @property
+    def efficiency(self):
+        """Get efficiency of the cells"""
+        return self._efficiency
+
+    def produce(self, dt=1) -> float:
+        """Calculate the energy produced by the array PER STEP
+
+        :param dt: length of a step (s)
+        :type dt: int
+        :return: energy produced per step (in J)
+        """
 
+        return self._num_cells * self._wattage * dt
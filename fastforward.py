@@ -0,0 +1,228 @@
+import heapq
+import math
+import numpy as np
+from history import History
+from energy import FLOWS, PV, CHARGED, DISCHARGED, HVAC, GRID
+
+
+# event kinds, ordered so simultaneous events are applied HVAC first like in Building.step
+HVAC_OFF = 0
+DEVICE_OFF = 1
+
+
+class Ambient:
+    """World temperatures of a fast-forwarded range, computed at once from ``World.temp_change``'s sinusoid"""
+
+    def __init__(self, lo_temp, hi_temp, start, stop, dt=1) -> None:
+        """Constructor for the ambient temperature range
+
+        :param lo_temp: lowest temperature of the day (C)
+        :type lo_temp: float
+        :param hi_temp: highest temperature of the day (C)
+        :type hi_temp: float
+        :param start: first clock value of the range
+        :type start: int
+        :param stop: clock value after the last one of the range
+        :type stop: int
+        :param dt: length of a step (s)
+        :type dt: int
+        """
+
+        temp_avg = (hi_temp + lo_temp) / 2
+        temp_amp = hi_temp - temp_avg
+
+        self.start = start
+        self.values = temp_amp * np.sin(((2 * math.pi) / (24 * 60 * 60)) * (np.arange(start, stop) * dt)) + temp_avg
+
+    def window(self, start, stop) -> np.ndarray:
+        """Returns the world temperature for every clock value in [start, stop)"""
+
+        return self.values[start - self.start:stop - self.start]
+
+
+def relax(temp, rates, ambient) -> np.ndarray:
+    """Closed form of consecutive ``approach_amb`` steps with known per-step rates
+
+    Step j moves the temperature by ``rates[j] * (ambient[j] - T)``. The recurrence is linear, so with
+    ``P_n = prod(1 - rates[:n])`` every temperature of the segment is ``P_n * (T_0 + sum(rates * ambient / P))``.
+
+    :param temp: inner temperature before the first step
+    :type temp: float
+    :param rates: fraction of the inner/ambient difference conducted during each step
+    :type rates: numpy array
+    :param ambient: ambient temperature during each step
+    :type ambient: numpy array
+    :return: inner temperature after each step
+    """
+
+    keep = np.cumprod(1 - rates)
+    return keep * (temp + np.cumsum(rates * ambient / keep))
+
+
+def relax_rate(home, temp):
+    """Fraction of the inner/ambient temperature difference that ``approach_amb`` conducts in one step at temp
+
+    Works on a single temperature or on an array of temperatures.
+    """
+
+    consts = home.constants
+    air_density = home.sharedInfo[1] / (consts.air_specific_r * (temp + 273))
+    rate = consts.w_area / (consts.wall_r * air_density * consts.r_volume * consts.air_heat_cap)
+    if home.dt == 1:
+        return rate
+
+    # one-second steps compounded over a step of dt seconds
+    return 1 - (1 - rate) ** home.dt
+
+
+def free_run(home, temp, ambient, passes=2, span=20000) -> np.ndarray:
+    """Temperatures of an idle home over a segment
+
+    The conducted fraction depends weakly on the inner temperature through the air density. A first pass uses
+    the rate at the starting temperature, then each further pass recomputes the per-step rates from the previous
+    trajectory, which converges to the stepped result.
+
+    :param home: idle home
+    :type home: Building
+    :param temp: inner temperature before the segment
+    :type temp: float
+    :param ambient: ambient temperature during each step of the segment
+    :type ambient: numpy array
+    :param passes: number of rate refinement passes
+    :type passes: int
+    :param span: maximum number of steps solved at once, further limited so the decay factors stay representable
+    :type span: int
+    :return: inner temperature after each step
+    """
+
+    n = len(ambient)
+    temps = np.empty(n)
+    done = 0
+
+    while done < n:
+        rate = relax_rate(home, temp)
+        length = min(n - done, span, max(1, int(300 / rate)))
+        segment = ambient[done:done + length]
+
+        rates = np.full(length, rate)
+        trajectory = relax(temp, rates, segment)
+        for i in range(passes):
+            rates[0] = rate
+            rates[1:] = relax_rate(home, trajectory[:-1])
+            trajectory = relax(temp, rates, segment)
+
+        temps[done:done + length] = trajectory
+        temp = trajectory[-1]
+        done += length
+
+    return temps
+
+
+def record(history, start, values) -> None:
+    """Write values into a temperature history from index start, whether it is a History or an array column"""
+
+    if isinstance(history, History):
+        history.truncate(start)
+        history.extend(values)
+    else:
+        history[start:start + len(values)] = values
+
+
+def advance_home(home, clock, target, ambient, passes=2, loads=None, flows=None, device_names=()) -> None:
+    """Advance a single home from clock to target, jumping between its discrete events
+
+    The home's next-event queue holds its HVAC end time and device run-time deadlines. Between two events the
+    home either runs its HVAC (linear temperature change), or relaxes towards the ambient temperature in closed
+    form, while its devices and battery draw a constant load.
+
+    :param home: home to advance
+    :type home: Building
+    :param clock: world clock value the home is currently at
+    :type clock: int
+    :param target: world clock value to advance to
+    :type target: int
+    :param ambient: world temperatures of the fast-forwarded range
+    :type ambient: Ambient
+    :param passes: number of rate refinement passes for idle segments
+    :type passes: int
+    :param loads: HVAC power and grid draw of every step from clock + 1 to target, the home's are added to them.
+        Default None, which leaves them out
+    :type loads: numpy array of shape (target - clock, 2)
+    :param flows: energy flows of the home at every step from clock + 1 to target, filled in. Default None, which
+        leaves them out
+    :type flows: numpy array of shape (target - clock, flows)
+    :param device_names: devices of the columns of flows that follow FLOWS
+    :type device_names: list
+    :return: Nothing
+    """
+
+    thermostat = home.thermostat
+    events = list()
+
+    # an event at time t changes the state used to compute step t
+    if thermostat.running():
+        heapq.heappush(events, (max(thermostat.get_end_time() + 1, clock + 1), HVAC_OFF, None))
+
+    for name, device in home.devices.items():
+        if device.state == 1 and device.run_time is not None:
+            # first step after the run time (in seconds) of the device
+            run_steps = device.run_time // home.dt
+            heapq.heappush(events, (max(device.on_time + run_steps + 1, clock + 1), DEVICE_OFF, name))
+
+    temp = home.sharedInfo[0]
+    temps = list()
+    first = clock
+
+    while clock < target:
+        next_event = events[0][0] if events else target + 1
+        end = min(next_event - 1, target)
+        n = end - clock
+
+        if n > 0:
+            consumed = sum(device.consumption for device in home.devices.values()) * home.dt
+            hvac = 0
+
+            if thermostat.running():
+                hvac = thermostat.get_power()
+                consumed += hvac
+                delta = thermostat.calc_temp_delta()
+                if thermostat.get_mode() == 1:
+                    delta = -delta
+                segment = temp + delta * np.arange(1, n + 1)
+            else:
+                # step c is computed with the world temperature of step c - 1
+                segment = free_run(home, temp, ambient.window(clock, end), passes)
+
+            temps.extend(segment.tolist())
+            stored, drawn, grid = home.battery.run(consumed, clock, n)
+
+            if loads is not None:
+                rows = loads[clock - first:end - first]
+                rows[:, 0] += hvac
+                rows[:, 1] += grid
+
+            if flows is not None:
+                rows = flows[clock - first:end - first]
+                rows[:, PV] = home.battery.pv_output
+                rows[:, CHARGED] = stored
+                rows[:, DISCHARGED] = drawn
+                rows[:, HVAC] = hvac
+                rows[:, GRID] = grid
+                for j, name in enumerate(device_names):
+                    device = home.devices.get(name)
+                    rows[:, len(FLOWS) + j] = 0 if device is None else device.consumption * home.dt
+
+            temp = temps[-1]
+            clock = end
+
+        # apply every event scheduled for the next step
+        while events and events[0][0] == clock + 1 and clock < target:
+            time, kind, name = heapq.heappop(events)
+
+            if kind == HVAC_OFF:
+                thermostat.fan_off(time)
+            else:
+                home.devices[name].turn_off(time)
+
+    home.sharedInfo[0] = temp
+    record(home.temp_history, target - len(temps) + 1, temps)
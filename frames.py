@@ -0,0 +1,97 @@
+import json
+import struct
+import numpy as np
+
+
+# layouts of a frame served by /st=<step>/get_data: the nested per-home dict, flat JSON arrays, or a binary payload
+FORMATS = ("json", "array", "binary")
+
+# binary frame header: step, since step (-1 for a full frame), outside temperature, number of homes sent, flags
+HEADER = struct.Struct("<iifII")
+FLAG_DELTA = 1
+FLAG_COLORS = 2
+
+
+def changed_homes(temps, previous) -> np.ndarray:
+    """Returns the indices of the homes whose temperature differs from a previous frame
+
+    :param temps: temperature of every home
+    :type temps: numpy array
+    :param previous: temperature of every home in the previous frame
+    :type previous: numpy array
+    :return: indices of the changed homes
+    """
+
+    return np.flatnonzero(temps != previous).astype(np.uint32)
+
+
+def encode_array(step, outside_temp, temps, colors=None, since=None, homes=None) -> str:
+    """Encode a frame as flat JSON arrays
+
+    Temperatures are rounded to 3 decimals, like the data logs. A delta frame lists the indices of the homes it
+    sends under "homes".
+
+    :param step: step of the frame
+    :type step: int
+    :param outside_temp: outside temperature at the step
+    :type outside_temp: float
+    :param temps: temperature of every home sent
+    :type temps: numpy array
+    :param colors: color index of every home sent, None to leave them out
+    :type colors: numpy array
+    :param since: step the delta frame is relative to, None for a full frame
+    :type since: int
+    :param homes: indices of the homes sent by a delta frame
+    :type homes: numpy array
+    :return: JSON document
+    """
+
+    frame = {'step': step, 'outside_temp': outside_temp}
+    if since is not None:
+        frame['since'] = since
+        frame['homes'] = homes.tolist()
+
+    frame['temps'] = np.round(temps, 3).tolist()
+    if colors is not None:
+        frame['colors'] = colors.tolist()
+
+    return json.dumps(frame, separators=(',', ':'))
+
+
+def encode_binary(step, outside_temp, temps, colors=None, since=None, homes=None) -> bytes:
+    """Encode a frame as a little-endian binary payload
+
+    The payload is the header (int32 step, int32 since step or -1, float32 outside temperature, uint32 number of
+    homes sent, uint32 flags), then for a delta frame the uint32 index of every home sent, the float32 temperature
+    of every home sent and, with colors, their int16 color index.
+
+    :param step: step of the frame
+    :type step: int
+    :param outside_temp: outside temperature at the step
+    :type outside_temp: float
+    :param temps: temperature of every home sent
+    :type temps: numpy array
+    :param colors: color index of every home sent, None to leave them out
+    :type colors: numpy array
+    :param since: step the delta frame is relative to, None for a full frame
+    :type since: int
+    :param homes: indices of the homes sent by a delta frame
+    :type homes: numpy array
+    :return: binary frame
+    """
+
+    flags = 0
+    parts = list()
+
+    if since is not None:
+        flags |= FLAG_DELTA
+        parts.append(homes.astype('<u4').tobytes())
+
+    parts.append(temps.astype('<f4').tobytes())
+
+    if colors is not None:
+        flags |= FLAG_COLORS
+        parts.append(colors.astype('<i2').tobytes())
+
+    header = HEADER.pack(step, -1 if since is None else since, outside_temp, len(temps), flags)
+    return header + b"".join(parts)
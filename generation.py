@@ -0,0 +1,115 @@
+"""Seeded bulk generation of the homes of a world.
+
+Every neighborhood draws the geometry and walls of all its homes at once from its own random stream, spawned from
+the seed of the world and the ID of the neighborhood. A neighborhood is therefore the same whichever process samples
+it and in whatever order, so neighborhoods can be sampled in parallel with the same result for any number of
+workers.
+"""
+import multiprocessing as mp
+
+import numpy as np
+
+import materials as material
+
+# values drawn for every home, in the order they are passed to Residential.generate
+FIELDS = ("has_basement", "num_floors", "length", "width", "wall_type", "thickness", "factor")
+
+# R-value per foot of every generated wall material, indexed by wall_type
+R_LOW = np.array([walls.R_RANGE[0] for walls in material.GENERATED_WALLS])
+R_HIGH = np.array([walls.R_RANGE[1] for walls in material.GENERATED_WALLS])
+
+
+def stream(seed, neighborhood) -> np.random.Generator:
+    """Random stream of a neighborhood, independent from the stream of every other neighborhood
+
+    :param seed: seed of the world
+    :type seed: int
+    :param neighborhood: ID of the neighborhood
+    :type neighborhood: int
+    :return: random generator
+    """
+
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(neighborhood,)))
+
+
+def sample_neighborhood(seed, neighborhood, num_homes) -> dict:
+    """Draw the geometry and walls of every home of a neighborhood
+
+    Homes are drawn from the same distributions as Residential.generate draws them from the random module: a
+    40x40 ft home give or take 10 ft on each side, 1 to 3 floors, a low, medium or high efficiency wall 3 to 6 ft
+    thick.
+
+    :param seed: seed of the world
+    :type seed: int
+    :param neighborhood: ID of the neighborhood
+    :type neighborhood: int
+    :param num_homes: number of homes of the neighborhood
+    :type num_homes: int
+    :return: one array per name of FIELDS, holding the value of every home
+    """
+
+    rng = stream(seed, neighborhood)
+    wall_type = rng.integers(0, len(material.GENERATED_WALLS), num_homes)
+
+    return {
+        "has_basement": rng.integers(0, 2, num_homes).astype(bool),
+        "num_floors": rng.integers(1, 4, num_homes),
+        "length": 40 + rng.integers(-10, 11, num_homes),
+        "width": 40 + rng.integers(-10, 11, num_homes),
+        "wall_type": wall_type,
+        "thickness": rng.integers(3, 7, num_homes),
+        "factor": R_LOW[wall_type] + (R_HIGH[wall_type] - R_LOW[wall_type]) * rng.random(num_homes),
+    }
+
+
+def _sample(args) -> dict:
+    """Pool entry point of sample_neighborhood"""
+
+    return sample_neighborhood(*args)
+
+
+def sample_neighborhoods(seed, num_neighborhoods, num_homes, workers=1) -> list:
+    """Draw the homes of every neighborhood of a world
+
+    :param seed: seed of the world
+    :type seed: int
+    :param num_neighborhoods: number of neighborhoods
+    :type num_neighborhoods: int
+    :param num_homes: number of homes per neighborhood
+    :type num_homes: int
+    :param workers: number of worker processes sampling neighborhoods, 1 to sample them in this process. None
+        means one per CPU
+    :type workers: int
+    :return: draws of every neighborhood, as returned by sample_neighborhood
+    """
+
+    jobs = [(seed, i, num_homes) for i in range(num_neighborhoods)]
+    workers = min(workers or mp.cpu_count(), num_neighborhoods)
+    if workers <= 1:
+        return [_sample(job) for job in jobs]
+
+    with mp.get_context("fork").Pool(workers) as pool:
+        return pool.map(_sample, jobs)
+
+
+def home_draws(draws) -> list:
+    """Split the draws of a neighborhood into the draws of each of its homes
+
+    :param draws: draws of a neighborhood, as returned by sample_neighborhood
+    :type draws: dict
+    :return: one dict per home, mapping every name of FIELDS to a Python value
+    """
+
+    columns = [draws[name].tolist() for name in FIELDS]
+    return [dict(zip(FIELDS, values)) for values in zip(*columns)]
+
+
+def walls(draws) -> material.Material:
+    """Build the wall material of a home
+
+    :param draws: draws of a home, as returned by home_draws
+    :type draws: dict
+    :return: wall material
+    """
+
+    return material.GENERATED_WALLS[draws["wall_type"]](draws["thickness"], draws["factor"])
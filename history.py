@@ -0,0 +1,218 @@
+from array import array
+
+
+class History:
+    """Preallocated, typed time series indexed by step.
+
+    Replaces the Python lists of boxed floats used for histories: values are stored unboxed in an ``array``
+    preallocated for the expected number of samples ('d' for 8-byte doubles, 'f' for 4-byte floats), which grows
+    by doubling if more samples are recorded. Indexing behaves like a list of the recorded samples.
+
+    Samples moved to a history store are dropped from the front of the buffer with ``discard``. Indices stay
+    absolute: ``start`` is the index of the first sample still held, and ``len`` counts every recorded sample.
+    """
+
+    __slots__ = ("_data", "_size", "_start")
+
+    def __init__(self, capacity=0, typecode='d', start=0) -> None:
+        """Constructor for a history buffer
+
+        :param capacity: number of samples to preallocate
+        :type capacity: int
+        :param typecode: 'd' to store doubles, 'f' to store single precision floats
+        :type typecode: str
+        :param start: index of the first sample that will be recorded, when earlier ones are held elsewhere
+        :type start: int
+        """
+
+        self._data = array(typecode, bytes(array(typecode).itemsize * max(capacity, 1)))
+        self._size = 0
+        self._start = start
+
+    @property
+    def typecode(self) -> str:
+        """Get the storage typecode of the history"""
+        return self._data.typecode
+
+    @property
+    def start(self) -> int:
+        """Get the index of the first sample held in memory"""
+        return self._start
+
+    @property
+    def capacity(self) -> int:
+        """Get the number of samples the history can hold before growing"""
+        return len(self._data)
+
+    @property
+    def nbytes(self) -> int:
+        """Get the number of bytes of the preallocated buffer"""
+        return len(self._data) * self._data.itemsize
+
+    def _reserve(self, size) -> None:
+        """Grow the buffer by doubling until it holds size samples"""
+
+        capacity = len(self._data)
+        while capacity < size:
+            capacity *= 2
+
+        if capacity > len(self._data):
+            self._data.extend(array(self._data.typecode, bytes(self._data.itemsize * (capacity - len(self._data)))))
+
+    def append(self, value) -> None:
+        """Record the next sample
+
+        :param value: sample to record
+        :type value: float
+        :return: Nothing
+        """
+
+        if self._size == len(self._data):
+            self._reserve(self._size + 1)
+
+        self._data[self._size] = value
+        self._size += 1
+
+    def extend(self, values) -> None:
+        """Record several samples
+
+        :param values: samples to record
+        :type values: iterable of float
+        :return: Nothing
+        """
+
+        values = array(self._data.typecode, values)
+        self._reserve(self._size + len(values))
+
+        self._data[self._size:self._size + len(values)] = values
+        self._size += len(values)
+
+    def truncate(self, size) -> None:
+        """Forget every sample from index size onwards
+
+        :param size: number of samples to keep
+        :type size: int
+        :return: Nothing
+        """
+
+        self._size = max(0, min(self._size, size - self._start))
+
+    def discard(self, index) -> None:
+        """Drop every sample before index from memory, once they are saved elsewhere
+
+        :param index: index of the first sample to keep
+        :type index: int
+        :return: Nothing
+        """
+
+        count = min(index - self._start, self._size)
+        if count <= 0:
+            return
+
+        self._data[:self._size - count] = self._data[count:self._size]
+        self._size -= count
+        self._start += count
+
+    def tolist(self) -> list:
+        """Returns the samples held in memory as a list"""
+
+        return self._data[:self._size].tolist()
+
+    def __len__(self) -> int:
+        return self._start + self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # bounded by the recorded samples, then sliced from the buffer without copying the rest of it
+            steps = range(*index.indices(len(self)))
+            if not steps:
+                return self._data[0:0]
+            if min(steps[0], steps[-1]) < self._start:
+                raise IndexError("history slice reaches samples that are no longer in memory")
+
+            stop = steps.stop - self._start
+            # a reversed slice running down to the first sample held stops past the start of the buffer
+            return self._data[steps.start - self._start:stop if stop >= 0 else None:steps.step]
+
+        if index < 0:
+            index += len(self)
+        if not self._start <= index < len(self):
+            raise IndexError("history index out of range")
+
+        return self._data[index - self._start]
+
+    def __iter__(self):
+        return iter(self._data[:self._size])
+
+
+class HistoryWindow:
+    """Column of a history matrix indexed by step, whose first row holds step start.
+
+    Used by the vector engines to point each home's ``temp_history`` at its column while steps before start
+    are moved to a history store. The matrix is preallocated, so the step after the last recorded one is held apart,
+    in a one-element array shared by every column of the matrix and kept up to date by its owner. As for a History,
+    ``len`` counts the recorded steps and reading past them raises an IndexError. Writing past them records the
+    steps written.
+    """
+
+    __slots__ = ("column", "_start", "_end")
+
+    def __init__(self, column, start=0, end=None) -> None:
+        """Constructor for a history window
+
+        :param column: column of the history matrix
+        :type column: numpy array
+        :param start: step held in the first row of the column
+        :type start: int
+        :param end: one-element array holding the step after the last recorded one. Default None, which means every
+            row of the column is recorded
+        :type end: numpy array
+        """
+
+        self.column = column
+        self._start = start
+        self._end = end
+
+    @property
+    def start(self) -> int:
+        """Get the first step held in the column"""
+        return self._start
+
+    @property
+    def capacity(self) -> int:
+        """Get the step after the last one the column can hold"""
+        return self._start + len(self.column)
+
+    def _rows(self, index, stop):
+        """Translate a step or a slice of steps before stop into rows of the column"""
+
+        if isinstance(index, slice):
+            steps = range(*index.indices(stop))
+            if steps.step < 0 or (steps and steps[0] < self._start):
+                raise IndexError("history slice reaches steps that are no longer in memory")
+            if not steps:
+                return slice(0, 0)
+            return slice(steps.start - self._start, steps.stop - self._start, steps.step)
+
+        if index < 0:
+            index += len(self)
+        if not self._start <= index < stop:
+            raise IndexError("history index out of range")
+
+        return index - self._start
+
+    def __len__(self) -> int:
+        if self._end is None:
+            return self.capacity
+        return int(self._end[0])
+
+    def __getitem__(self, index):
+        return self.column[self._rows(index, len(self))]
+
+    def __setitem__(self, index, value) -> None:
+        rows = self._rows(index, self.capacity)
+        self.column[rows] = value
+
+        if self._end is not None:
+            last = rows.stop if isinstance(rows, slice) else rows + 1
+            self._end[0] = max(self._end[0], min(last, len(self.column)) + self._start)
@@ -4,19 +4,20 @@ from abc import ABC, abstractmethod
 class HVAC(ABC):
 	# mode == 0 : turned off
 	# mode == 1 : turned on
-	
+	__slots__ = ("sharedInfo", "constants", "mode", "power")
+
 	@abstractmethod
-	def __init__(self, sizes, shared_info):
+	def __init__(self, constants, shared_info):
 		"""Constructor for HVAC System
 
-		:param sizes: list of sizes of home
-		:type sizes: list
+		:param constants: precomputed physics constants of the home
+		:type constants: HomeConstants
 		:param shared_info: shared information between the House and the devices (internal temperature)
-		:type shared_info: multiprocessing list
+		:type shared_info: memoryview (StateSlab view)
 		"""
 
 		self.sharedInfo = shared_info
-		self.sizes = sizes
+		self.constants = constants
 		
 		self.mode = 0
 		self.power = 2920 # measured in J/s or Watts
@@ -36,10 +37,17 @@ class HVAC(ABC):
 	def turn_off(self) -> None:
 		self.mode = 0
 
-	# return number of seconds it takes for a unit to produce a certain amount of energy
-	def calc_on_time(self, q) -> int:
-		"""Calculate the amount of time it would take to produce a certain amount of heat"""
-		time_on = q / self.power
+	# return number of steps it takes for a unit to produce a certain amount of energy
+	def calc_on_time(self, q, dt=1) -> int:
+		"""Calculate the number of steps it would take to produce a certain amount of heat
+
+		:param q: heat to produce (J)
+		:type q: float
+		:param dt: length of a step (s)
+		:type dt: int
+		:return: number of steps
+		"""
+		time_on = q / (self.power * dt)
 		return round(time_on)
 
 	def compute_q(self, target_temp) -> float:
@@ -50,40 +58,35 @@ class HVAC(ABC):
 		:return: heat added to the space
 		"""
 
-		r_constant = 8.314  # universal gas constant
-
-		rm_volume = self.sizes[0] * self.sizes[1] * self.sizes[2]
-		# rm_air_density = self.sharedInfo[1] / (287.05 * (self.sharedInfo[0] + 273))
-		# rm_air_mass = rm_air_density / rm_volume
-		# rm_mols = rm_air_mass / 28.964 # average molar mass of air
-		# rm_pressure = (rm_mols * (self.sharedInfo[0] + 273) * r_constant) / rm_volume
-
-		rm_pressure = 101325  # measured in pascals (STP)
-
-		rm_mols = (rm_volume * rm_pressure) / ((self.sharedInfo[0] + 273) * r_constant)
-		heat_cap = (5 * r_constant) / 2		# heat capacity of an ideal gas at constant volume (7R/2 for constant pressure)
-
 		if self.mode == 0:
-			q = 0
-		else:
-			q = heat_cap * rm_mols * abs(self.sharedInfo[0] - target_temp)
+			return 0
+
+		# room pressure is taken at STP, so volume * pressure only changes with the size of the home
+		consts = self.constants
+		rm_mols = consts.rm_vp / ((self.sharedInfo[0] + 273) * consts.r_constant)
 
-		return q
+		return consts.heat_cap * rm_mols * abs(self.sharedInfo[0] - target_temp)
 
-	def get_power(self) -> float:
-		"""Returns power consumption of HVAC
+	def get_power(self, dt=1) -> float:
+		"""Returns the energy used by the HVAC during a step
 
-		:return: energy consumption of machine
+		:param dt: length of a step (s)
+		:type dt: int
+		:return: energy used by the machine (J)
 		"""
-		return self.power / 3600
+		return self.power * dt
 
 
 class AC(HVAC):
-	def __init__(self, sizes, shared_info):
-		super().__init__(sizes, shared_info)
+	__slots__ = ()
+
+	def __init__(self, constants, shared_info):
+		super().__init__(constants, shared_info)
 
 
 class Furnace(HVAC):
-	def __init__(self, t, sizes, shared_info):
-		super().__init__(sizes, shared_info)
+	__slots__ = ("energy_source",)
+
+	def __init__(self, t, constants, shared_info):
+		super().__init__(constants, shared_info)
 		self.energy_source = t		# natural, gas, or electric
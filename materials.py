@@ -9,6 +9,9 @@ def ft2m(ft):
 
 
 class Material(ABC):
+    # slotted, every home holding its own wall
+    __slots__ = ("_type", "_R", "_mass", "_thickness", "_e")
+
     @abstractmethod
     def __init__(self, type_, r, mass_, thickness_, emissivity) -> None:
         """Generic abstract constructor for materials
@@ -82,13 +85,43 @@ class Material(ABC):
         self._type = value
 
 
+def draw(thickness, factor, r_range) -> tuple:
+    """Draw the thickness (ft) and R-value per foot of a wall, unless they were drawn already
+
+    :param thickness: thickness of the wall, or None to draw it
+    :type thickness: int
+    :param factor: R-value per foot of the wall, or None to draw it
+    :type factor: float
+    :param r_range: range of the R-value per foot of the material
+    :type r_range: tuple
+    :return: thickness and R-value per foot
+    """
+
+    if thickness is None:
+        thickness = random.randint(3, 6)
+    if factor is None:
+        factor = random.uniform(*r_range)
+    return thickness, factor
+
+
 class LowEfficiency(Material):
     """Low Efficiency Wall Material"""
 
-    def __init__(self) -> None:
+    __slots__ = ()
+    R_RANGE = (1., 2.9)
+
+    def __init__(self, thickness=None, factor=None) -> None:
+        """Constructor for a low efficiency wall, drawing the values that are not given
+
+        :param thickness: thickness of the wall (ft), between 3 and 6
+        :type thickness: int
+        :param factor: R-value per foot of the wall, within R_RANGE
+        :type factor: float
+        """
+
         mass = 1200
-        thickness = random.randint(3, 6)
-        r = thickness * random.uniform(1., 2.9) * 5.67826  # multiply by 5.67 to get RSI value
+        thickness, factor = draw(thickness, factor, self.R_RANGE)
+        r = thickness * factor * 5.67826  # multiply by 5.67 to get RSI value
         e = 0.90
         super().__init__("LOW", r, mass, thickness, e)
 
@@ -96,10 +129,21 @@ class LowEfficiency(Material):
 class MedEfficiency(Material):
     """Medium Efficiency Wall Material"""
 
-    def __init__(self) -> None:
+    __slots__ = ()
+    R_RANGE = (2.9, 3.8)
+
+    def __init__(self, thickness=None, factor=None) -> None:
+        """Constructor for a medium efficiency wall, drawing the values that are not given
+
+        :param thickness: thickness of the wall (ft), between 3 and 6
+        :type thickness: int
+        :param factor: R-value per foot of the wall, within R_RANGE
+        :type factor: float
+        """
+
         mass = 1200
-        thickness = random.randint(3, 6)
-        r = thickness * random.uniform(2.9, 3.8) * 5.67826
+        thickness, factor = draw(thickness, factor, self.R_RANGE)
+        r = thickness * factor * 5.67826
         e = 0.80
 
         super().__init__("MEDIUM", r, mass, thickness, e)
@@ -108,10 +152,21 @@ class MedEfficiency(Material):
 class HighEfficiency(Material):
     """High Efficiency Wall Material"""
 
-    def __init__(self) -> None:
+    __slots__ = ()
+    R_RANGE = (3.7, 4.3)
+
+    def __init__(self, thickness=None, factor=None) -> None:
+        """Constructor for a high efficiency wall, drawing the values that are not given
+
+        :param thickness: thickness of the wall (ft), between 3 and 6
+        :type thickness: int
+        :param factor: R-value per foot of the wall, within R_RANGE
+        :type factor: float
+        """
+
         mass = 1200
-        thickness = random.randint(3, 6)
-        r = thickness * random.uniform(3.7, 4.3) * 5.67826
+        thickness, factor = draw(thickness, factor, self.R_RANGE)
+        r = thickness * factor * 5.67826
         e = 0.70
 
         super().__init__("HIGH", r, mass, thickness, e)
@@ -120,6 +175,8 @@ class HighEfficiency(Material):
 class Brick(Material):
     """Brick Material. For testing purposes"""
 
+    __slots__ = ("cp",)
+
     def __init__(self) -> None:
         mass = 1200
         thickness = random.randint(3, 6)
@@ -129,3 +186,37 @@ class Brick(Material):
 
         super().__init__("BRICK", r, mass, thickness, e)
         self.cp = 900
+
+
+# wall materials by type, used to rebuild saved walls
+WALL_TYPES = {"LOW": LowEfficiency, "MEDIUM": MedEfficiency, "HIGH": HighEfficiency, "BRICK": Brick}
+
+# wall materials homes are generated with, in the order of their draws
+GENERATED_WALLS = (LowEfficiency, MedEfficiency, HighEfficiency)
+
+
+def restore(type_, r, mass_, thickness, emissivity) -> Material:
+    """Rebuild a wall material from its saved properties, without drawing new random values
+
+    :param type_: material type
+    :type type_: str
+    :param r: RSI value for material
+    :type r: float
+    :param mass_: material mass
+    :type mass_: float
+    :param thickness: material thickness, in m
+    :type thickness: float
+    :param emissivity: material emissivity
+    :type emissivity: float
+    :return: wall material
+    """
+
+    cls = WALL_TYPES[type_]
+    wall = cls.__new__(cls)
+    Material.__init__(wall, type_, r, mass_, 0, emissivity)
+    wall._thickness = thickness
+
+    if cls is Brick:
+        wall.cp = 900
+
+    return wall
@@ -0,0 +1,284 @@
+"""Memory accounting of a world, allocation diffs between steps and memory budgets.
+
+Every structure a world keeps is accounted to a subsystem: the home objects, the histories of the homes and of the
+world, the storage bank, the engine, the energy flows, the aggregates, the shared state slab and the cache of the
+history store. Histories are preallocated and grow by doubling, so for each of them the report gives the bytes held,
+the bytes of the steps recorded so far, the bytes recorded per step and the bytes they will hold at the last step of
+the run. With a history store, histories keep a window of steps in memory and do not grow.
+
+Only the memory of the process holding the world is accounted: the worker processes of the parallel engine share
+its arrays.
+"""
+import sys
+import threading
+import tracemalloc
+import warnings
+import numpy as np
+from history import History
+
+# bytes in a megabyte, the unit budgets and warnings are written in
+MB = 1024 * 1024
+
+
+class MemoryBudgetWarning(UserWarning):
+    """Warning issued when a run is projected to take more memory than its budget"""
+
+
+class Buffer:
+    """Time series of a subsystem, holding one row per step from step start"""
+
+    __slots__ = ("row_bytes", "capacity", "rows", "start", "windowed")
+
+    def __init__(self, row_bytes, capacity, rows, start, windowed=True) -> None:
+        """Constructor for a buffer
+
+        :param row_bytes: number of bytes of the row of a step
+        :type row_bytes: int
+        :param capacity: number of rows allocated
+        :type capacity: int
+        :param rows: number of rows recorded
+        :type rows: int
+        :param start: step of the first row
+        :type start: int
+        :param windowed: the steps saved to a history store are dropped from the buffer, which keeps its size
+        :type windowed: bool
+        """
+
+        self.row_bytes = row_bytes
+        self.capacity = capacity
+        self.rows = rows
+        self.start = start
+        self.windowed = windowed
+
+    @property
+    def nbytes(self) -> int:
+        """Get the number of bytes allocated"""
+        return self.capacity * self.row_bytes
+
+    def projected(self, num_steps, store) -> int:
+        """Returns the number of bytes the buffer will hold once every step up to num_steps is recorded
+
+        :param num_steps: last step of the run
+        :type num_steps: int
+        :param store: the world saves its histories to a history store
+        :type store: bool
+        :return: bytes allocated at num_steps
+        """
+
+        if store and self.windowed:
+            return self.nbytes
+
+        capacity = max(self.capacity, 1)
+        while capacity < num_steps + 1 - self.start:
+            capacity *= 2
+        return capacity * self.row_bytes
+
+
+def history_buffer(history) -> Buffer:
+    """Buffer of a History"""
+
+    return Buffer(history.nbytes // history.capacity, history.capacity, len(history) - history.start, history.start)
+
+
+def matrix_buffer(values, start, clock, windowed=True) -> Buffer:
+    """Buffer of a matrix whose first row holds step start and whose rows are recorded up to step clock"""
+
+    capacity = len(values)
+    row_bytes = values.nbytes // capacity if capacity else 0
+    return Buffer(row_bytes, capacity, min(max(clock + 1 - start, 0), capacity), start, windowed)
+
+
+def array_bytes(obj, skip=()) -> int:
+    """Number of bytes of the NumPy arrays held by the attributes of an object, except the ones in skip"""
+
+    return sum(value.nbytes for name, value in vars(obj).items() if isinstance(value, np.ndarray) and name not in skip)
+
+
+def shallow_size(obj) -> int:
+    """Size of an object and of its attribute dictionary, without the objects it refers to"""
+
+    total = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        total += sys.getsizeof(obj.__dict__)
+    return total
+
+
+def home_parts(home) -> dict:
+    """Objects making up a home, by name. The samples of its temperature history are accounted separately"""
+
+    thermostat = home.thermostat
+    parts = {"home": home, "thermostat": thermostat, "walls": home.walls, "battery": home.battery, "pv": home._pv}
+    # the HVAC units are created the first time they are used, a cooling home has no furnace
+    for name, unit in (("ac", thermostat._air_con), ("furnace", thermostat._furnace)):
+        if unit is not None:
+            parts[name] = unit
+    for name, device in home.devices.items():
+        parts[name] = device
+    parts.update({"devices": home.devices, "constants": home._constants, "history": home.temp_history})
+    return parts
+
+
+def account(world) -> dict:
+    """Account the memory held by a world to its subsystems
+
+    :param world: world to account, after make_world
+    :type world: World
+    :return: report with the bytes held, recorded, recorded per step and projected at the last step of the run, for
+        the world and for every subsystem, and the mean bytes of every object of a home
+    """
+
+    clock = world.world_clock.value
+    store = world.history_store is not None
+    homes = [home for neighborhood in world.neighborhoods for home in neighborhood.homes]
+    num_homes = max(len(homes), 1)
+
+    # subsystem -> [bytes held outside the buffers, buffers]
+    subsystems = {name: [0, list()] for name in ("homes", "home_histories", "world_history", "storage", "engine",
+                                                 "energy", "aggregates", "slab", "history_store")}
+
+    parts = dict()
+    for home in homes:
+        for name, obj in home_parts(home).items():
+            size = shallow_size(obj)
+            parts[name] = parts.get(name, 0) + size
+            subsystems["homes"][0] += size
+
+        if isinstance(home.temp_history, History):
+            subsystems["home_histories"][1].append(history_buffer(home.temp_history))
+
+    subsystems["world_history"][1].append(history_buffer(world.temp_history))
+
+    # the batteries of a world stepped by an engine are held by the banks of the engine
+    bank = world.storage
+    if bank is not None:
+        subsystems["storage"][0] += array_bytes(bank, ("history",))
+        subsystems["storage"][1].append(matrix_buffer(bank.history, bank.base, clock))
+
+    engine = world.engine
+    if engine is not None:
+        shards = getattr(engine, "shards", [engine])
+        if engine not in shards:
+            # control arrays of the parallel engine
+            subsystems["engine"][0] += array_bytes(engine)
+
+        for shard in shards:
+            subsystems["engine"][0] += array_bytes(shard, ("history", "loads", "flows"))
+            subsystems["engine"][0] += array_bytes(shard.storage, ("history",))
+            for values in (shard.history, shard.loads, shard.flows, shard.storage.history):
+                if values is not None:
+                    subsystems["engine"][1].append(matrix_buffer(values, shard.base, clock))
+
+    if world.energy is not None:
+        energy = world.energy
+        subsystems["energy"][1].append(matrix_buffer(energy.values, energy.start, len(energy) - 1))
+
+    if world.aggregates is not None:
+        # never moved to the history store
+        subsystems["aggregates"][1].append(matrix_buffer(world.aggregates.values, 0, len(world.aggregates) - 1,
+                                                         windowed=False))
+
+    subsystems["slab"][0] += world.slab.nbytes
+    if store:
+        subsystems["history_store"][0] += world.history_store.cached_nbytes
+
+    report = {"step": clock, "num_steps": world.num_steps, "num_homes": len(homes), "subsystems": dict()}
+    for name, (static, buffers) in subsystems.items():
+        held = static + sum(buffer.nbytes for buffer in buffers)
+        report["subsystems"][name] = {
+            "bytes": held,
+            "per_home_bytes": held / num_homes,
+            "recorded_bytes": sum(buffer.rows * buffer.row_bytes for buffer in buffers),
+            "per_step_bytes": sum(buffer.row_bytes for buffer in buffers),
+            "projected_bytes": static + sum(buffer.projected(world.num_steps, store) for buffer in buffers),
+        }
+
+    for key in ("bytes", "per_step_bytes", "projected_bytes"):
+        report[key] = sum(subsystem[key] for subsystem in report["subsystems"].values())
+    report["per_home_bytes"] = report["bytes"] / num_homes
+    report["home_parts"] = {name: size / num_homes for name, size in parts.items()}
+
+    report["budget_bytes"] = world.memory_budget
+    report["over_budget"] = world.memory_budget is not None and report["projected_bytes"] > world.memory_budget
+    return report
+
+
+def check_budget(world) -> dict:
+    """Warn with a MemoryBudgetWarning, and in the log of the world, if the run of a world is projected to take more
+    memory than its budget
+
+    :param world: world to check, after make_world
+    :type world: World
+    :return: memory report of the world
+    """
+
+    report = account(world)
+    if report["over_budget"]:
+        message = "A run of {} steps is projected to take {:.1f} MB, over the memory budget of {:.1f} MB".format(
+            world.num_steps, report["projected_bytes"] / MB, world.memory_budget / MB)
+        warnings.warn(message, MemoryBudgetWarning, stacklevel=3)
+        if world.logger is not None:
+            world.logger.warning(message)
+
+    return report
+
+
+class AllocationTracer:
+    """Allocations made between two steps, from the difference of the tracemalloc snapshots taken at each of them"""
+
+    def __init__(self, step, frames=1) -> None:
+        """Constructor for an allocation tracer. Starts tracing allocations unless they are already traced, and
+        takes the first snapshot
+
+        :param step: current step of the world
+        :type step: int
+        :param frames: number of frames of the traceback kept for every allocation
+        :type frames: int
+        """
+
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start(frames)
+
+        # diffs can be requested by several threads of the API
+        self._lock = threading.Lock()
+        self.step = step
+        self.snapshot = self._take()
+
+    @staticmethod
+    def _take() -> tracemalloc.Snapshot:
+        """Snapshot of the traced allocations, without the ones of tracemalloc itself"""
+
+        return tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+
+    def diff(self, step, top=10) -> dict:
+        """Take a snapshot and compare it to the previous one
+
+        :param step: current step of the world
+        :type step: int
+        :param top: number of source lines to report, those whose allocations grew the most first
+        :type top: int
+        :return: steps of both snapshots, the growth of the traced memory and the source lines responsible for it
+        """
+
+        with self._lock:
+            snapshot = self._take()
+            stats = snapshot.compare_to(self.snapshot, "lineno")
+            diff = {"from_step": self.step, "to_step": step,
+                    "size_diff_bytes": sum(stat.size_diff for stat in stats),
+                    "top": [{"location": "{}:{}".format(stat.traceback[0].filename, stat.traceback[0].lineno),
+                             "size_bytes": stat.size, "size_diff_bytes": stat.size_diff,
+                             "count_diff": stat.count_diff} for stat in stats[:top]]}
+            self.snapshot = snapshot
+            self.step = step
+
+        return diff
+
+    def close(self) -> None:
+        """Stop tracing allocations, if this tracer started it
+
+        :return: nothing
+        """
+
+        if self._started and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started = False
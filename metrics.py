@@ -0,0 +1,218 @@
+"""Phase timers of the simulation and latency histograms, exported in the Prometheus text format.
+
+Phase timers add up the time spent in every phase of a world step (stepping the homes, the battery dispatch, the
+data logs, ...) and, within the homes, in every phase of a home step (thermostat control, ``approach_amb``,
+``consume_energy``, logging). At the end of a step, the total of every phase goes into a histogram. Timers are off
+unless a world is created with ``phase_timers=True`` or ``set_phase_timers(True)`` is called. Homes step through
+``DISABLED`` when they are off, whose laps only return their start, so disabled timers cost next to nothing.
+"""
+import bisect
+import contextlib
+import threading
+import time
+
+# upper bounds of the histogram buckets (s), from 1 us to 10 s
+BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1,
+           0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Histogram of durations, with cumulative buckets as Prometheus expects them"""
+
+    def __init__(self, buckets=BUCKETS) -> None:
+        """Constructor for a histogram
+
+        :param buckets: upper bounds of the buckets, in increasing order
+        :type buckets: tuple
+        """
+
+        self.buckets = tuple(buckets)
+        # the last count holds the values above every bound
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value) -> None:
+        """Add a value to the histogram
+
+        :param value: value to add (s)
+        :type value: float
+        :return: nothing
+        """
+
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels) -> list:
+        """Prometheus text lines of the histogram
+
+        :param name: metric name
+        :type name: str
+        :param labels: labels of the histogram, e.g. 'phase="home.approach_amb"'
+        :type labels: str
+        :return: one line per bucket, then the sum and the count
+        """
+
+        lines = list()
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            lines.append('{}_bucket{{{},le="{}"}} {}'.format(name, labels, bound, total))
+        lines.append("{}_sum{{{}}} {!r}".format(name, labels, self.sum))
+        lines.append("{}_count{{{}}} {}".format(name, labels, self.count))
+        return lines
+
+
+def family(name, description, histograms, label) -> list:
+    """Prometheus text lines of a histogram metric with one histogram per label value
+
+    :param name: metric name
+    :type name: str
+    :param description: help text of the metric
+    :type description: str
+    :param histograms: histogram of every label value
+    :type histograms: dict
+    :param label: name of the label
+    :type label: str
+    :return: lines of the metric
+    """
+
+    lines = ["# HELP {} {}".format(name, description), "# TYPE {} histogram".format(name)]
+    for value in sorted(histograms):
+        lines.extend(histograms[value].lines(name, '{}="{}"'.format(label, value)))
+    return lines
+
+
+class _Phase:
+    """Context manager adding the time spent in its block to a phase"""
+
+    __slots__ = ("timers", "name", "start")
+
+    def __init__(self, timers, name) -> None:
+        self.timers = timers
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.timers.lap(self.name, self.start)
+
+
+class PhaseTimers:
+    """Time spent in every phase of the steps of a world"""
+
+    def __init__(self) -> None:
+        # time spent in every phase during the current step, then the histogram of these totals over the steps
+        self.totals = dict()
+        self.histograms = dict()
+        self._phases = dict()
+
+    def start(self) -> float:
+        """Start of a phase, to pass to lap
+
+        :return: time.perf_counter() now
+        """
+
+        return time.perf_counter()
+
+    def lap(self, phase, start) -> float:
+        """Add the time elapsed since start to a phase
+
+        :param phase: name of the phase
+        :type phase: str
+        :param start: time.perf_counter() at the start of the phase
+        :type start: float
+        :return: time.perf_counter() now, the start of the next phase
+        """
+
+        now = time.perf_counter()
+        self.totals[phase] = self.totals.get(phase, 0.0) + now - start
+        return now
+
+    def phase(self, phase) -> _Phase:
+        """Context manager adding the time spent in its block to a phase
+
+        :param phase: name of the phase
+        :type phase: str
+        :return: context manager
+        """
+
+        timer = self._phases.get(phase)
+        if timer is None:
+            timer = self._phases[phase] = _Phase(self, phase)
+        return timer
+
+    def end_step(self, steps=1) -> None:
+        """Add the time spent in every phase during the last steps to the histograms
+
+        :param steps: number of steps the totals cover, e.g. a batch of an engine, whose mean is recorded
+        :type steps: int
+        :return: nothing
+        """
+
+        for phase, total in self.totals.items():
+            histogram = self.histograms.get(phase)
+            if histogram is None:
+                histogram = self.histograms[phase] = Histogram()
+            histogram.observe(total / steps)
+        self.totals.clear()
+
+    def lines(self) -> list:
+        """Prometheus text lines of the phase histograms"""
+
+        return family("simulation_step_phase_seconds", "Time spent in a phase of a world step", self.histograms,
+                      "phase")
+
+
+class _Disabled:
+    """Phase timers of a world whose timers are off, whose phases and laps do nothing"""
+
+    def start(self) -> float:
+        return 0.0
+
+    def lap(self, phase, start) -> float:
+        return start
+
+    def phase(self, phase) -> contextlib.nullcontext:
+        return contextlib.nullcontext()
+
+    def end_step(self, steps=1) -> None:
+        pass
+
+
+DISABLED = _Disabled()
+
+
+class RequestMetrics:
+    """Latency of the requests of every API route"""
+
+    def __init__(self) -> None:
+        self.histograms = dict()
+        # routes are served by several threads
+        self._lock = threading.Lock()
+
+    def observe(self, route, seconds) -> None:
+        """Add the latency of a request
+
+        :param route: name of the route
+        :type route: str
+        :param seconds: time taken to serve the request
+        :type seconds: float
+        :return: nothing
+        """
+
+        with self._lock:
+            histogram = self.histograms.get(route)
+            if histogram is None:
+                histogram = self.histograms[route] = Histogram()
+            histogram.observe(seconds)
+
+    def lines(self) -> list:
+        """Prometheus text lines of the request histograms"""
+
+        with self._lock:
+            return family("api_request_seconds", "Time taken to serve a request of an API route", self.histograms,
+                          "route")
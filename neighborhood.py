@@ -1,10 +1,13 @@
-import os
-import csv
 from building import Residential
+from slab import StateSlab
+from context import StepContext
+from metrics import DISABLED
+import generation
 
 
 class Neighborhood:
-    def __init__(self, i, num_homes, outside_temp, world_clock, logger_=None) -> None:
+    def __init__(self, i, num_homes, outside_temp, world_clock, logger_=None, num_steps=0, typecode='d',
+                 slab=None, batteries=None, dt=1) -> None:
         """Constructor for neighborhood
 
         :param i: neighborhood ID
@@ -15,8 +18,19 @@ class Neighborhood:
         :type outside_temp: multiprocessing integer
         :param world_clock: internal world clock
         :type world_clock: multiprocessing integer
-        :param logger_: logging object to write log messages to
-        :type logger_: log
+        :param logger_: log of the simulation, handing out the loggers of the neighborhood and its homes
+        :type logger_: SimulationLog
+        :param num_steps: number of steps preallocated in the histories of the homes
+        :type num_steps: int
+        :param typecode: storage typecode of the histories of the homes ('d' or 'f')
+        :type typecode: str
+        :param slab: shared state slab holding one slot per home. Default None, which allocates one
+        :type slab: StateSlab
+        :param batteries: battery of every home, slots of a storage bank. Default None, which gives every home a
+            private one
+        :type batteries: list
+        :param dt: length of a step (s)
+        :type dt: int
         :return: Nothing
         """
 
@@ -24,14 +38,20 @@ class Neighborhood:
         self.num_homes = num_homes
         self.outside_temp = outside_temp
         self.world_clock = world_clock
-        self.logger = logger_
+        self.log = logger_
+        self.logger = None if logger_ is None else logger_.get("neighborhood")
+        self.num_steps = num_steps
+        self.typecode = typecode
+        self.slab = StateSlab(num_homes) if slab is None else slab
+        self.batteries = batteries
+        self.dt = dt
 
         self.homes = list()
-        self.processes = list()
-        self.last_write_time = 0
+        # per-step aggregates of the world, which hold the ones of this neighborhood
+        self.aggregates = None
 
     def generate(self, min_length=None, max_length=None, min_width=None, max_width=None,
-                 lower_t_=32, upper_t_=78) -> None:
+                 lower_t_=32, upper_t_=78, draws=None) -> None:
         """Generate the neighborhood and the houses within it
 
         :param min_length: minimum length of house
@@ -46,87 +66,59 @@ class Neighborhood:
         :type lower_t_: int
         :param upper_t_: treated as upper temp limit for coloring cells
         :type upper_t_: int
+        :param draws: values drawn for every home by generation.sample_neighborhood. Default None, which draws
+            them home by home from the random module
+        :type draws: dict
         :return: Nothing
         """
 
         num_residents = 2
+        homes = [None] * self.num_homes if draws is None else generation.home_draws(draws)
 
         for i in range(self.num_homes):
-            if self.logger is not None:
-                self.logger.debug('\tHOME {}:'.format(i))
-
-            home = Residential(self.id, i, num_residents, self.outside_temp, self.world_clock, self.logger)
-            home.generate(min_length, max_length, min_width, max_width, lower_t_, upper_t_)
+            home = Residential(self.id, i, num_residents, self.outside_temp, self.world_clock, self.log,
+                               self.num_steps, self.typecode, self.slab.view(i),
+                               None if self.batteries is None else self.batteries[i], self.dt)
+            if home.logger is not None:
+                home.logger.debug('\tHOME %d:', i)
+            home.generate(min_length, max_length, min_width, max_width, lower_t_, upper_t_, homes[i])
 
             self.homes.append(home)
-            # self.processes.append(mp.Process(target=home.step, args=(step_event, clock_event, )))
 
         if self.logger is not None:
-            self.logger.debug('\tCreated {} homes'.format(self.num_homes))
-
-        abs_path, filename = os.path.split(os.path.realpath(__file__))
-        data_log = "{}/data/neighborhood_{}.csv".format(abs_path, self.id)
-
-        with open(data_log, 'w') as data_file:
-            file_writer = csv.writer(data_file)
-            header = ['House:']
-            wall_config = ['Wall Type:']
-            temp_config = ['Target Temp:']
-            size_config = ['Size (m):']
-
-            for i in range(self.num_homes):
-                home = self.homes[i]
-                header.append(i)
-                wall_config.append(home.get_wall_type())
-                temp_config.append("{:.4}".format(home.get_target_temp()))
-                size_config.append("{:.2f} x {:.2f} x {:.2f}".format(home.length, home.width, home.height))
-
-            temp_config.append("Outside Temp:")
-
-            file_writer.writerow(header)
-            file_writer.writerow(wall_config)
-            file_writer.writerow(temp_config)
-            file_writer.writerow(size_config)
-            file_writer.writerow(list())
-
-    def step(self, log_data=False) -> None:
-        """Increment the entire neighborhood by a step. Log the interior temperature
-        of each house if asked to
-
-        :param log_data: determines whether values of the homes in the neighborhood should be logged
-        :type log_data: bool
-        :return: nothing
-        """
-
-        if log_data is True:
-            abs_path, filename = os.path.split(os.path.realpath(__file__))
-            data_dir = "{}/data/neighborhood_{}.csv".format(abs_path, self.id)
+            self.logger.debug('\tCreated %d homes', self.num_homes)
 
-            row = list()
-            row.append(self.world_clock.value)
+    def get_aggregates(self, step_num=None) -> dict:
+        """Get the aggregates of the homes of the neighborhood at a time step
 
-            with open(data_dir, 'a') as data_file:
-                file_writer = csv.writer(data_file)
+        :param step_num: time step to find. Default None, which means the current step
+        :type step_num: int
+        :return: number of homes, sum, mean, min, max and 10th/50th/90th percentiles of their inner temperatures,
+            total HVAC power and total grid draw
+        """
 
-                i = 0
-                for home in self.homes:
-                    if self.logger is not None:
-                        self.logger.debug('\tHOME {}:'.format(i))
+        if step_num is None:
+            step_num = self.world_clock.value
 
-                    home.step()
-                    row.append("{:.3f}".format(home.get_int_temp()))
+        return self.aggregates.get(step_num, self.id)
 
-                    i += 1
+    def step(self, ctx=None) -> None:
+        """Increment the entire neighborhood by a step
 
-                row.append("")
-                row.append("{:.5f}".format(self.outside_temp.value))
+        :param ctx: clock, outside temperature and phase timers of the step. Default None, which reads the shared
+            world values
+        :type ctx: StepContext
+        :return: nothing
+        """
 
-                file_writer.writerow(row)
-                self.last_write_time = self.world_clock.value
+        if ctx is None:
+            ctx = StepContext.read(self.world_clock, self.outside_temp, self.dt)
 
-        else:
-            for home in self.homes:
-                if self.logger is not None:
-                    self.logger.debug('\tHOME {}:'.format(home.h_id))
+        timers = ctx.timers or DISABLED
+        for home in self.homes:
+            if home.logger is not None:
+                start = timers.start()
+                home.logger.debug('\tHOME %d:', home.h_id)
+                timers.lap("log", start)
 
-                home.step()
+            home.step(ctx)
@@ -0,0 +1,480 @@
+import io
+import os
+import atexit
+import pickle
+import threading
+import weakref
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+import numpy as np
+from engine import VectorEngine
+
+
+# worker commands
+RUN = 0
+STOP = 1
+REMAP = 2
+
+
+class _Block:
+    """Shared memory block seen by NumPy as an array.
+
+    Arrays made from it (and every view of them) refer to it as their base, so the block stays mapped until the
+    last of them is gone, even after the engine is closed.
+    """
+
+    def __init__(self, block, shape, dtype) -> None:
+        """Constructor for a block
+
+        :param block: shared memory block
+        :type block: SharedMemory
+        :param shape: shape of the array held by the block
+        :type shape: tuple
+        :param dtype: data type of the array held by the block
+        :type dtype: numpy dtype
+        """
+
+        self.block = block
+        self.shape = shape
+        self.dtype = dtype
+        self.address = np.frombuffer(block.buf, np.uint8).ctypes.data
+        self.__array_interface__ = {"data": (self.address, False), "shape": shape, "typestr": dtype.str,
+                                    "version": 3}
+
+    def holds(self, array) -> bool:
+        """Returns True if array is the whole array held by the block, not a view of a part of it"""
+
+        return array.shape == self.shape and array.dtype == self.dtype and array.ctypes.data == self.address
+
+
+# arrays mapped by a worker, by block name. Blocks are unlinked once mapped, so an array sent again is looked up here
+_mapped = weakref.WeakValueDictionary()
+
+
+def _attach(name, shape, dtype) -> np.ndarray:
+    """Map an array placed in shared memory by another process, unless it is already mapped
+
+    :param name: name of the shared memory block
+    :type name: str
+    :param shape: shape of the array
+    :type shape: tuple
+    :param dtype: data type of the array
+    :type dtype: str
+    :return: array backed by the block
+    """
+
+    array = _mapped.get(name)
+    if array is None:
+        array = _mapped[name] = np.asarray(_Block(shared_memory.SharedMemory(name), shape, np.dtype(dtype)))
+    return array
+
+
+class _SharedPickler(pickle.Pickler):
+    """Pickler sending the arrays placed in shared memory by the name of their block, so the process loading them
+    maps the same memory instead of a copy"""
+
+    def reducer_override(self, obj):
+        if isinstance(obj, np.ndarray) and isinstance(obj.base, _Block) and obj.base.holds(obj):
+            return _attach, (obj.base.block.name, obj.shape, obj.dtype.str)
+        return NotImplemented
+
+
+def _dumps(obj) -> bytes:
+    """Pickle an object, its shared arrays by name"""
+
+    buffer = io.BytesIO()
+    _SharedPickler(buffer, pickle.HIGHEST_PROTOCOL).dump(obj)
+    return buffer.getvalue()
+
+
+class SharedArrays:
+    """Array factory placing every array in its own ``multiprocessing.shared_memory`` block.
+
+    Used as the ``allocate`` callable of ``VectorEngine`` so that the state arrays and histories of a shard are
+    mapped by the coordinator and by the worker stepping it. Blocks are unlinked as soon as the workers have mapped
+    them, and unmapped by every process once the last array viewing them is gone, so blocks replaced by larger
+    ones are released as the histories grow.
+    """
+
+    def __init__(self) -> None:
+        """Constructor for the shared array factory"""
+
+        # blocks not unlinked yet
+        self.blocks = list()
+
+    def __call__(self, shape, dtype=np.float64) -> np.ndarray:
+        """Allocate a zeroed array in a new shared memory block
+
+        :param shape: shape of the array
+        :type shape: int or tuple
+        :param dtype: data type of the array
+        :type dtype: numpy dtype
+        :return: array backed by shared memory
+        """
+
+        dtype = np.dtype(dtype)
+        shape = tuple(int(size) for size in np.atleast_1d(shape))
+        size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+
+        block = shared_memory.SharedMemory(create=True, size=size)
+        self.blocks.append(block)
+
+        array = np.asarray(_Block(block, shape, dtype))
+        array.fill(0)
+        return array
+
+    def release(self) -> None:
+        """Unlink the blocks allocated since the last release, once every process using them has mapped them.
+        Their memory is released once the last array viewing it is gone
+
+        :return: Nothing
+        """
+
+        for block in self.blocks:
+            block.unlink()
+
+        del self.blocks[:]
+
+    def close(self) -> None:
+        """Unlink the blocks not released yet
+
+        :return: Nothing
+        """
+
+        self.release()
+
+
+def _work(connection, barrier) -> None:
+    """Worker loop: step the shard for every batch published by the coordinator
+
+    The shard and the control arrays are received through connection when the worker starts, and the shard again
+    whenever the coordinator changes its arrays.
+
+    :param connection: end of a pipe to the coordinator
+    :type connection: multiprocessing Connection
+    :param barrier: barrier shared by the coordinator and every worker
+    :type barrier: multiprocessing Barrier
+    :return: Nothing
+    """
+
+    try:
+        # control holds [command, first clock value, number of steps] of the current batch, and ambient the
+        # ambient temperature of each of its steps
+        engine, control, ambient = pickle.loads(connection.recv_bytes())
+        connection.send_bytes(b"")
+
+        while True:
+            barrier.wait()
+            command, start, num_steps = (int(value) for value in control)
+            if command == STOP:
+                break
+
+            if command == REMAP:
+                engine = pickle.loads(connection.recv_bytes())
+            else:
+                for i in range(num_steps):
+                    engine.step(start + i, ambient[i])
+
+            barrier.wait()
+
+    except threading.BrokenBarrierError:
+        pass
+
+    except BaseException:
+        barrier.abort()
+        raise
+
+
+class ParallelEngine:
+    """Sharded vector engine stepped by a pool of worker processes.
+
+    Neighborhoods are partitioned into one shard per worker. The state arrays and temperature histories of each
+    shard live in shared memory, so the coordinator reads them directly (e.g. to serve the API) while the worker
+    owning the shard steps it. The coordinator publishes the clock and ambient temperatures of a batch of steps,
+    then synchronizes with every worker through a barrier at the start and at the end of the batch.
+
+    Workers are started once, from a fork server (or spawned where there is none) rather than forked from the
+    coordinator, whose API, runner and log threads may hold locks. When the histories grow or drop steps, the
+    workers are sent their shard again and map its new arrays.
+    """
+
+    def __init__(self, neighborhoods, capacity, workers=None, typecode='d', max_batch=3600, flows=False,
+                 dt=1) -> None:
+        """Constructor for the parallel engine
+
+        :param neighborhoods: neighborhoods to step
+        :type neighborhoods: list
+        :param capacity: number of steps to preallocate in the temperature histories
+        :type capacity: int
+        :param workers: number of worker processes. Default None, which means one per CPU
+        :type workers: int
+        :param typecode: storage typecode of the temperature histories ('d' for doubles, 'f' for floats)
+        :type typecode: str
+        :param max_batch: maximum number of steps published to the workers at once
+        :type max_batch: int
+        :param flows: record the energy flows of every home at every step
+        :type flows: bool
+        :param dt: length of a step (s)
+        :type dt: int
+        :return: Nothing
+        """
+
+        if workers is None:
+            workers = os.cpu_count()
+        workers = max(1, min(workers, len(neighborhoods)))
+
+        self._context = mp.get_context("forkserver" if "forkserver" in mp.get_all_start_methods() else "spawn")
+        self.arrays = SharedArrays()
+
+        self.shards = list()
+        for part in np.array_split(np.arange(len(neighborhoods)), workers):
+            homes = [home for i in part for home in neighborhoods[i].homes]
+            self.shards.append(VectorEngine(homes, capacity, self.arrays, typecode, flows, dt))
+
+        self.homes = [home for shard in self.shards for home in shard.homes]
+        self.max_batch = max_batch
+
+        self._control = self.arrays(3, np.int64)
+        self._ambient = self.arrays(max_batch, np.float64)
+        self._barrier = None
+        self._processes = list()
+        self._connections = list()
+
+        self.start()
+        atexit.register(self.close)
+
+    def start(self) -> None:
+        """Start one worker per shard, and wait until every worker has mapped its shard
+
+        :return: Nothing
+        """
+
+        self._barrier = self._context.Barrier(len(self.shards) + 1)
+        try:
+            for shard in self.shards:
+                connection, child = self._context.Pipe()
+                process = self._context.Process(target=_work, args=(child, self._barrier), daemon=True)
+                process.start()
+                child.close()
+
+                self._processes.append(process)
+                self._connections.append(connection)
+                connection.send_bytes(_dumps((shard, self._control, self._ambient)))
+
+            for process, connection in zip(self._processes, self._connections):
+                if connection not in wait([connection, process.sentinel]):
+                    raise EOFError
+                connection.recv_bytes()
+
+        except (OSError, EOFError):
+            # a worker that cannot start exits without answering, e.g. when the main module of the program is not
+            # guarded by if __name__ == "__main__" and builds a parallel world again in the worker
+            self._barrier.abort()
+            self.close()
+            raise RuntimeError("A simulation worker failed to start, see its traceback above")
+
+        self.arrays.release()
+
+    def _wait(self) -> None:
+        """Wait at the barrier for every worker"""
+
+        try:
+            self._barrier.wait()
+        except threading.BrokenBarrierError:
+            raise RuntimeError("A simulation worker failed, see its traceback above")
+
+    def _remap(self) -> None:
+        """Send every worker its shard again, after the arrays of the shards changed
+
+        :return: Nothing
+        """
+
+        self._control[0] = REMAP
+        self._wait()
+        for shard, connection in zip(self.shards, self._connections):
+            connection.send_bytes(_dumps(shard))
+        self._wait()
+        self.arrays.release()
+
+    def stop(self) -> None:
+        """Stop and join every worker
+
+        :return: Nothing
+        """
+
+        if not self._processes:
+            return
+
+        self._control[0] = STOP
+        try:
+            self._barrier.wait()
+        except threading.BrokenBarrierError:
+            pass
+
+        for process in self._processes:
+            process.join()
+        for connection in self._connections:
+            connection.close()
+
+        self._processes = list()
+        self._connections = list()
+
+    def close(self) -> None:
+        """Stop the workers and unlink the shared memory, which stays mapped as long as the homes or the caller hold
+        arrays viewing it. Called at exit if the world was not closed
+
+        :return: Nothing
+        """
+
+        self.stop()
+        self.arrays.close()
+        atexit.unregister(self.close)
+
+    def load(self) -> None:
+        """Copy the current state of the home objects into the shared arrays"""
+
+        for shard in self.shards:
+            shard.load()
+
+    def store(self) -> None:
+        """Write the shared state back into the home objects"""
+
+        for shard in self.shards:
+            shard.store()
+
+    @property
+    def base(self) -> int:
+        """Get the first step held by every shared history"""
+        return max(shard.base for shard in self.shards)
+
+    def temperatures(self, step) -> np.ndarray:
+        """Returns the temperature of every home at a recorded step still held in the shared histories
+
+        :param step: step to read, between base and the current clock
+        :type step: int
+        :return: one temperature per home, in neighborhood order
+        """
+
+        return np.concatenate([shard.temperatures(step) for shard in self.shards])
+
+    def temperature_rows(self, start, stop) -> np.ndarray:
+        """Returns the temperature of every home at every step of a range still held in the shared histories
+
+        :param start: first step
+        :type start: int
+        :param stop: step after the last one
+        :type stop: int
+        :return: one row of temperatures per step
+        """
+
+        return np.concatenate([shard.temperature_rows(start, stop) for shard in self.shards], axis=1)
+
+    def load_rows(self, start, stop) -> np.ndarray:
+        """Returns the HVAC power and grid draw of every neighborhood at every step of a range still held in the
+        shared loads
+
+        :param start: first step
+        :type start: int
+        :param stop: step after the last one
+        :type stop: int
+        :return: (steps x neighborhoods x 2) loads
+        """
+
+        return np.concatenate([shard.load_rows(start, stop) for shard in self.shards], axis=1)
+
+    def flow_rows(self, start, stop) -> np.ndarray:
+        """Returns the energy flows of every home at every step of a range still held in the shared flows
+
+        :param start: first step
+        :type start: int
+        :param stop: step after the last one
+        :type stop: int
+        :return: (steps x homes x flows) flows
+        """
+
+        return np.concatenate([shard.flow_rows(start, stop) for shard in self.shards], axis=1)
+
+    def put_flows(self, start, flows) -> None:
+        """Write the energy flows of consecutive steps computed outside of the engine into the shared flows
+
+        :param start: first step
+        :type start: int
+        :param flows: flows of every home at every step
+        :type flows: numpy array of shape (steps, homes, flows)
+        :return: Nothing
+        """
+
+        self.reserve(start + len(flows) - 1)
+
+        first = 0
+        for shard in self.shards:
+            shard.put_flows(start, flows[:, first:first + shard.num_homes])
+            first += shard.num_homes
+
+    def reserve(self, step) -> None:
+        """Make sure the shared histories can hold every step up to and including step
+
+        Growing a history allocates new shared blocks, which the workers are sent to map.
+
+        :param step: last step that will be recorded
+        :type step: int
+        :return: Nothing
+        """
+
+        if all(step - shard.base < len(shard.history) for shard in self.shards):
+            return
+
+        for shard in self.shards:
+            shard.reserve(step)
+        self._remap()
+
+    def discard(self, step) -> None:
+        """Drop the rows of every step before step from the shared histories
+
+        The workers keep their own copy of the first step held by the matrices, so they are sent it.
+
+        :param step: first step to keep
+        :type step: int
+        :return: Nothing
+        """
+
+        if all(step <= shard.base for shard in self.shards):
+            return
+
+        for shard in self.shards:
+            shard.discard(step)
+        self._remap()
+
+    def step(self, clock, outside_temp) -> None:
+        """Advance every home by one step
+
+        :param clock: world clock value of the step being computed
+        :type clock: int
+        :param outside_temp: ambient temperature during the step
+        :type outside_temp: float
+        :return: Nothing
+        """
+
+        self.step_batch(clock, [outside_temp])
+
+    def step_batch(self, clock, outside_temps) -> None:
+        """Advance every home by one step per ambient temperature, one barrier round trip per batch
+
+        :param clock: world clock value of the first step of the batch
+        :type clock: int
+        :param outside_temps: ambient temperature during each step of the batch
+        :type outside_temps: list
+        :return: Nothing
+        """
+
+        self.reserve(clock + len(outside_temps) - 1)
+
+        for offset in range(0, len(outside_temps), self.max_batch):
+            batch = outside_temps[offset:offset + self.max_batch]
+
+            self._control[:] = (RUN, clock + offset, len(batch))
+            self._ambient[:len(batch)] = batch
+
+            self._wait()
+            self._wait()
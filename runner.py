@@ -0,0 +1,334 @@
+import time
+import threading
+
+
+# states of a runner
+IDLE = "idle"
+RUNNING = "running"
+PAUSED = "paused"
+
+# at a target speed, the runner advances about this much wall-clock time (s) of steps per batch
+TICK = 0.05
+# falling further behind schedule than this (s) moves the schedule instead of catching up at full speed
+MAX_LAG = 1.0
+
+
+class WorldRunner:
+    """Advances a world in a background thread, away from the requests that read it.
+
+    A run is started explicitly, optionally for a number of steps and at a target speed, and can be paused,
+    resumed and stopped. A run also starts when a frame stream subscribes to an idle runner; such a run ends with
+    its last subscriber.
+
+    The runner steps the world in batches while holding the write side of lock, and publishes the last step
+    simulated after every batch. Requests read the world while holding the read side, so they are served between
+    batches and concurrently with each other. Each subscriber asks for frames every few steps: the runner never
+    waits for them, a subscriber that falls behind is handed the latest frame it asked for and skips the ones in
+    between.
+
+    At a target speed, the steps of a run are scheduled from the wall-clock time it (re)started, so the time spent
+    computing a batch is taken off the wait before the next one and rounding errors never accumulate.
+    """
+
+    def __init__(self, world, lock, batch=60) -> None:
+        """Constructor for a world runner
+
+        :param world: world to advance
+        :type world: World
+        :param lock: lock written while the world is advanced and read while it is read
+        :type lock: ReadWriteLock
+        :param batch: maximum number of steps advanced at once
+        :type batch: int
+        """
+
+        self.world = world
+        self.lock = lock
+        self.batch = max(batch, 1)
+
+        self.step = world.get_time()
+        self.state = IDLE
+        self.speed = None
+        self.until = world.num_steps
+
+        self._follow = False
+        self._subscribers = list()
+        self._changed = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+        # progress of the current run
+        self._start_step = self.step
+        self._run_time = 0.0
+        self._resumed_at = None
+        self._anchor_time = None
+        self._anchor_step = None
+
+    @property
+    def running(self) -> bool:
+        """True while the background thread is alive, running or paused"""
+        return self._thread is not None
+
+    @property
+    def finished(self) -> bool:
+        """True once the world reached the end of its run"""
+        return self.step >= self.world.num_steps
+
+    def start(self, speed=None, steps=None) -> dict:
+        """Start a run, or change the target of the current one
+
+        :param speed: simulated seconds per wall-clock second (one step is dt seconds of the world). Default None,
+            which means as fast as possible
+        :type speed: float
+        :param steps: number of steps to run. Default None, which means until the end of the simulation
+        :type steps: int
+        :return: progress of the run
+        """
+
+        with self._changed:
+            if self._closed:
+                raise RuntimeError("The runner was closed")
+
+            if self.state == IDLE:
+                # the world may have been stepped by someone else since the last run
+                self.step = self.world.get_time()
+
+            self.until = self.world.num_steps if steps is None else min(self.step + steps, self.world.num_steps)
+            self.speed = speed if speed else None
+            self._follow = False
+            self._begin()
+
+            return self._progress()
+
+    def pause(self) -> dict:
+        """Pause the current run after its current batch
+
+        :return: progress of the run
+        """
+
+        with self._changed:
+            if self.state == RUNNING:
+                self.state = PAUSED
+                self._run_time += time.perf_counter() - self._resumed_at
+                self._changed.notify_all()
+
+            return self._progress()
+
+    def resume(self) -> dict:
+        """Resume a paused run. The schedule of a target speed restarts from now
+
+        :return: progress of the run
+        """
+
+        with self._changed:
+            if self.state == PAUSED:
+                self.state = RUNNING
+                self._resumed_at = time.perf_counter()
+                self._anchor()
+                self._changed.notify_all()
+
+            return self._progress()
+
+    def stop(self) -> dict:
+        """End the current run after its current batch and wait for it
+
+        :return: progress of the run
+        """
+
+        with self._changed:
+            if self.state == RUNNING:
+                self._run_time += time.perf_counter() - self._resumed_at
+            self.state = IDLE
+            thread = self._thread
+            self._changed.notify_all()
+
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+        with self._changed:
+            return self._progress()
+
+    def close(self) -> None:
+        """Stop the runner for good
+
+        :return: Nothing
+        """
+
+        with self._changed:
+            self._closed = True
+
+        self.stop()
+
+    def progress(self) -> dict:
+        """Returns the progress of the current or last run
+
+        :return: dict with the state of the runner, the current, first and last step of the run, the number of
+            steps of the simulation, the fraction of the run done, the target speed, the measured steps per second,
+            the running time and the estimated remaining time (s)
+        """
+
+        with self._changed:
+            return self._progress()
+
+    def subscribe(self, every=1) -> list:
+        """Start following the world, which starts a run if the runner is idle
+
+        :param every: number of steps between two frames of the subscriber
+        :type every: int
+        :return: subscription, to hand back to unsubscribe
+        """
+
+        subscription = [max(every, 1)]
+
+        with self._changed:
+            self._subscribers.append(subscription)
+
+            if self.state == IDLE and not self._closed:
+                self.step = self.world.get_time()
+                if not self.finished:
+                    self.until = self.world.num_steps
+                    self.speed = None
+                    self._follow = True
+                    self._begin()
+
+        return subscription
+
+    def unsubscribe(self, subscription) -> None:
+        """Stop following the world. A run started by a subscriber stops once no subscriber is left
+
+        :param subscription: subscription returned by subscribe
+        :type subscription: list
+        :return: Nothing
+        """
+
+        with self._changed:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+            self._changed.notify_all()
+
+    def next_frame(self, after, every=1, timeout=None) -> int:
+        """Wait for the latest frame of a subscriber
+
+        :param after: step of the last frame sent to the subscriber
+        :type after: int
+        :param every: number of steps between two frames of the subscriber
+        :type every: int
+        :param timeout: maximum wait (s). Default None, which means no limit
+        :type timeout: float
+        :return: latest multiple of every simulated after step after, the last step of the run if it was not a
+            multiple of every, or None if the runner stopped or the wait timed out first
+        """
+
+        def frame():
+            step = self.step - self.step % every
+            if step > after:
+                return step
+            if not self.running and self.step > after:
+                return self.step
+            return None
+
+        with self._changed:
+            self._changed.wait_for(lambda: frame() is not None or not self.running, timeout)
+            return frame()
+
+    def _begin(self) -> None:
+        """Enter the running state and start the background thread if needed. Called holding the condition"""
+
+        if self.state == IDLE:
+            self._start_step = self.step
+            self._run_time = 0.0
+
+        if self.state != RUNNING:
+            self._resumed_at = time.perf_counter()
+        self.state = RUNNING
+        self._anchor()
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="world-runner", daemon=True)
+            self._thread.start()
+
+        self._changed.notify_all()
+
+    def _anchor(self) -> None:
+        """Schedule the next steps of a target speed from now. Called holding the condition"""
+
+        self._anchor_time = time.perf_counter()
+        self._anchor_step = self.step
+
+    def _progress(self) -> dict:
+        """Progress of the run. Called holding the condition"""
+
+        if self._thread is None:
+            # the world may have been stepped by someone else since the last run
+            self.step = self.world.get_time()
+
+        run_time = self._run_time
+        if self.state == RUNNING:
+            run_time += time.perf_counter() - self._resumed_at
+
+        done = self.step - self._start_step
+        rate = done / run_time if run_time > 0 else None
+        total = self.until - self._start_step
+
+        return {
+            'state': self.state,
+            'step': self.step,
+            'start_step': self._start_step,
+            'until': self.until,
+            'num_steps': self.world.num_steps,
+            'progress': done / total if total > 0 else 1.0,
+            'speed': self.speed,
+            'steps_per_second': rate,
+            'run_time': run_time,
+            'eta': (self.until - self.step) / rate if rate else None,
+        }
+
+    def _run(self) -> None:
+        """Background thread loop: advance the world batch by batch until the run ends"""
+
+        try:
+            while True:
+                with self._changed:
+                    while self.state == PAUSED:
+                        self._changed.wait()
+
+                    if (self.state != RUNNING or self._closed or self.step >= self.until
+                            or (self._follow and not self._subscribers)):
+                        if self.state == RUNNING:
+                            self._run_time += time.perf_counter() - self._resumed_at
+                        self.state = IDLE
+                        self._thread = None
+                        self._changed.notify_all()
+                        return
+
+                    # batches end on the next frame of every subscriber
+                    batch = min([self.batch, self.until - self.step] +
+                                [every - self.step % every for every, in self._subscribers])
+
+                    if self.speed is not None:
+                        # steps of the world per wall-clock second
+                        rate = self.speed / self.world.dt
+                        batch = min(batch, max(int(rate * TICK), 1))
+
+                        delay = self._anchor_time + (self.step - self._anchor_step) / rate - time.perf_counter()
+                        if delay > 0:
+                            # woken up early by a pause, a stop or a new target
+                            self._changed.wait(delay)
+                            continue
+                        if delay < -MAX_LAG:
+                            self._anchor()
+
+                with self.lock.write():
+                    self.world.advance(batch)
+                    step = self.world.get_time()
+
+                with self._changed:
+                    self.step = step
+                    self._changed.notify_all()
+
+        finally:
+            # a batch failed, followers are woken up to see the runner stopped
+            with self._changed:
+                if self._thread is threading.current_thread():
+                    self.state = IDLE
+                    self._thread = None
+                    self._changed.notify_all()
@@ -0,0 +1,115 @@
+import threading
+import contextlib
+
+
+class ReadWriteLock:
+    """Lock held either by any number of readers or by a single writer.
+
+    A waiting writer goes before readers that arrive after it, so a steady flow of reads never starves it, and the
+    readers waiting when a writer releases the lock go before the next writer, so a writer taking the lock again
+    and again never starves them. The writer may take the lock again, for reading or writing, while it holds it. A
+    reader must not ask for the write lock while it holds the read lock.
+    """
+
+    def __init__(self) -> None:
+        """Constructor for a readers-writer lock"""
+
+        self._changed = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writes = 0
+        self._waiting_writers = 0
+        self._waiting_readers = 0
+        # readers let in ahead of the waiting writers
+        self._readers_first = 0
+
+    def acquire_read(self) -> None:
+        """Wait until no writer holds or waits for the lock, then take it for reading
+
+        :return: Nothing
+        """
+
+        with self._changed:
+            if self._writer is threading.current_thread():
+                self._writes += 1
+                return
+
+            self._waiting_readers += 1
+            try:
+                self._changed.wait_for(lambda: self._writer is None and
+                                       (not self._waiting_writers or self._readers_first))
+            finally:
+                self._waiting_readers -= 1
+
+            self._readers += 1
+            if self._readers_first:
+                self._readers_first -= 1
+
+    def release_read(self) -> None:
+        """Release the lock taken for reading
+
+        :return: Nothing
+        """
+
+        with self._changed:
+            if self._writer is threading.current_thread():
+                self._writes -= 1
+                return
+
+            self._readers -= 1
+            if not self._readers:
+                self._changed.notify_all()
+
+    def acquire_write(self) -> None:
+        """Wait until no reader or other writer holds the lock, then take it for writing
+
+        :return: Nothing
+        """
+
+        with self._changed:
+            if self._writer is threading.current_thread():
+                self._writes += 1
+                return
+
+            self._waiting_writers += 1
+            try:
+                self._changed.wait_for(lambda: self._writer is None and not self._readers and
+                                       not self._readers_first)
+            finally:
+                self._waiting_writers -= 1
+
+            self._writer = threading.current_thread()
+            self._writes = 1
+
+    def release_write(self) -> None:
+        """Release the lock taken for writing
+
+        :return: Nothing
+        """
+
+        with self._changed:
+            self._writes -= 1
+            if not self._writes:
+                self._writer = None
+                self._readers_first = self._waiting_readers
+                self._changed.notify_all()
+
+    @contextlib.contextmanager
+    def read(self):
+        """Hold the lock for reading in a with block"""
+
+        self.acquire_read()
+        try:
+            yield self
+        finally:
+            self.release_read()
+
+    @contextlib.contextmanager
+    def write(self):
+        """Hold the lock for writing in a with block"""
+
+        self.acquire_write()
+        try:
+            yield self
+        finally:
+            self.release_write()
@@ -0,0 +1,178 @@
+"""Log of a simulation run, written to a file without slowing the steps down.
+
+Every subsystem ("world", "neighborhood", "home", "thermostat") has its own logger and level, and homes and
+thermostats can be sampled so only one home in N logs at all. Homes that do not log hold no logger, so the checks
+they make on every step cost nothing more than comparing it to None. Messages are passed with their arguments
+(``logger.debug("temperature %.3f", temp)``) and only formatted by a background thread, which wakes up a few times
+per second to write the messages queued since it last did.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+
+# subsystems with a logger of their own, in the order of their log messages in a step
+SUBSYSTEMS = ("world", "neighborhood", "home", "thermostat")
+
+# format of every line of the log file
+FORMAT = '%(name)s - %(levelname)s - %(message)s'
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler leaving the formatting of the records to the listener thread
+
+    The default QueueHandler formats every record before queueing it, so it can be pickled to another process. The
+    records of the simulation stay in the process, so they are queued as they are.
+    """
+
+    def prepare(self, record) -> logging.LogRecord:
+        return record
+
+
+class SimulationRecord(logging.LogRecord):
+    """Log record only holding what the log format shows
+
+    A LogRecord also looks up the time, file, thread and process of every message, which costs several times the
+    step of a home.
+    """
+
+    def __init__(self, name, level, msg, args) -> None:
+        self.name = name
+        self.levelno = level
+        self.levelname = logging.getLevelName(level)
+        self.msg = msg
+        self.args = args
+        self.exc_info = None
+        self.exc_text = None
+        self.stack_info = None
+
+
+class SimulationLogger(logging.Logger):
+    """Logger putting SimulationRecords straight on the queue of its handler
+
+    Skips looking up the file and line of the caller, filters and handler locks, none of which the simulation uses
+    (the queue is thread-safe).
+    """
+
+    def __init__(self, name, level, handler) -> None:
+        super().__init__(name, level)
+        self.addHandler(handler)
+        self.handler = handler
+
+    def _log(self, level, msg, args, exc_info=None, extra=None, stack_info=False, stacklevel=1) -> None:
+        self.handler.emit(SimulationRecord(self.name, level, msg, args))
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """File handler letting the file buffer its lines, instead of flushing the file after every line"""
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        with self.lock:
+            if self.stream is not None:
+                self.stream.flush()
+        super().close()
+
+
+class SimulationLog:
+    """Loggers of the subsystems of a world, all writing to one file from a background thread"""
+
+    def __init__(self, path="world.log", levels=None, sample=1, interval=0.2) -> None:
+        """Constructor for the log of a simulation. Creates the log file and starts writing it
+
+        :param path: path of the log file, overwritten if it exists
+        :type path: str
+        :param levels: level of a subsystem (e.g. {"home": "WARNING"}), as a number or a name, None to turn it off.
+            Subsystems not given log everything (DEBUG)
+        :type levels: dict
+        :param sample: log one home (and thermostat) in every sample homes of each neighborhood
+        :type sample: int
+        :param interval: seconds between two writes of the queued messages. Waking the writer thread for every
+            message would make the simulation thread wait for it
+        :type interval: float
+        """
+
+        self.levels = dict.fromkeys(SUBSYSTEMS, logging.DEBUG)
+        for name, level in (levels or {}).items():
+            if name not in self.levels:
+                raise ValueError("Unknown subsystem '{}', expected one of {}".format(name, ", ".join(SUBSYSTEMS)))
+            if isinstance(level, str):
+                level = logging.getLevelName(level.upper())
+                if not isinstance(level, int):
+                    raise ValueError("Unknown level for subsystem '{}'".format(name))
+            self.levels[name] = level
+
+        if sample < 1:
+            raise ValueError("sample must be at least 1")
+        self.sample = sample
+
+        self.interval = interval
+        self._queue = queue.SimpleQueue()
+        self._file = BufferedFileHandler(path, 'w')
+        self._file.setFormatter(logging.Formatter(FORMAT))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._write, name="simulation-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+        # loggers are not registered with the logging module, so every world has its own
+        handler = DeferredQueueHandler(self._queue)
+        self.loggers = dict()
+        for name in SUBSYSTEMS:
+            if self.levels[name] is None:
+                continue
+
+            self.loggers[name] = SimulationLogger(name, self.levels[name], handler)
+
+    def get(self, subsystem) -> logging.Logger:
+        """Get the logger of a subsystem
+
+        :param subsystem: name of the subsystem, one of SUBSYSTEMS
+        :type subsystem: str
+        :return: logger of the subsystem, None when it is turned off
+        """
+
+        return self.loggers.get(subsystem)
+
+    def home(self, n_id, h_id, subsystem="home") -> logging.Logger:
+        """Get the logger of a home or of its thermostat
+
+        :param n_id: ID of the neighborhood of the home
+        :type n_id: int
+        :param h_id: ID of the home
+        :type h_id: int
+        :param subsystem: "home" or "thermostat"
+        :type subsystem: str
+        :return: logger of the subsystem, None when the home is not sampled or the subsystem is turned off
+        """
+
+        if h_id % self.sample:
+            return None
+        return self.loggers.get(subsystem)
+
+    def _write(self) -> None:
+        """Writer thread: writes the queued messages every interval seconds until the log is closed"""
+
+        stopped = False
+        while not stopped:
+            stopped = self._stop.wait(self.interval)
+            try:
+                while True:
+                    self._file.handle(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+    def close(self) -> None:
+        """Write the messages still queued, stop the writer thread and close the log file. Called at exit if the
+        world was not closed
+
+        :return: nothing
+        """
+
+        if self._thread.is_alive():
+            self._stop.set()
+            self._thread.join()
+            self._file.close()
@@ -0,0 +1,82 @@
+import multiprocessing as mp
+import numpy as np
+
+
+# slots of a home's shared state
+TEMP = 0  # internal temperature, C
+PRESSURE = 1  # internal pressure, Pa
+HOME_WIDTH = 4
+
+
+class StateSlab:
+    """Shared state of many homes in a single lock-free shared memory segment.
+
+    Each home gets a view of ``HOME_WIDTH`` doubles that its thermostat and HVAC units index into like the
+    ``mp.Array`` each home used to allocate. The segment is a single ``RawArray`` instead of one locked array per
+    home, so reads and writes take no lock. It stays in the process of the world: the parallel engine copies the
+    state into its own shared memory blocks rather than sharing the slab with its workers.
+    """
+
+    def __init__(self, num_homes, raw=None, offset=0) -> None:
+        """Constructor for a state slab
+
+        :param num_homes: number of homes held by the slab
+        :type num_homes: int
+        :param raw: segment to carve the slab from. Default None, which allocates a new segment
+        :type raw: multiprocessing RawArray
+        :param offset: index of the first home of the slab in the segment
+        :type offset: int
+        """
+
+        if raw is None:
+            raw = mp.RawArray('d', max(num_homes, 1) * HOME_WIDTH)
+
+        self._raw = raw
+        self._values = memoryview(raw).cast('B').cast('d')
+        self.num_homes = num_homes
+        self.offset = offset
+
+    @property
+    def nbytes(self) -> int:
+        """Get the number of bytes of the homes of the slab"""
+        return self.num_homes * HOME_WIDTH * self._values.itemsize
+
+    def section(self, start, num_homes):
+        """Returns a slab over num_homes homes of this slab, starting at home start, sharing the same segment
+
+        :param start: index of the first home of the section, relative to this slab
+        :type start: int
+        :param num_homes: number of homes in the section
+        :type num_homes: int
+        :return: slab section
+        """
+
+        if start < 0 or start + num_homes > self.num_homes:
+            raise IndexError("slab section out of range")
+
+        return StateSlab(num_homes, self._raw, self.offset + start)
+
+    def view(self, i) -> memoryview:
+        """Returns the shared state of home i of the slab
+
+        :param i: index of the home in the slab
+        :type i: int
+        :return: view of the HOME_WIDTH values of the home
+        """
+
+        if not 0 <= i < self.num_homes:
+            raise IndexError("slab home index out of range")
+
+        start = (self.offset + i) * HOME_WIDTH
+        return self._values[start:start + HOME_WIDTH]
+
+    def column(self, slot) -> np.ndarray:
+        """Returns one slot of the shared state of every home of the slab
+
+        :param slot: index of the slot in the state of a home (e.g. TEMP)
+        :type slot: int
+        :return: view of the slot of every home, in slab order
+        """
+
+        values = np.frombuffer(self._raw, dtype=np.float64).reshape(-1, HOME_WIDTH)
+        return values[self.offset:self.offset + self.num_homes, slot]
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from aggregates import FIELDS, QUANTILES, Aggregates
+
+
+@pytest.mark.parametrize("sizes", [[4, 4, 4], [3, 7, 1], [5, 0, 2]])
+def test_aggregates_match_numpy(sizes):
+    rng = np.random.default_rng(1)
+    steps = 6
+    temps = rng.normal(22, 3, (steps, sum(sizes)))
+    loads = rng.uniform(0, 1000, (steps, len(sizes), 2))
+
+    aggregates = Aggregates(sizes, capacity=2)
+    aggregates.record(0, temps[:2], loads[:2])
+    aggregates.record(2, temps[2:], loads[2:])
+    assert len(aggregates) == steps
+
+    bounds = np.cumsum([0] + sizes)
+    groups = [(n, temps[:, bounds[n]:bounds[n + 1]], loads[:, n]) for n in range(len(sizes))]
+    groups.append((aggregates.world, temps, loads.sum(axis=1)))
+
+    for group, group_temps, group_loads in groups:
+        for step in range(steps):
+            values = aggregates.get(step, group)
+            assert values["count"] == group_temps.shape[1]
+            assert values["hvac_power"] == pytest.approx(group_loads[step, 0])
+            assert values["grid_draw"] == pytest.approx(group_loads[step, 1])
+            if not group_temps.shape[1]:
+                assert values["temp_mean"] is None
+                continue
+
+            row = group_temps[step]
+            assert values["temp_mean"] == pytest.approx(row.mean())
+            assert values["temp_min"] == row.min()
+            assert values["temp_max"] == row.max()
+            for field, quantile in zip(("temp_p10", "temp_p50", "temp_p90"), QUANTILES):
+                assert values[field] == pytest.approx(np.quantile(row, quantile))
+
+
+def test_steps_are_recorded_in_order():
+    aggregates = Aggregates([2])
+    aggregates.record(0, np.zeros((3, 2)), np.zeros((3, 1, 2)))
+    with pytest.raises(ValueError):
+        aggregates.record(5, np.zeros((1, 2)), np.zeros((1, 1, 2)))
+    with pytest.raises(IndexError):
+        aggregates.get(3, 0)
+
+    aggregates.truncate(1)
+    aggregates.record(1, np.ones((1, 2)), np.zeros((1, 1, 2)))
+    assert aggregates.series("temp_mean", 0, 0, 10).tolist() == [0.0, 1.0]
+
+
+def test_world_aggregates_follow_the_homes(make_world):
+    world = make_world(homes=5)
+    world.advance(30)
+    world.sync_homes()
+
+    temps = world.get_int_temps(30)
+    values = world.aggregates.get(30, world.aggregates.world)
+    assert values["temp_mean"] == pytest.approx(temps.mean())
+    assert values["temp_p90"] == pytest.approx(np.quantile(temps, 0.9))
+    assert set(values) == set(FIELDS) | {"temp_mean"}
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from world import World
+
+
+def test_round_trip_restores_the_world(make_world, workdir):
+    path = str(workdir / "checkpoint")
+    world = make_world(record_energy=True)
+    world.advance(200)
+    world.save_checkpoint(path)
+    world.sync_homes()
+
+    resumed = World.load_checkpoint(path)
+    try:
+        resumed.sync_homes()
+        assert resumed.get_time() == 200
+        np.testing.assert_array_equal(resumed.temperature_rows(0, 201), world.temperature_rows(0, 201))
+        np.testing.assert_array_equal(resumed.flow_rows(0, 201), world.flow_rows(0, 201))
+        for home, saved in zip(resumed.neighborhoods[1].homes, world.neighborhoods[1].homes):
+            assert home.battery.charge_range(0, 201).tolist() == saved.battery.charge_range(0, 201).tolist()
+            assert home.thermostat.running() == saved.thermostat.running()
+            assert home.length == saved.length
+    finally:
+        resumed.close()
+
+
+@pytest.mark.parametrize("engine", ["object", "vector"])
+def test_resumed_run_matches_an_uninterrupted_one(make_world, workdir, engine):
+    path = str(workdir / "checkpoint")
+    world = make_world(engine)
+    world.advance(100)
+    world.save_checkpoint(path)
+    world.advance(100)
+    world.save_checkpoint(path, delta=True)
+    world.advance(100)
+    world.sync_homes()
+
+    resumed = World.load_checkpoint(path)
+    try:
+        assert resumed.get_time() == 200
+        resumed.advance(100)
+        resumed.sync_homes()
+        np.testing.assert_array_equal(resumed.temperature_rows(0, 301), world.temperature_rows(0, 301))
+    finally:
+        resumed.close()
+
+
+def test_resume_on_another_engine(make_world, workdir):
+    path = str(workdir / "checkpoint")
+    world = make_world("object")
+    world.advance(100)
+    world.save_checkpoint(path)
+
+    resumed = World.load_checkpoint(path, engine="vector")
+    try:
+        assert resumed.engine is not None
+        resumed.sync_homes()
+        np.testing.assert_allclose(resumed.temperature_rows(0, 101), world.temperature_rows(0, 101), rtol=0, atol=0)
+    finally:
+        resumed.close()
+
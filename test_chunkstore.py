@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from chunkstore import ChunkStore
+
+
+def blocks(columns=3, chunks=4, rows=50):
+    rng = np.random.default_rng(0)
+    data = 20 + np.cumsum(rng.normal(0, 0.01, (columns, chunks * rows)), axis=1)
+    return data, [data[:, i * rows:(i + 1) * rows] for i in range(chunks)]
+
+
+def fill(path, **kwargs):
+    data, parts = blocks()
+    store = ChunkStore(str(path), **kwargs)
+    start = 0
+    for part in parts:
+        store.write("temp", 0, start, part)
+        start += part.shape[1]
+    return store, data
+
+
+def test_samples_read_back_exactly(workdir):
+    store, data = fill(workdir, cache_chunks=1)
+    store.flush()
+
+    assert store.end("temp", 0) == data.shape[1]
+    assert store.read("temp", 0, 2, 123) == data[2, 123]
+    np.testing.assert_array_equal(store.read_all("temp", 0, 77), data[:, 77])
+    np.testing.assert_array_equal(store.read_range("temp", 0, 1, 30, 180), data[1, 30:180])
+    np.testing.assert_array_equal(store.read_range("temp", 0, slice(None), 0, 200), data)
+    assert store.nbytes < data.nbytes
+    store.close()
+
+
+def test_reopened_store_reads_and_appends(workdir):
+    store, data = fill(workdir)
+    store.close()
+
+    store = ChunkStore(str(workdir), 'a')
+    np.testing.assert_array_equal(store.read_range("temp", 0, 0, 0, 200), data[0])
+    store.write("temp", 0, 200, data[:, :10])
+    assert store.end("temp", 0) == 210
+    store.close()
+
+    store = ChunkStore(str(workdir), 'r')
+    np.testing.assert_array_equal(store.read_range("temp", 0, 0, 195, 210), np.append(data[0, 195:], data[0, :10]))
+    with pytest.raises(ValueError):
+        store.write("temp", 0, 210, data[:, :10])
+    store.close()
+
+
+def test_truncate_drops_the_chunks_after_end(workdir):
+    store, data = fill(workdir)
+    store.truncate("temp", 0, 120)
+
+    # the chunk holding sample 120 ends after it, so it goes too
+    assert store.end("temp", 0) == 100
+    with pytest.raises(ValueError):
+        store.write("temp", 0, 120, data[:, 120:150])
+
+    store.write("temp", 0, 100, data[:, :50] + 1)
+    np.testing.assert_array_equal(store.read_range("temp", 0, 0, 90, 150),
+                                  np.append(data[0, 90:100], data[0, :50] + 1))
+    store.close()
@@ -0,0 +1,84 @@
+import math
+
+import numpy as np
+import pytest
+
+from colors import ColorTable, color_indices, gradient_colors
+
+
+def color_gradient(internal_temp, lower_grad, upper_grad) -> str:
+    """Building.color_gradient as it was before the color tables, the reference of the tests"""
+
+    r = 255
+    g = 255
+    b = 255
+
+    t_c = int(round(((internal_temp * 9.0 / 5.0 + 32.0) - lower_grad)))
+    diff = int(math.ceil((upper_grad - lower_grad) / 4))
+
+    if t_c >= (diff * 4):
+        g = 0
+        b = 0
+
+    elif t_c >= (diff * 3):
+        g = int(round(g * (1 - ((t_c % diff) * (1 / diff)))))
+        b = 0
+
+    elif t_c >= (diff * 2):
+        r = int(round(r * ((t_c % diff) * (1 / diff))))
+        b = 0
+
+    elif t_c >= diff:
+        r = 0
+        b = int(round(b * (1 - ((t_c % diff) * (1 / diff)))))
+
+    elif t_c >= 0:
+        r = 0
+        g = int(g * round((t_c % diff) * (1 / diff), 2))
+
+    else:
+        r = 0
+        g = 0
+
+    color_code = '%02x%02x%02x' % (r, g, b)
+    hex_int = int(color_code, 16)
+
+    if t_c < 0:
+        hex_int -= abs(t_c) * 4
+    elif t_c > (diff * 4):
+        t_c -= (diff * 4)
+        hex_int -= t_c * (131072 * 2)
+
+    return str.format('#{:06x}', hex_int)
+
+
+# temperatures (C) from far below to far above the gradients, halves of a degree F included
+TEMPS = np.append(np.linspace(-40, 60, 2001), (np.arange(20, 120) + 0.5 - 32) * 5 / 9)
+
+
+@pytest.mark.parametrize("lower_grad, upper_grad", [(32, 78), (60, 80), (50, 51), (65.5, 90.25)])
+def test_table_matches_color_gradient(lower_grad, upper_grad):
+    table = ColorTable(lower_grad, upper_grad)
+    expected = [color_gradient(temp, lower_grad, upper_grad) for temp in TEMPS]
+
+    assert [table.color(temp) for temp in TEMPS] == expected
+    assert table.colors(TEMPS).tolist() == expected
+
+
+def test_table_grows_outside_its_range():
+    table = ColorTable(32, 78)
+    first, codes = table.table
+    temps = np.array([-200.0, 300.0])
+
+    assert table.colors(temps).tolist() == [color_gradient(temp, 32, 78) for temp in temps]
+    assert table.table[0] < first
+    assert len(table.table[1]) > len(codes)
+
+
+def test_homes_with_their_own_gradients():
+    temps = np.array([15.0, 22.0, 30.0, 22.0])
+    lower = np.array([32.0, 60.0, 32.0, 32.0])
+    upper = np.array([78.0, 80.0, 78.0, 78.0])
+
+    assert gradient_colors(temps, lower, upper).tolist() == [color_gradient(*args) for args in zip(temps, lower, upper)]
+    assert color_indices(temps, lower).tolist() == [int(round(t * 9 / 5 + 32 - g)) for t, g in zip(temps, lower)]
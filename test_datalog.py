@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+
+from datalog import DataLogger
+
+
+class Home:
+    """Home with the parts of a Residential read by the data logs"""
+
+    length = width = height = 10.0
+
+    def __init__(self, temp) -> None:
+        self.temp = temp
+
+    def get_int_temp(self, step):
+        return self.temp
+
+    def get_wall_type(self):
+        return "Brick"
+
+    def get_target_temp(self):
+        return 22.0
+
+
+class Neighborhood:
+    def __init__(self, n_id, homes) -> None:
+        self.id = n_id
+        self.homes = homes
+
+
+class Gate:
+    """Temperature whose formatting waits until the gate is opened, stalling the writer thread"""
+
+    def __init__(self) -> None:
+        self.open = threading.Event()
+
+    def __format__(self, spec) -> str:
+        self.open.wait()
+        return format(20.0, spec)
+
+
+def rows(path):
+    with open(path) as data_file:
+        return [line for line in data_file.read().splitlines() if line[:1].isdigit()]
+
+
+def test_rows_are_written_in_order(workdir):
+    logger = DataLogger([Neighborhood(0, [Home(20.0), Home(21.5)])], data_dir=str(workdir / "logs"))
+    for step in range(5):
+        logger.log(step, 30.0)
+    logger.close()
+
+    written = rows(workdir / "logs" / "neighborhood_0.csv")
+    assert [row.split(",")[0] for row in written] == ["0", "1", "2", "3", "4"]
+    assert written[0] == "0,20.000,21.500,,30.00000"
+
+
+def test_a_full_queue_blocks_the_simulation(workdir):
+    gate = Gate()
+    logger = DataLogger([Neighborhood(0, [Home(gate)])], queue_size=2, data_dir=str(workdir))
+    try:
+        # the writer stalls on the first row, the next two fill the queue
+        for step in range(3):
+            logger.log(step, 30.0)
+
+        blocked = threading.Thread(target=logger.log, args=(3, 30.0))
+        blocked.start()
+        blocked.join(0.2)
+        assert blocked.is_alive()
+
+        gate.open.set()
+        blocked.join(5)
+        assert not blocked.is_alive()
+        logger.flush()
+    finally:
+        gate.open.set()
+        logger.close()
+
+    assert len(rows(workdir / "neighborhood_0.csv")) == 4
+
+
+def test_writer_errors_reach_the_simulation(workdir):
+    logger = DataLogger([Neighborhood(0, [Home("not a temperature")])], data_dir=str(workdir))
+    logger.log(0, 30.0)
+    with pytest.raises(RuntimeError):
+        logger.flush()
+    with pytest.raises(RuntimeError):
+        logger.log(1, 30.0)
+    logger.close()
+
+
+def test_world_writes_its_data_logs_to_data_dir(make_world, workdir):
+    world = make_world("vector", log_interval=10, data_dir=str(workdir / "logs"))
+    world.advance(50)
+    world.flush_data()
+
+    for n_id in range(2):
+        written = rows(workdir / "logs" / "neighborhood_{}.csv".format(n_id))
+        assert [row.split(",")[0] for row in written] == ["10", "20", "30", "40", "50"]
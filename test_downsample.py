@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+import downsample
+
+
+def reference_lttb(x, y, points):
+    """Textbook Largest-Triangle-Three-Buckets, one sample at a time"""
+
+    n = len(y)
+    every = (n - 2) / (points - 2)
+    kept = [0]
+    a = 0
+    for i in range(points - 2):
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        next_lo, next_hi = hi, min(int((i + 2) * every) + 1, n - 1)
+        if i == points - 3:
+            next_lo, next_hi = n - 1, n
+        mean_x = sum(x[next_lo:next_hi]) / (next_hi - next_lo)
+        mean_y = sum(y[next_lo:next_hi]) / (next_hi - next_lo)
+
+        areas = [abs((x[a] - mean_x) * (y[j] - y[a]) - (x[a] - x[j]) * (mean_y - y[a])) for j in range(lo, hi)]
+        a = lo + int(np.argmax(areas))
+        kept.append(a)
+    kept.append(n - 1)
+    return kept
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(3)
+    values = 20 + np.cumsum(rng.normal(0, 0.05, 5000))
+    values[1234] += 5
+    values[4321] -= 5
+    return np.arange(5000) + 100, values
+
+
+@pytest.mark.parametrize("points", [3, 4, 17, 500])
+def test_lttb_matches_the_reference(series, points):
+    steps, values = series
+    kept = downsample.lttb(steps, values, points)
+
+    assert kept.tolist() == reference_lttb(steps, values, points)
+    assert len(kept) == points
+    assert (np.diff(kept) > 0).all()
+
+
+@pytest.mark.parametrize("points", [2, 3, 10, 501])
+def test_minmax_keeps_the_peaks_of_every_bucket(series, points):
+    steps, values = series
+    kept = downsample.minmax(values, points)
+
+    assert len(kept) <= points
+    assert (np.diff(kept) > 0).all()
+    assert {1234, 4321} <= set(kept.tolist())
+    assert values[kept].max() == values.max()
+    assert values[kept].min() == values.min()
+
+
+@pytest.mark.parametrize("method", downsample.METHODS)
+def test_short_series_are_kept_whole(method):
+    values = np.array([1.0, 3.0, 2.0])
+    kept = downsample.lttb(np.arange(3), values, 5) if method == "lttb" else downsample.minmax(values, 5)
+    assert kept.tolist() == [0, 1, 2]
+
+
+def test_too_few_points_are_rejected(series):
+    steps, values = series
+    with pytest.raises(ValueError):
+        downsample.lttb(steps, values, downsample.MIN_POINTS["lttb"] - 1)
+    with pytest.raises(ValueError):
+        downsample.minmax(values, downsample.MIN_POINTS["minmax"] - 1)
+
+
+def test_series_route(serve):
+    client, world = serve()
+    world.advance(300)
+
+    series = client.get('/series/1/2?points=50&method=minmax').get_json()['series']
+    assert len(series['temp']['steps']) <= 50
+    home = world.neighborhoods[1].homes[2]
+    assert series['temp']['values'] == [home.get_int_temp(step) for step in series['temp']['steps']]
+
+    assert client.get('/series/1/99').status_code == 404
+    assert client.get('/series/9').status_code == 404
+    assert client.get('/series/1/2?points=2&method=lttb').status_code == 400
+    assert client.get('/series/1/2?points=1&method=minmax').status_code == 400
+    assert client.get('/series/1/2?to=301').status_code == 400
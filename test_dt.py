@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import validation
+from world import World
+
+
+@pytest.mark.parametrize("dt", [0, -10, 1.5])
+def test_steps_are_whole_seconds(dt):
+    with pytest.raises(ValueError):
+        World(1, 1, 600, log_interval=0, dt=dt)
+
+
+def test_runs_take_duration_over_dt_steps(make_world):
+    world = make_world(duration=605, dt=10)
+    world.advance(world.num_steps)
+
+    assert world.num_steps == 61
+    assert world.get_time() == 61
+
+
+@pytest.mark.parametrize("engine", ["vector", "parallel"])
+def test_engines_agree_with_longer_steps(stepped, engine):
+    expected, expected_flows = stepped("object", 60, dt=10)
+    actual, actual_flows = stepped(engine, 60, dt=10)
+
+    np.testing.assert_allclose(actual, expected, atol=1e-6)
+    np.testing.assert_allclose(actual_flows, expected_flows, rtol=1e-9, atol=1e-6)
+
+
+def test_longer_steps_stay_close_to_one_second_steps():
+    report = validation.compare(1, 8, 1200, 10, engine="vector", hvac_every=2)
+
+    assert (report["steps"], report["reference_steps"]) == (120, 1200)
+    assert report["max_temp_error"] < 0.2
+    assert report["hvac_energy_error"] < 0.05 and report["grid_energy_error"] < 0.01
+
+
+def test_resuming_with_another_step_length_fails(make_world, tmp_path):
+    path = str(tmp_path / "checkpoint")
+    world = make_world(duration=1200, dt=10)
+    world.advance(10)
+    world.save_checkpoint(path)
+
+    with pytest.raises(ValueError, match="steps of 1 s instead of 10 s"):
+        World.load_checkpoint(path, dt=1)
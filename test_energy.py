@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from energy import CHARGED, DISCHARGED, FLOWS, GRID, HVAC, PV
+
+
+@pytest.mark.parametrize("engine", ["object", "vector"])
+@pytest.mark.parametrize("dt", [1, 10])
+def test_every_flow_is_in_joules(make_world, engine, dt):
+    world = make_world(engine, duration=600 * dt, dt=dt, record_energy=True)
+    world.advance(100)
+    world.sync_homes()
+    flows = world.flow_rows(1, 101)
+    devices = flows[:, :, len(FLOWS):].sum(axis=2)
+
+    # 5 panels of 300 W, and devices drawing their power for dt seconds
+    np.testing.assert_allclose(flows[:, :, PV], 1500 * dt)
+    assert flows[:, :, HVAC].max() > 0
+    # with lossless batteries, the demand of the homes is drawn from their battery or from the grid
+    np.testing.assert_allclose(flows[:, :, DISCHARGED] + flows[:, :, GRID], flows[:, :, HVAC] + devices)
+    assert (flows[:, :, CHARGED] <= flows[:, :, PV]).all()
+
+    # the aggregates hold the same energies, summed over the homes
+    totals = world.aggregates.values[1:101, world.aggregates.world]
+    np.testing.assert_allclose(totals[:, -2], flows[:, :, HVAC].sum(axis=1))
+    np.testing.assert_allclose(totals[:, -1], flows[:, :, GRID].sum(axis=1))
+
+
+def test_hvac_energy_is_its_power_times_dt(make_world):
+    world = make_world("object", duration=6000, dt=10, hvac_every=1)
+    home = world.neighborhoods[0].homes[0]
+    hvac = home.thermostat.airCon if home.thermostat.get_mode() == 1 else home.thermostat.furnace
+
+    assert home.thermostat.running()
+    assert home.thermostat.get_power() == hvac.power * 10
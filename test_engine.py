@@ -0,0 +1,28 @@
+import numpy as np
+
+
+def test_vector_engine_matches_object_path(stepped):
+    temps, flows = stepped("vector", 300)
+    ref_temps, ref_flows = stepped("object", 300)
+
+    assert temps.shape == ref_temps.shape
+    np.testing.assert_allclose(temps, ref_temps, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(flows, ref_flows, rtol=1e-9)
+
+
+def test_commands_between_steps_reach_the_engine(make_world):
+    temps = list()
+    for engine in ("object", "vector"):
+        world = make_world(engine, hvac_every=0)
+        world.advance(100)
+
+        # a thermostat command given to a home object, like the API does
+        world.sync_homes()
+        world.neighborhoods[1].homes[4].thermostat.fan_on(world.get_time())
+        world.sync_engine()
+
+        world.advance(100)
+        world.sync_homes()
+        temps.append(world.temperature_rows(0, 201))
+
+    np.testing.assert_allclose(temps[1], temps[0], rtol=0, atol=1e-9)
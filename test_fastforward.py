@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("engine", ["object", "vector"])
+def test_run_until_matches_stepping(make_world, stepped, engine):
+    steps = 500
+    world = make_world(engine, record_energy=True)
+    world.run_until(steps)
+    world.sync_homes()
+
+    ref_temps, ref_flows = stepped(engine, steps)
+    assert world.get_time() == steps
+    np.testing.assert_allclose(world.temperature_rows(0, steps + 1), ref_temps, rtol=0, atol=1e-6)
+    np.testing.assert_allclose(world.flow_rows(0, steps + 1).sum(axis=0), ref_flows.sum(axis=0), rtol=1e-3)
+
+
+def test_run_until_then_step_continues_the_run(make_world, stepped):
+    world = make_world(record_energy=True)
+    world.run_until(200)
+    world.advance(100)
+    world.sync_homes()
+
+    ref_temps, _ = stepped("vector", 300)
+    np.testing.assert_allclose(world.temperature_rows(0, 301), ref_temps, rtol=0, atol=1e-6)
+
+
+def test_run_until_the_past_does_nothing(make_world):
+    world = make_world()
+    world.advance(20)
+    world.run_until(10)
+    assert world.get_time() == 20
+    assert len(world.temp_history) == 21
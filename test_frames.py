@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+import pytest
+
+import frames
+
+
+def decode_binary(payload):
+    """Decode a binary frame like a client does"""
+
+    step, since, outside_temp, count, flags = frames.HEADER.unpack_from(payload)
+    offset = frames.HEADER.size
+    homes = None
+    if flags & frames.FLAG_DELTA:
+        homes = np.frombuffer(payload, '<u4', count, offset)
+        offset += 4 * count
+    temps = np.frombuffer(payload, '<f4', count, offset)
+    offset += 4 * count
+    colors = np.frombuffer(payload, '<i2', count, offset) if flags & frames.FLAG_COLORS else None
+    assert offset + (2 * count if colors is not None else 0) == len(payload)
+    return step, since, outside_temp, homes, temps, colors
+
+
+def test_binary_full_frame():
+    temps = np.array([20.5, 21.25, 19.0])
+    colors = np.array([3, 4, 2])
+    step, since, outside, homes, decoded, decoded_colors = decode_binary(
+        frames.encode_binary(12, 30.5, temps, colors))
+
+    assert (step, since, outside, homes) == (12, -1, 30.5, None)
+    np.testing.assert_array_equal(decoded, temps.astype(np.float32))
+    np.testing.assert_array_equal(decoded_colors, colors)
+
+
+def test_binary_and_array_delta_frames():
+    previous = np.array([20.0, 21.0, 22.0, 23.0])
+    temps = np.array([20.0, 21.5, 22.0, 22.5])
+    homes = frames.changed_homes(temps, previous)
+    assert homes.tolist() == [1, 3]
+
+    step, since, outside, sent, decoded, colors = decode_binary(
+        frames.encode_binary(8, 25.0, temps[homes], since=5, homes=homes))
+    assert (step, since, colors) == (8, 5, None)
+    assert sent.tolist() == [1, 3]
+    np.testing.assert_array_equal(decoded, [21.5, 22.5])
+
+    frame = json.loads(frames.encode_array(8, 25.0, temps[homes], since=5, homes=homes))
+    assert frame == {'step': 8, 'outside_temp': 25.0, 'since': 5, 'homes': [1, 3], 'temps': [21.5, 22.5]}
+
+
+@pytest.mark.parametrize("frame_format", ["array", "binary"])
+def test_get_data_frames_match_the_world(serve, frame_format):
+    client, world = serve()
+    world.advance(20)
+
+    response = client.get('/st=20/get_data/celsius?format={}&colors=1'.format(frame_format))
+    assert response.status_code == 200
+    if frame_format == 'binary':
+        step, since, outside, homes, temps, colors = decode_binary(response.data)
+    else:
+        frame = response.get_json()
+        step, temps, colors = frame['step'], frame['temps'], frame['colors']
+
+    assert step == 20
+    np.testing.assert_allclose(temps, world.get_int_temps(20), atol=1e-3)
+    assert len(colors) == world.num_neighborhoods * world.num_homes
+
+    delta = client.get('/st=20/get_data/celsius?format=array&since=10').get_json()
+    changed = np.flatnonzero(world.get_int_temps(20) != world.get_int_temps(10))
+    assert delta['homes'] == changed.tolist()
+
+
+def test_rejected_since_does_not_step_the_world(serve):
+    client, world = serve()
+
+    assert client.get('/st=/get_data/celsius?since=999').status_code == 400
+    assert world.get_time() == 0
+    assert client.get('/st=/get_data/celsius?format=array&since=0').status_code == 200
+    assert world.get_time() == 1
@@ -0,0 +1,44 @@
+import random
+
+import numpy as np
+
+from generation import FIELDS, home_draws, sample_neighborhood, sample_neighborhoods
+
+
+def homes(world) -> list:
+    return [(home.has_basement, home.num_floors, home.length, home.width, home.walls.type, home.walls.R)
+            for neighborhood in world.neighborhoods for home in neighborhood.homes]
+
+
+def test_same_seed_same_homes(make_world):
+    assert homes(make_world(seed=11)) == homes(make_world(seed=11))
+    assert homes(make_world(seed=11)) != homes(make_world(seed=12))
+
+
+def test_seeded_worlds_leave_the_random_module_alone(make_world):
+    random.seed(5)
+    state = random.getstate()
+    make_world(seed=3)
+
+    assert random.getstate() == state
+
+
+def test_neighborhoods_do_not_depend_on_the_workers():
+    one = sample_neighborhoods(4, 3, 50)
+    two = sample_neighborhoods(4, 3, 50, workers=2)
+
+    for expected, actual in zip(one, two):
+        for name in FIELDS:
+            np.testing.assert_array_equal(actual[name], expected[name])
+    np.testing.assert_array_equal(one[1]["length"], sample_neighborhood(4, 1, 50)["length"])
+    assert not np.array_equal(one[0]["length"], one[1]["length"])
+
+
+def test_draws_follow_the_old_distributions():
+    draws = home_draws(sample_neighborhood(1, 0, 2000))
+
+    assert {home["num_floors"] for home in draws} == {1, 2, 3}
+    assert {home["thickness"] for home in draws} == {3, 4, 5, 6}
+    assert min(home["length"] for home in draws) == 30 and max(home["length"] for home in draws) == 50
+    assert min(home["width"] for home in draws) == 30 and max(home["width"] for home in draws) == 50
+    assert {type(home["has_basement"]) for home in draws} == {bool}
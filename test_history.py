@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from history import History, HistoryWindow
+
+
+def make_history(count, start=0, typecode='d'):
+    history = History(4, typecode, start)
+    history.extend(float(i) for i in range(start, start + count))
+    return history
+
+
+def test_history_grows_past_its_capacity():
+    history = make_history(10)
+    assert len(history) == 10
+    assert history.capacity >= 10
+    assert history.tolist() == [float(i) for i in range(10)]
+    assert history[-1] == 9.0
+
+
+@pytest.mark.parametrize("start", [0, 5])
+@pytest.mark.parametrize("index", [slice(None), slice(6, 12), slice(6, None, 3), slice(-4, None), slice(12, 6, -2),
+                                   slice(None, 4, -1), slice(20, 30), slice(9, 7)])
+def test_slices_match_a_list(start, index):
+    history = make_history(15, start)
+    expected = ([None] * start + [float(i) for i in range(start, start + 15)])[index]
+
+    if None in expected:
+        with pytest.raises(IndexError):
+            history[index]
+    else:
+        assert list(history[index]) == expected
+
+
+def test_discard_keeps_the_indices():
+    history = make_history(10)
+    history.discard(6)
+
+    assert history.start == 6
+    assert len(history) == 10
+    assert history[6] == 6.0
+    assert list(history[7:9]) == [7.0, 8.0]
+    with pytest.raises(IndexError):
+        history[5]
+
+
+def test_truncate_and_float32():
+    history = make_history(10, typecode='f')
+    history.truncate(4)
+    history.append(0.1)
+
+    assert len(history) == 5
+    assert history.typecode == 'f'
+    assert history[4] == pytest.approx(0.1, rel=1e-6)
+    assert history[4] != 0.1
+
+
+def test_window_counts_recorded_steps():
+    matrix = np.zeros((10, 2))
+    end = np.array([3], np.int64)
+    windows = [HistoryWindow(matrix[:, k], 2, end) for k in range(2)]
+
+    assert len(windows[0]) == 3
+    assert windows[0].capacity == 12
+    with pytest.raises(IndexError):
+        windows[1][3]
+
+    # writing past the recorded steps records them for every column of the matrix
+    windows[0][5] = 1.5
+    assert len(windows[1]) == 6
+    assert windows[0][-1] == 1.5
+    assert list(windows[1][2:]) == [0.0] * 4
+    with pytest.raises(IndexError):
+        windows[0][1]
+
+
+@pytest.mark.parametrize("engine", ["object", "vector", "parallel"])
+def test_world_histories_count_recorded_steps(make_world, engine):
+    world = make_world(engine, workers=2)
+    world.advance(10)
+    world.sync_homes()
+    home = world.neighborhoods[0].homes[0]
+
+    assert len(home.temp_history) == 11
+    assert len(home.battery.charge_history) == 11
+    assert home.temp_history[-1] == home.get_int_temp(10)
+    with pytest.raises(IndexError):
+        home.get_int_temp(300)
+
+
+@pytest.mark.parametrize("engine", ["object", "vector"])
+def test_history_store_matches_memory(make_world, workdir, engine):
+    temps = list()
+    for history_dir in (None, str(workdir / "history")):
+        world = make_world(engine, history_dir=history_dir, chunk_steps=100)
+        world.advance(450)
+        home = world.neighborhoods[1].homes[3]
+        temps.append([home.get_int_temp(step) for step in range(451)])
+
+        if history_dir is not None:
+            # only the steps of the last chunks stay in memory
+            assert home.temp_history.start > 0
+
+    assert temps[1] == temps[0]
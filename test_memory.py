@@ -0,0 +1,66 @@
+import warnings
+
+import pytest
+
+from memory import MemoryBudgetWarning
+
+SUBSYSTEMS = {"homes", "home_histories", "world_history", "storage", "engine", "energy", "aggregates", "slab",
+              "history_store"}
+
+
+@pytest.mark.parametrize("engine", ["object", "vector"])
+def test_report_adds_up_the_subsystems(make_world, engine):
+    world = make_world(engine, record_energy=True)
+    world.advance(100)
+    report = world.memory_report()
+    subsystems = report["subsystems"]
+
+    assert set(subsystems) == SUBSYSTEMS
+    assert (report["step"], report["num_steps"], report["num_homes"]) == (100, world.num_steps, 12)
+    for key in ("bytes", "per_step_bytes", "projected_bytes"):
+        assert report[key] == sum(subsystem[key] for subsystem in subsystems.values())
+    for subsystem in subsystems.values():
+        assert subsystem["recorded_bytes"] <= subsystem["bytes"] <= subsystem["projected_bytes"]
+    assert subsystems["homes"]["bytes"] > 0 and subsystems["slab"]["bytes"] > 0
+    # engines record the energy flows themselves
+    assert subsystems["energy" if engine == "object" else "engine"]["per_step_bytes"] > 0
+    assert report["over_budget"] is False and "allocations" not in report
+
+
+def test_engines_hold_the_batteries(make_world):
+    vector = make_world("vector").memory_report()["subsystems"]
+    objects = make_world("object").memory_report()["subsystems"]
+
+    assert vector["storage"]["bytes"] == 0 and vector["engine"]["bytes"] > 0
+    assert objects["storage"]["bytes"] > 0 and objects["engine"]["bytes"] == 0
+
+
+def test_histories_are_projected_to_the_last_step(make_world):
+    world = make_world("object", duration=5000)
+    history = world.memory_report()["subsystems"]["world_history"]
+
+    assert history["projected_bytes"] >= history["per_step_bytes"] * (world.num_steps + 1)
+
+
+def test_budget_warns_when_a_run_does_not_fit(make_world):
+    with pytest.warns(MemoryBudgetWarning, match="over the memory budget"):
+        world = make_world(memory_budget=1024)
+    assert world.memory_report()["over_budget"] is True
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", MemoryBudgetWarning)
+        make_world(memory_budget=1 << 30)
+
+
+def test_tracing_reports_allocations(serve):
+    client, world = serve("object")
+
+    assert client.get("/debug/memory").get_json()["subsystems"].keys() == SUBSYSTEMS
+    client.post("/debug/memory/tracing/on")
+    world.advance(20)
+    allocations = client.get("/debug/memory?top=3").get_json()["allocations"]
+    client.post("/debug/memory/tracing/off")
+
+    assert (allocations["from_step"], allocations["to_step"]) == (0, 20)
+    assert len(allocations["top"]) <= 3
+    assert world.memory_tracer is None
@@ -0,0 +1,73 @@
+from metrics import BUCKETS, DISABLED, Histogram, PhaseTimers
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.lines("t", 'phase="a"') == ['t_bucket{phase="a",le="0.1"} 2', 't_bucket{phase="a",le="1.0"} 3',
+                                                  't_bucket{phase="a",le="+Inf"} 4', 't_sum{phase="a"} 3.65',
+                                                  't_count{phase="a"} 4']
+
+
+def test_phase_timers_record_one_total_per_step():
+    timers = PhaseTimers()
+    for _ in range(3):
+        start = timers.start()
+        start = timers.lap("a", start)
+        timers.lap("a", start)
+        with timers.phase("b"):
+            pass
+        timers.end_step()
+
+    assert {phase: histogram.count for phase, histogram in timers.histograms.items()} == {"a": 3, "b": 3}
+    assert not timers.totals
+    assert 'simulation_step_phase_seconds_count{phase="a"} 3' in timers.lines()
+
+
+def test_disabled_timers_do_nothing():
+    start = DISABLED.start()
+
+    assert DISABLED.lap("a", start) == start == 0.0
+    with DISABLED.phase("b"):
+        pass
+    DISABLED.end_step()
+
+
+def counts(text) -> dict:
+    return {line.split()[0]: int(line.split()[1]) for line in text.splitlines() if "_count{" in line}
+
+
+def test_metrics_route_exports_the_phases(serve):
+    client, world = serve("object", phase_timers=True)
+    world.advance(20)
+
+    assert client.get("/metrics/timers/sideways").status_code == 404
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    assert "simulation_step 20" in text.splitlines()
+    exported = counts(text)
+    for phase in ("home.thermostat", "home.approach_amb", "home.consume_energy", "world.homes", "world.battery"):
+        assert exported['simulation_step_phase_seconds_count{{phase="{}"}}'.format(phase)] == 20
+    phases = sum(name.startswith("simulation_step_phase") for name in exported)
+    assert text.count("simulation_step_phase_seconds_bucket") == (len(BUCKETS) + 1) * phases
+
+    client.get("/metrics")
+    assert counts(client.get("/metrics").get_data(as_text=True))['api_request_seconds_count{route="get_metrics"}'] >= 2
+
+
+def test_timers_can_be_turned_on_and_off(serve):
+    client, world = serve("vector")
+    world.advance(5)
+    assert "simulation_step_phase_seconds" not in client.get("/metrics").get_data(as_text=True)
+
+    assert client.post("/metrics/timers/on").get_json() == {"phase_timers": True}
+    world.advance(5)
+    assert counts(client.get("/metrics").get_data(as_text=True))[
+        'simulation_step_phase_seconds_count{phase="world.engine"}'] > 0
+
+    assert client.post("/metrics/timers/off").get_json() == {"phase_timers": False}
+    assert world.timers is None
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+
+def test_parallel_engine_matches_object_path(stepped):
+    temps, flows = stepped("parallel", 300, workers=2)
+    ref_temps, ref_flows = stepped("object", 300)
+
+    np.testing.assert_allclose(temps, ref_temps, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(flows, ref_flows, rtol=1e-9)
+
+
+def test_histories_grow_past_the_run(make_world):
+    # stepping past the end of the run grows the shared history matrices of the workers
+    temps = list()
+    for engine in ("object", "parallel"):
+        world = make_world(engine, duration=100, workers=2)
+        world.advance(450)
+        world.sync_homes()
+        temps.append(world.temperature_rows(0, 451))
+
+    np.testing.assert_allclose(temps[1], temps[0], rtol=0, atol=1e-9)
+
+
+def test_histories_stay_readable_after_close(make_world):
+    world = make_world("parallel", workers=2)
+    world.advance(50)
+    world.sync_homes()
+    home = world.neighborhoods[1].homes[2]
+    temp, charge = home.get_int_temp(50), home.battery.current_charge(50)
+
+    world.close()
+    assert home.get_int_temp(50) == temp
+    assert home.battery.current_charge(50) == charge
+    with pytest.raises(IndexError):
+        home.get_int_temp(51)
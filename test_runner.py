@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from runner import IDLE, PAUSED, RUNNING, WorldRunner
+from rwlock import ReadWriteLock
+
+
+@pytest.fixture
+def runner(make_world):
+    world = make_world(hvac_every=0)
+    runner = WorldRunner(world, ReadWriteLock(), batch=10)
+    yield runner
+    runner.close()
+
+
+def wait_idle(runner, timeout=10):
+    deadline = time.monotonic() + timeout
+    while runner.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not runner.running
+
+
+def test_run_for_a_number_of_steps(runner):
+    progress = runner.start(steps=35)
+    assert progress['until'] == 35
+
+    wait_idle(runner)
+    progress = runner.progress()
+    assert runner.world.get_time() == 35
+    assert progress['state'] == IDLE
+    assert progress['step'] == 35
+    assert progress['progress'] == 1.0
+
+
+def test_pause_resume_and_stop(runner):
+    # a slow target speed keeps the run going while it is controlled
+    assert runner.start(speed=20 * runner.world.dt)['state'] == RUNNING
+    assert runner.pause()['state'] == PAUSED
+    paused_at = runner.world.get_time()
+    time.sleep(0.1)
+    assert runner.world.get_time() == paused_at
+
+    assert runner.resume()['state'] == RUNNING
+    progress = runner.stop()
+    assert progress['state'] == IDLE
+    assert not runner.running
+    assert progress['step'] == runner.world.get_time()
+
+
+def test_progress_follows_manual_steps(runner):
+    runner.world.step()
+    runner.world.step()
+    assert runner.progress()['step'] == 2
+
+
+def test_subscriber_gets_every_frame_it_asks_for(runner):
+    subscription = runner.subscribe(every=5)
+    frames = list()
+    try:
+        step = 0
+        while step < 20:
+            step = runner.next_frame(step, every=5, timeout=10)
+            frames.append(step)
+    finally:
+        runner.unsubscribe(subscription)
+
+    assert all(step % 5 == 0 for step in frames)
+    assert frames == sorted(set(frames))
+    wait_idle(runner)
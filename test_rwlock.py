@@ -0,0 +1,56 @@
+import threading
+import time
+
+from rwlock import ReadWriteLock
+
+
+def start(target):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    both_in = threading.Barrier(2, timeout=5)
+
+    def read():
+        with lock.read():
+            both_in.wait()
+
+    threads = [start(read), start(read)]
+    for thread in threads:
+        thread.join(5)
+    assert not both_in.broken
+
+
+def test_writer_excludes_readers_and_goes_before_later_ones():
+    lock = ReadWriteLock()
+    order = list()
+
+    lock.acquire_read()
+    writer = start(lambda: (lock.acquire_write(), order.append("writer"), lock.release_write()))
+    time.sleep(0.05)
+
+    # a reader arriving while the writer waits goes after it
+    reader = start(lambda: (lock.acquire_read(), order.append("reader"), lock.release_read()))
+    time.sleep(0.05)
+    assert order == []
+
+    lock.release_read()
+    writer.join(5)
+    reader.join(5)
+    assert order == ["writer", "reader"]
+
+
+def test_writer_takes_the_lock_again():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.read():
+            with lock.write():
+                pass
+
+    # released for good: another thread can write
+    writer = start(lambda: lock.write().__enter__())
+    writer.join(5)
+    assert not writer.is_alive()
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from energy import FLOWS
+from es import StorageBank
+
+
+def reference_step(charge, pv, demand, top, charge_eff, discharge_eff, charge_rate, discharge_rate):
+    """One step of the old per-home ElectricalStorage, with the rates already in J per step"""
+
+    charge = min(charge + max(min(min(pv, charge_rate) * charge_eff, top - charge), 0), top)
+    wanted = demand / discharge_eff
+    drawn = min(wanted, discharge_rate, charge)
+    return charge - drawn, (wanted - drawn) * discharge_eff
+
+
+def make_bank(dt=1):
+    bank = StorageBank(4, 8, dt=dt)
+    bank.configure(capacity=1000, charge_efficiency=0.9, discharge_efficiency=0.8, charge_rate=50,
+                   discharge_rate=40)
+    bank.pv_output[:] = [0, 30 * dt, 120 * dt, 500 * dt]
+    bank.charge[:] = [0, 500, 990, 100]
+    return bank
+
+
+@pytest.mark.parametrize("dt", [1, 10])
+def test_dispatch_matches_one_battery_at_a_time(dt):
+    bank = make_bank(dt)
+    demand = np.array([10, 0, 200, 60], dtype=float) * dt
+    expected = [reference_step(bank.charge[i], bank.pv_output[i], demand[i], 1000, 0.9, 0.8, 50 * dt, 40 * dt)
+                for i in range(4)]
+
+    bank.dispatch(1, demand)
+
+    np.testing.assert_allclose(bank.charge, [charge for charge, _ in expected])
+    np.testing.assert_allclose(bank.grid, [grid for _, grid in expected])
+    np.testing.assert_allclose(bank.history[1], bank.charge)
+    assert bank.end[0] == 2
+
+
+def test_run_matches_dispatching_every_step():
+    stepped, ran = make_bank(), make_bank()
+    demand = np.array([10, 0, 200, 60], dtype=float)
+    grids = []
+    for step in range(1, 21):
+        stepped.dispatch(step, demand)
+        grids.append(stepped.grid.copy())
+
+    for i in range(4):
+        _, _, grid = ran.run(i, demand[i], 0, 20)
+        np.testing.assert_allclose(grid, [row[i] for row in grids])
+    np.testing.assert_allclose(ran.charge, stepped.charge)
+    np.testing.assert_allclose(ran.history[1:21], stepped.history[1:21])
+
+
+def test_configure_rejects_bad_parameters():
+    bank = StorageBank(2)
+
+    with pytest.raises(ValueError):
+        bank.configure(charge_efficiency=1.5)
+    with pytest.raises(ValueError):
+        bank.configure(capacity=-1)
+    with pytest.raises(IndexError):
+        bank.battery(2)
+
+
+def test_engines_adopt_the_batteries(make_world):
+    assert make_world("object").storage is not None
+    world = make_world("vector")
+    assert world.storage is None
+    assert world.neighborhoods[1].homes[2].battery.bank is world.engine.storage
+
+
+@pytest.mark.parametrize("engine", ["vector", "parallel"])
+def test_engines_dispatch_like_the_objects(make_world, engine):
+    battery = {"capacity": 2e5, "charge_efficiency": 0.9, "discharge_efficiency": 0.8, "charge_rate": 800,
+               "discharge_rate": 600}
+    expected, actual = (make_world(name, record_energy=True, battery=battery) for name in ("object", engine))
+    for world in expected, actual:
+        world.advance(60)
+
+    np.testing.assert_allclose(actual.flow_rows(1, 61)[:, :, :len(FLOWS)],
+                               expected.flow_rows(1, 61)[:, :, :len(FLOWS)], rtol=1e-9, atol=1e-6)
@@ -7,20 +7,26 @@ from hvac import AC, Furnace
 class Thermostat:
 	"""Thermostat object.
 
-	Created by homes when they are generated to manage their internal temperatures.
+	Created by homes when they are generated to manage their internal temperatures. The AC and the furnace are
+	created the first time they are used, so a thermostat that only cools never holds a furnace.
 	"""
 
-	def __init__(self, sizes, shared_info, world_clock_, logger_=None) -> None:
+	__slots__ = ("world_clock", "target_temp", "sharedInfo", "logger", "start_temp", "start_time", "end_time", "mode",
+				 "constants", "dt", "_air_con", "_furnace")
+
+	def __init__(self, constants, shared_info, world_clock_, logger_=None, dt=1) -> None:
 		"""Constructor for thermostat object
 
-		:param sizes: list of sizes of the house [width, length, height]
-		:type sizes: list()
+		:param constants: precomputed physics constants of the house (sizes, volume, ...)
+		:type constants: HomeConstants
 		:param shared_info: information shared between the home and the thermostat (temperature)
-		:type shared_info: multiprocessing data list
+		:type shared_info: memoryview (StateSlab view)
 		:param world_clock_: object containing current step of the world
 		:type world_clock_: multiprocessing data variable
-		:param logger_: log object to write log messages to
-		:type logger_: log
+		:param logger_: logger of the thermostat, None when it does not log
+		:type logger_: logging.Logger
+		:param dt: length of a step (s). Start and end times are steps of the world clock
+		:type dt: int
 
 		:return: Nothing
 		"""
@@ -29,16 +35,54 @@ class Thermostat:
 		self.target_temp = 0
 		self.sharedInfo = shared_info
 		self.logger = logger_
-		self.log_msg = list()
 
 		self.start_temp = None
 		self.start_time = None
 		self.end_time = None
 		self.mode = 0
 
-		self.sizes = sizes
-		self.airCon = AC(self.sizes, self.sharedInfo)
-		self.furnace = Furnace("gas", sizes, self.sharedInfo)
+		self.constants = constants
+		self.dt = dt
+		self._air_con = None
+		self._furnace = None
+
+	@property
+	def airCon(self) -> AC:
+		"""Get the AC, created the first time it is used"""
+		if self._air_con is None:
+			self._air_con = AC(self.constants, self.sharedInfo)
+		return self._air_con
+
+	@property
+	def furnace(self) -> Furnace:
+		"""Get the furnace, created the first time it is used"""
+		if self._furnace is None:
+			self._furnace = Furnace("gas", self.constants, self.sharedInfo)
+		return self._furnace
+
+	def get_hvac_modes(self) -> tuple:
+		"""Returns the modes of the AC and of the furnace, without creating them
+
+		:return: mode of the AC and mode of the furnace, 0 (off) for a unit not created yet
+		"""
+
+		return (0 if self._air_con is None else self._air_con.mode,
+				0 if self._furnace is None else self._furnace.mode)
+
+	def set_hvac_modes(self, ac_mode, furnace_mode) -> None:
+		"""Sets the modes of the AC and of the furnace, only creating the ones that are turned on
+
+		:param ac_mode: mode of the AC, turned off (0) or on (1)
+		:type ac_mode: int
+		:param furnace_mode: mode of the furnace, turned off (0) or on (1)
+		:type furnace_mode: int
+		:return: Nothing
+		"""
+
+		if ac_mode or self._air_con is not None:
+			self.airCon.mode = ac_mode
+		if furnace_mode or self._furnace is not None:
+			self.furnace.mode = furnace_mode
 
 	def set_target_temp(self, target_temp_) -> None:
 		"""Sets the target temperature
@@ -49,7 +93,7 @@ class Thermostat:
 		"""
 
 		if self.logger is not None:
-			self.log_msg.append(["\t\tSETTING THERMOMETER TO {}".format(target_temp_), "d"])
+			self.logger.debug("\t\tSETTING THERMOMETER TO %s", target_temp_)
 
 		self.target_temp = target_temp_
 
@@ -77,11 +121,11 @@ class Thermostat:
 
 		if self.logger is not None:
 			if mode == 0:
-				self.log_msg.append(["\t\tSETTING HVAC MODE TO OFF", "w"])
+				self.logger.warning("\t\tSETTING HVAC MODE TO OFF")
 			elif mode == 1:
-				self.log_msg.append(["\t\tSETTING HVAC MODE TO COOLING", "d"])
+				self.logger.debug("\t\tSETTING HVAC MODE TO COOLING")
 			elif mode == 2:
-				self.log_msg.append(["\t\tSETTING HVAC MODE TO HEATING", "d"])
+				self.logger.debug("\t\tSETTING HVAC MODE TO HEATING")
 
 		self.fan_off()
 		self.mode = mode
@@ -130,26 +174,28 @@ class Thermostat:
 	def get_power(self) -> int:
 		""" Returns the energy consumption of the system
 
-		:return: The energy consumption of the current HVAC system that is turned on
+		:return: The energy (J) used by the current HVAC system that is turned on, during a step
 		"""
 		power = 0
 
 		if self.mode == 1:
-			power = self.airCon.get_power()
+			power = self.airCon.get_power(self.dt)
 		elif self.mode == 2:
-			power = self.furnace.get_power()
+			power = self.furnace.get_power(self.dt)
 
 		return power
 
-	def fan_on(self) -> None:
+	def fan_on(self, clock=None) -> None:
 		"""Turns on the HVAC Fan
 
+		:param clock: time at which the fan turns on. Default None, which means the current world time
+		:type clock: int
 		:return: Nothing
 		"""
 
 		if self.mode == 0:
 			if self.logger is not None:
-				self.log_msg.append(["\t\tThermometer is not set to any mode", "w"])
+				self.logger.warning("\t\tThermometer is not set to any mode")
 
 		elif self.mode == 1:
 			self.airCon.turn_on()
@@ -157,23 +203,25 @@ class Thermostat:
 		else:
 			self.furnace.turn_on()
 
-		self.start_time = self.world_clock.value
+		self.start_time = self.world_clock.value if clock is None else clock
 		self.start_temp = self.sharedInfo[0]
 		self.end_time = self.start_time + self.calc_run_time()
 
 		if self.logger is not None:
-			self.log_msg.append(["\t\tFan turned ON ({} --> {}) until {}".format(self.start_temp,
-																		   self.target_temp, self.end_time), "d"])
+			self.logger.debug("\t\tFan turned ON (%s --> %s) until %s", self.start_temp, self.target_temp,
+							  self.end_time)
 
-	def fan_off(self) -> None:
+	def fan_off(self, clock=None) -> None:
 		"""Turns off the HVAC Fan. Sets the end time to the current time
 
+		:param clock: time at which the fan turns off. Default None, which means the current world time
+		:type clock: int
 		:return: Nothing
 		"""
 
 		if self.mode == 0:
 			if self.logger is not None:
-				self.log_msg.append(["\t\tThermometer is not set to any mode", "w"])
+				self.logger.warning("\t\tThermometer is not set to any mode")
 
 		elif self.mode == 1:
 			self.airCon.turn_off()
@@ -181,28 +229,28 @@ class Thermostat:
 		else:
 			self.furnace.turn_off()
 		
-		self.end_time = self.world_clock.value
+		self.end_time = self.world_clock.value if clock is None else clock
 		if self.logger is not None:
-			self.log_msg.append(["\t\tFan turned OFF @ {}".format(self.end_time), "d"])
+			self.logger.debug("\t\tFan turned OFF @ %s", self.end_time)
 
 	def calc_run_time(self) -> int:
 		"""Calculates the amount of time the HVAC system needs to stay on to get the space of the house to the
 		target temperature
 
-		:return: Calculated amount of time of the HVAC Fan will stay on
+		:return: Calculated number of steps the HVAC Fan will stay on
 		"""
 
 		time_on = 0
 
 		if self.mode == 0:
 			if self.logger is not None:
-				self.log_msg.append(["\t\tThermometer is not set to any mode", "w"])
+				self.logger.warning("\t\tThermometer is not set to any mode")
 
 		elif self.mode == 1:
-			time_on = self.airCon.calc_on_time(self.airCon.compute_q(self.target_temp))
+			time_on = self.airCon.calc_on_time(self.airCon.compute_q(self.target_temp), self.dt)
 
 		else:
-			time_on = self.furnace.calc_on_time(self.furnace.compute_q(self.target_temp))
+			time_on = self.furnace.calc_on_time(self.furnace.compute_q(self.target_temp), self.dt)
 
 		return time_on
 
@@ -210,14 +258,14 @@ class Thermostat:
 		"""Calculate and return the rate at which temperature would have to change to get to the target temperature
 		from the starting temperature
 
-		:return: Temperature change rate
+		:return: Temperature change per step
 		"""
 		temp_delta = abs(self.start_temp - self.target_temp) / (self.get_end_time() - self.get_start_time())
 		return temp_delta
 
 	def calc_int_pressure(self):
 		r_constant = 8.314
-		rm_volume = self.sizes[0] * self.sizes[1] * self.sizes[2]
+		rm_volume = self.constants.r_volume
 		rm_air_density = self.sharedInfo[1] / (287.058 * (self.sharedInfo[0] + 273))
 		rm_air_mass = rm_air_density / rm_volume
 		rm_mols = rm_air_mass / 28.964 # average molar mass of air
@@ -253,17 +301,6 @@ class Thermostat:
 		:return: Nothing
 		"""
 
-		if len(self.log_msg) >= 1:
-			for msg in self.log_msg:
-				if msg[1] == "d":
-					self.logger.debug(msg[0])
-				elif msg[1] == "w":
-					self.logger.warning(msg[0])
-				else:
-					self.logger.critical(msg[0])
-
-			del self.log_msg[:]
-
 		if self.running():
 			if self.mode == 0:
 				if self.logger is not None:
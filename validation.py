@@ -0,0 +1,141 @@
+"""Validation of longer steps against the 1 s reference.
+
+A world stepped with a step length dt > 1 runs the same simulated time in dt times fewer steps, at the cost of
+coarser physics: conduction compounds dt one-second steps from the temperature at the start of the step, and HVAC
+runs and device schedules are rounded to whole steps. ``compare`` runs the same seeded world with 1 s steps and with
+steps of dt seconds, turns on the HVAC of the same homes in both, and reports how far the temperatures and energies
+of the longer steps are from the reference, and how much faster they ran.
+
+    python validation.py [duration] [dt ...] [--engine vector] [--homes 100] [--season summer]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from aggregates import GRID_DRAW, HVAC_POWER
+from world import World
+
+
+def _build(num_neighborhoods, num_homes, duration, dt, season, weather, seed, engine, hvac_every):
+    """Build a world and turn on the HVAC of one home in every hvac_every homes"""
+
+    world = World(num_neighborhoods, num_homes, duration, engine=engine, log_interval=0, seed=seed, dt=dt)
+    world.make_world(season, weather)
+
+    if hvac_every:
+        world.sync_homes()
+        for neighborhood in world.neighborhoods:
+            for home in neighborhood.homes[::hvac_every]:
+                home.thermostat.fan_on(0)
+        world.sync_engine()
+
+    return world
+
+
+def _run(world) -> float:
+    """Step a world to the end of its run, returning the CPU time it took"""
+
+    start = time.process_time()
+    world.advance(world.num_steps)
+    return time.process_time() - start
+
+
+def _relative(value, reference) -> float:
+    """Error of a value relative to its reference, 0 when the reference is 0"""
+
+    return float(abs(value - reference) / abs(reference)) if reference else 0.0
+
+
+def compare(num_neighborhoods, num_homes, duration, dt, season="summer", weather="sunny", seed=0, engine="vector",
+            hvac_every=4) -> dict:
+    """Run the same world with 1 s steps and with steps of dt seconds, and compare them
+
+    :param num_neighborhoods: number of neighborhoods
+    :type num_neighborhoods: int
+    :param num_homes: number of homes per neighborhood
+    :type num_homes: int
+    :param duration: simulated time (s), a multiple of dt
+    :type duration: int
+    :param dt: step length to validate (s)
+    :type dt: int
+    :param season: season of the world
+    :type season: str
+    :param weather: weather of the world
+    :type weather: str
+    :param seed: seed of the homes, the same for both runs
+    :type seed: int
+    :param engine: engine stepping both worlds, "object", "vector" or "parallel"
+    :type engine: str
+    :param hvac_every: turn on the HVAC of one home in every hvac_every homes at the start, 0 to leave them off
+    :type hvac_every: int
+    :return: maximum, RMS and final error of the home temperatures (C), sampled every dt seconds, reference and
+        candidate HVAC and grid energies with their relative errors, and the speedup of the longer steps
+    """
+
+    if duration % dt:
+        raise ValueError("duration must be a multiple of dt")
+
+    # make_world writes the configuration of the world to the working directory
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix="validation-"))
+    try:
+        results = list()
+        for step_length in (1, dt):
+            world = _build(num_neighborhoods, num_homes, duration, step_length, season, weather, seed, engine,
+                           hvac_every)
+            try:
+                cpu = _run(world)
+                world.sync_homes()
+                temps = world.temperature_rows(0, world.num_steps + 1)
+                totals = world.aggregates.values[:world.num_steps + 1, world.aggregates.world].sum(axis=0)
+            finally:
+                world.close()
+            results.append((cpu, temps, totals))
+    finally:
+        os.chdir(cwd)
+
+    (ref_cpu, ref_temps, ref_totals), (cpu, temps, totals) = results
+    error = temps - ref_temps[::dt]
+
+    report = {"dt": dt, "duration": duration, "steps": len(temps) - 1, "reference_steps": len(ref_temps) - 1,
+              "max_temp_error": float(np.abs(error).max()), "rms_temp_error": float(np.sqrt((error ** 2).mean())),
+              "final_temp_error": float(np.abs(error[-1]).max())}
+    for name, field in (("hvac", HVAC_POWER), ("grid", GRID_DRAW)):
+        report[name + "_energy"] = float(totals[field])
+        report["reference_" + name + "_energy"] = float(ref_totals[field])
+        report[name + "_energy_error"] = _relative(totals[field], ref_totals[field])
+    report["speedup"] = ref_cpu / cpu if cpu else float("inf")
+    return report
+
+
+def describe(report) -> str:
+    """One line summary of a validation report"""
+
+    return ("dt {dt:>4} s  {steps:>6} steps  temperature error max {max_temp_error:.4f} C  "
+            "rms {rms_temp_error:.4f} C  final {final_temp_error:.4f} C  HVAC energy {hvac_energy_error:.2%}  "
+            "grid energy {grid_energy_error:.2%}  speedup {speedup:.1f}x").format(**report)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("duration", type=int, nargs="?", default=3600, help="simulated time (s)")
+    parser.add_argument("dt", type=int, nargs="*", default=[10, 60], help="step lengths to validate (s)")
+    parser.add_argument("--engine", default="vector", help="engine stepping the worlds")
+    parser.add_argument("--neighborhoods", type=int, default=1, help="number of neighborhoods")
+    parser.add_argument("--homes", type=int, default=100, help="number of homes per neighborhood")
+    parser.add_argument("--season", default="summer", help="season of the world")
+    parser.add_argument("--weather", default="sunny", help="weather of the world")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the homes")
+    parser.add_argument("--hvac-every", type=int, default=4, help="turn on the HVAC of one home in this many")
+    args = parser.parse_args()
+
+    for dt in args.dt:
+        print(describe(compare(args.neighborhoods, args.homes, args.duration, dt, args.season, args.weather,
+                               args.seed, args.engine, args.hvac_every)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
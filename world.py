@@ -1,12 +1,24 @@
 import sys
 import time
 import os
-import signal
 import multiprocessing as mp
 import json
 import math
-import logging
+import numpy as np
 from neighborhood import Neighborhood as ngh
+from history import History
+from slab import StateSlab, TEMP
+from es import StorageBank
+from context import StepContext
+from datalog import DataLogger
+from chunkstore import ChunkStore
+from colors import gradient_colors
+from aggregates import Aggregates
+from energy import EnergyLedger, flow_names, home_flows
+from generation import sample_neighborhoods
+from simlog import SimulationLog
+from metrics import PhaseTimers, DISABLED
+from memory import AllocationTracer, account, check_budget
 
 
 # fahrenheit -> celsius
@@ -22,33 +34,106 @@ class World:
 	smart neighborhoods.
 	"""
 
-	def __init__(self, num_neighborhoods_, num_homes_, simulation_time_, log=False) -> None:
+	def __init__(self, num_neighborhoods_, num_homes_, simulation_time_, log=False, engine="object",
+				 workers=None, float32_history=False, log_interval=15, log_columns=("temperature",),
+				 log_queue=256, history_dir=None, chunk_steps=900, cache_chunks=16, checkpoint_dir=None,
+				 checkpoint_every=0, record_energy=False, battery=None, seed=None, log_levels=None,
+				 log_sample=100, phase_timers=False, memory_budget=None, dt=1, data_dir=None) -> None:
 		"""Constructor for world
 
 		:param num_neighborhoods_: number of neighborhoods to create
 		:type num_neighborhoods_: int
 		:param num_homes_: number of homes per neighborhood
 		:type num_homes_: int
-		:param simulation_time_: total amount of time to run simulation
+		:param simulation_time_: total amount of time to run simulation (s), run in simulation_time_ / dt steps
 		:type simulation_time_: int
-		:param log: keeps track of when to log information about the world
+		:param log: write the log of the run to world.log
 		:type log: bool
+		:param engine: "object" to step every home object, "vector" to step all homes with the NumPy engine,
+			"parallel" to step shards of neighborhoods with the NumPy engine in a pool of worker processes
+		:type engine: str
+		:param workers: number of worker processes of the parallel engine. Default None, which means one per CPU
+		:type workers: int
+		:param float32_history: store histories as 4-byte floats instead of 8-byte doubles
+		:type float32_history: bool
+		:param log_interval: number of steps between two rows of the neighborhood data logs, 0 to disable them
+		:type log_interval: int
+		:param log_columns: values logged for every home, among "temperature", "target", "charge" and "grid"
+		:type log_columns: tuple
+		:param log_queue: maximum number of data log rows waiting to be written before stepping blocks
+		:type log_queue: int
+		:param history_dir: directory of an on-disk history store. Default None, which keeps every history in memory.
+			With a store, histories are saved chunk by chunk and only the most recent steps stay in memory
+		:type history_dir: str
+		:param chunk_steps: number of steps per chunk of the history store
+		:type chunk_steps: int
+		:param cache_chunks: number of decompressed chunks of the history store kept in memory
+		:type cache_chunks: int
+		:param checkpoint_dir: directory of the checkpoints of the world. Default None, which means no checkpoints
+		:type checkpoint_dir: str
+		:param checkpoint_every: number of steps between two automatic checkpoints in checkpoint_dir, 0 to only
+			save them with save_checkpoint
+		:type checkpoint_every: int
+		:param record_energy: record the energy flows (PV, battery, HVAC, grid and every device) of every home at
+			every step, kept like the temperature histories
+		:type record_energy: bool
+		:param battery: battery parameters of every home, among "capacity" (J), "charge_efficiency",
+			"discharge_efficiency", "charge_rate" and "discharge_rate" (W). Default None, which means
+			lossless batteries of 415 Ah at 12 V without rate limits
+		:type battery: dict
+		:param seed: seed the homes are generated from, every neighborhood drawing all its homes at once from its
+			own stream, sampled by the given number of workers. Default None, which draws them home by home from
+			the random module
+		:type seed: int
+		:param log_levels: level of every subsystem of the log ("world", "neighborhood", "home" and "thermostat"),
+			e.g. {"home": "WARNING"}, None to turn a subsystem off. Default None, which logs everything
+		:type log_levels: dict
+		:param log_sample: only log one home (and thermostat) in every log_sample homes of each neighborhood, 1 to
+			log every home
+		:type log_sample: int
+		:param phase_timers: time every phase of the steps of the world and of its homes, see metrics.py
+		:type phase_timers: bool
+		:param memory_budget: memory the run may take (bytes). make_world warns with a MemoryBudgetWarning when the
+			histories held at the last step are projected to take more. Default None, which means no budget
+		:type memory_budget: int
+		:param dt: length of a step (s). Every step applies dt seconds of conduction, HVAC and device use, PV output
+			and battery dispatch, and the world clock counts steps. See validation.py for the error against 1 s steps
+		:type dt: int
+		:param data_dir: directory of the neighborhood data logs. Default None, which means the data/ directory of
+			the package
+		:type data_dir: str
 		"""
 
+		if engine not in ("object", "vector", "parallel"):
+			raise ValueError("Unknown engine '{}', expected 'object', 'vector' or 'parallel'".format(engine))
+		if dt != int(dt) or dt < 1:
+			raise ValueError("The length of a step must be a whole number of seconds, got {}".format(dt))
+
 		self.num_neighborhoods = num_neighborhoods_
 		self.num_homes = num_homes_
-		self.num_steps = simulation_time_
+		self.dt = int(dt)
+		self.num_steps = math.ceil(simulation_time_ / self.dt)
 		self.data_log_time = 0
-
+		self.log_interval = log_interval
+		self.log_columns = tuple(log_columns)
+		self.log_queue = log_queue
+		self.data_dir = data_dir
+		self.data_logger = None
+
+		self.checkpoint_dir = checkpoint_dir
+		self.checkpoint_every = checkpoint_every
+		self.checkpoint_time = None
+
+		self.log = log
+		self.log_levels = None if log_levels is None else dict(log_levels)
+		self.log_sample = log_sample
 		if log is True:
-			logging.basicConfig(filename="world.log", filemode='w', level=logging.DEBUG,
-								format='%(name)s - %(levelname)s - %(message)s')
-			self.logger = logging.getLogger(__name__)
-
-			with open("world.log", 'w'):
-				pass
+			# written by a background thread, messages only being formatted there
+			self.simulation_log = SimulationLog("world.log", self.log_levels, log_sample)
+			self.logger = self.simulation_log.get("world")
 
 		else:
+			self.simulation_log = None
 			self.logger = None
 
 		self.season = None
@@ -56,20 +141,68 @@ class World:
 		self.lo_temp = None
 		self.hi_temp = None
 
-		self.outside_temp = mp.Value('d', 0.0)
-		self.world_clock = mp.Value('i', 0)
-		self.temp_history = list()
+		# only the world writes these, so they are shared without a lock
+		self.outside_temp = mp.Value('d', 0.0, lock=False)
+		self.world_clock = mp.Value('i', 0, lock=False)
+		# histories are preallocated for every step of the run
+		self.history_typecode = 'f' if float32_history else 'd'
+		self.chunk_steps = chunk_steps
+		self.cache_chunks = cache_chunks
+		self.history_dir = history_dir
+		self.history_store = None
+		self.history_window = self.num_steps
+		if history_dir is not None:
+			self.open_history_store('w')
+
+		self.temp_history = History(self.history_window + 1, self.history_typecode)
 		self.neighborhoods = list()
-		
-		self.step_event = mp.Event()
-		self.clock_event = mp.Event()
-
-		self.processes = list()
+		# coloring bounds of the homes, read once they are generated
+		self.temp_grads = None
+		# per-step aggregates of every neighborhood and of the world, started once the homes are generated
+		self.aggregates = None
+
+		# shared state of every home, in a single segment
+		self.slab = StateSlab(self.num_neighborhoods * self.num_homes)
+		# batteries and PV arrays of every home, charged and discharged at once after the homes stepped. The
+		# engines move the batteries to their own banks once the homes exist: with an engine, the world bank only
+		# holds them while they are generated, keeps no charge history and is dropped by setup_run
+		self.battery_config = None if battery is None else dict(battery)
+		self.storage = StorageBank(self.num_neighborhoods * self.num_homes,
+								   self.history_window if engine == "object" else 0, self.history_typecode, dt=self.dt)
+		self.storage.configure(**(self.battery_config or {}))
+
+		self.engine_type = engine
+		self.workers = workers
+		self.seed = seed
+		self.engine = None
+
+		# energy flows of every home, held by the engine or by a ledger when stepping object by object
+		self.record_energy = record_energy
+		self.device_names = None
+		self.energy = None
+
+		# time spent in every phase of the steps, None when the timers are off
+		self.timers = PhaseTimers() if phase_timers else None
+
+		# memory the run may take, and the tracemalloc snapshot of the last memory report when tracing
+		self.memory_budget = memory_budget
+		self.memory_tracer = None
+
+	def open_history_store(self, mode) -> None:
+		"""Open the history store of the world
+
+		:param mode: 'w' to start a new store, 'a' to continue the store of a resumed run
+		:type mode: str
+		:return: nothing
+		"""
+		self.history_store = ChunkStore(self.history_dir, mode, self.cache_chunks)
+		# only the steps not saved to the store yet are held in memory
+		self.history_window = min(self.num_steps, 2 * self.chunk_steps)
 
 	def get_time(self):
 		"""Returns current time of the world
 
-		:return: current world clock time
+		:return: current world clock time, in steps of dt seconds
 		"""
 		return self.world_clock.value
 
@@ -80,10 +213,224 @@ class World:
 		:type step_num: int
 		:return: world temperature at a time step
 		"""
-		if step_num is not None:
-			return self.temp_history[step_num]
+		if step_num is None:
+			step_num = self.world_clock.value
+
+		if self.history_store is not None and 0 <= step_num < self.temp_history.start:
+			return self.history_store.read("temp", "world", 0, step_num)
+		return self.temp_history[step_num]
+
+	def get_int_temps(self, step_num=None) -> np.ndarray:
+		"""Get the internal temperature of every home at a time step
+
+		:param step_num: time step to find. Default None, which means the current step
+		:type step_num: int
+		:return: one temperature per home, neighborhood by neighborhood (home j of neighborhood i at
+			i * num_homes + j)
+		"""
+		if step_num is None:
+			step_num = self.world_clock.value
+
+		if not 0 <= step_num <= self.world_clock.value:
+			raise IndexError("step {} has not been simulated".format(step_num))
+
+		if self.engine is not None and step_num >= self.engine.base:
+			return np.array(self.engine.temperatures(step_num), dtype=np.float64)
+
+		temps = list()
+		for neighborhood in self.neighborhoods:
+			homes = neighborhood.homes
+			if self.history_store is not None and homes and step_num < homes[0].temp_history.start:
+				temps.append(self.history_store.read_all("temp", neighborhood.id, step_num))
+			else:
+				temps.append([home.temp_history[step_num] for home in homes])
+
+		return np.concatenate(temps).astype(np.float64) if temps else np.zeros(0)
+
+	def get_temp_grads(self) -> tuple:
+		"""Get the temperature gradients used to color every home
+
+		:return: lower and upper gradient (F) of every home, in the order of get_int_temps
+		"""
+		if self.temp_grads is None:
+			homes = [home for neighborhood in self.neighborhoods for home in neighborhood.homes]
+			self.temp_grads = (np.array([home.lower_temp_grad for home in homes], dtype=np.float64),
+							   np.array([home.upper_temp_grad for home in homes], dtype=np.float64))
+
+		return self.temp_grads
+
+	def get_colors(self, step_num=None, temps=None) -> np.ndarray:
+		"""Get the color of every home at a time step, as Building.color_gradient would
+
+		:param step_num: time step to find. Default None, which means the current step
+		:type step_num: int
+		:param temps: temperatures at the step, as returned by get_int_temps, when already read
+		:type temps: numpy array
+		:return: hex color code of every home, in the order of get_int_temps
+		"""
+		if temps is None:
+			temps = self.get_int_temps(step_num)
+
+		lower_grads, upper_grads = self.get_temp_grads()
+		return gradient_colors(temps, lower_grads, upper_grads)
+
+	def get_aggregates(self, step_num=None, neighborhood=None) -> dict:
+		"""Get the aggregates of the homes of the world, or of a neighborhood, at a time step
+
+		:param step_num: time step to find. Default None, which means the current step
+		:type step_num: int
+		:param neighborhood: neighborhood id. Default None, which means the whole world
+		:type neighborhood: int
+		:return: number of homes, sum, mean, min, max and 10th/50th/90th percentiles of their inner temperatures,
+			total HVAC power and total grid draw
+		"""
+		if step_num is None:
+			step_num = self.world_clock.value
+
+		if neighborhood is None:
+			neighborhood = self.aggregates.world
+		elif not 0 <= neighborhood < self.num_neighborhoods:
+			raise IndexError("no neighborhood {}".format(neighborhood))
+
+		return self.aggregates.get(step_num, neighborhood)
+
+	def get_loads(self) -> np.ndarray:
+		"""Get the HVAC power and grid draw of every neighborhood during the last step from the home objects
+
+		:return: (neighborhoods x 2) loads
+		"""
+		loads = np.zeros((len(self.neighborhoods), 2))
+		for i, neighborhood in enumerate(self.neighborhoods):
+			for home in neighborhood.homes:
+				if home.thermostat.running():
+					loads[i, 0] += home.thermostat.get_power()
+				loads[i, 1] += home.grid_draw
+
+		return loads
+
+	def temperature_rows(self, start, stop) -> np.ndarray:
+		"""Get the internal temperature of every home at every step of a range still held in memory
+
+		:param start: first step
+		:type start: int
+		:param stop: step after the last one
+		:type stop: int
+		:return: one row of temperatures per step, in the order of get_int_temps
+		"""
+		if self.engine is not None:
+			return self.engine.temperature_rows(start, stop)
+
+		homes = [home for neighborhood in self.neighborhoods for home in neighborhood.homes]
+		return np.array([home.temp_history[start:stop] for home in homes], dtype=np.float64).reshape(
+			len(homes), stop - start).T
+
+	def flow_rows(self, start, stop) -> np.ndarray:
+		"""Get the energy flows of every home at every step of a range still held in memory
+
+		:param start: first step
+		:type start: int
+		:param stop: step after the last one
+		:type stop: int
+		:return: (steps x homes x flows) flows, homes in the order of get_int_temps
+		"""
+		if self.engine is not None:
+			return self.engine.flow_rows(start, stop)
+		return self.energy.rows(start, stop)
+
+	def put_flows(self, start, flows) -> None:
+		"""Record the energy flows of every home at consecutive steps computed outside of a step
+
+		:param start: first step
+		:type start: int
+		:param flows: (steps x homes x flows) flows
+		:type flows: numpy array
+		:return: nothing
+		"""
+		if self.engine is not None:
+			self.engine.put_flows(start, flows)
 		else:
-			return self.temp_history[self.world_clock.value]
+			self.energy.record(start, flows)
+
+	def get_flows(self, neighborhood, house=None, start=0, stop=None) -> np.ndarray:
+		"""Get the energy flows of a home, or their sum over the homes of a neighborhood, over a range of steps
+
+		:param neighborhood: neighborhood id
+		:type neighborhood: int
+		:param house: house id. Default None, which sums every home of the neighborhood
+		:type house: int
+		:param start: first step
+		:type start: int
+		:param stop: step after the last one. Default None, which means after the current step
+		:type stop: int
+		:return: (steps x flows) flows, in the order of flow_names(device_names)
+		"""
+		if not self.record_energy:
+			raise ValueError("The energy flows of the homes are not recorded")
+		if stop is None:
+			stop = self.world_clock.value + 1
+
+		homes = self.neighborhoods[neighborhood].homes
+		columns = len(flow_names(self.device_names))
+		first = sum(len(other.homes) for other in self.neighborhoods[:neighborhood])
+		if house is not None:
+			first += house
+
+		parts = list()
+		held = start
+		if self.history_store is not None:
+			held = min(max(start, self.history_store.end("energy", neighborhood)), stop)
+
+		if held > start:
+			# the store holds one column per flow of every home, home by home
+			if house is None:
+				block = self.history_store.read_range("energy", neighborhood, slice(None), start, held)
+				parts.append(block.reshape(len(homes), columns, -1).sum(axis=0).T)
+			else:
+				block = self.history_store.read_range("energy", neighborhood,
+													  slice(house * columns, (house + 1) * columns), start, held)
+				parts.append(block.T)
+
+		if held < stop:
+			rows = self.flow_rows(held, stop)
+			if house is None:
+				parts.append(rows[:, first:first + len(homes)].sum(axis=1))
+			else:
+				parts.append(rows[:, first])
+
+		return np.concatenate(parts).astype(np.float64) if parts else np.zeros((0, columns))
+
+	def start_aggregates(self) -> None:
+		"""Start the aggregates of the world with the homes as generated
+
+		:return: nothing
+		"""
+		self.aggregates = Aggregates([len(neighborhood.homes) for neighborhood in self.neighborhoods],
+									 self.num_steps + 1)
+		self.aggregates.record(0, self.temperature_rows(0, 1), self.get_loads()[None])
+
+		for neighborhood in self.neighborhoods:
+			neighborhood.aggregates = self.aggregates
+
+	def record_aggregates(self, stop, loads=None, batch=1024) -> None:
+		"""Record the aggregates of every step simulated since the last recorded one, up to step stop excluded
+
+		Temperatures are read from the histories held in memory, so this must happen before they are saved to the
+		history store.
+
+		:param stop: step after the last one to record
+		:type stop: int
+		:param loads: HVAC power and grid draw of every neighborhood at every step to record. Default None, which
+			reads the loads summed by the engine
+		:type loads: numpy array of shape (steps, neighborhoods, 2)
+		:param batch: maximum number of steps whose temperatures are read at once
+		:type batch: int
+		:return: nothing
+		"""
+		start = len(self.aggregates)
+		for first in range(start, stop, batch):
+			last = min(first + batch, stop)
+			rows = self.engine.load_rows(first, last) if loads is None else loads[first - start:last - start]
+			self.aggregates.record(first, self.temperature_rows(first, last), rows)
 	
 	def make_world(self, season_, weather_, min_length=None, max_length=None, min_width=None, max_width=None,
 					lower_t_=32, upper_t_=78) -> None:
@@ -112,7 +459,7 @@ class World:
 		# of the continental US in 2017
 
 		if self.logger is not None:
-			self.logger.info('Creating World\n\tSEASON: {}\tWEATHER: {}'.format(season_, weather_))
+			self.logger.info('Creating World\n\tSEASON: %s\tWEATHER: %s', season_, weather_)
 
 		self.season = season_
 		if self.season == "fall":
@@ -164,45 +511,171 @@ class World:
 			config['num_steps'] = self.num_steps
 			json.dump(config, config_file)
 
+		# draw every home at once, one stream per neighborhood
+		draws = [None] * self.num_neighborhoods
+		if self.seed is not None:
+			draws = sample_neighborhoods(self.seed, self.num_neighborhoods, self.num_homes, self.workers or 1)
+
 		# set up neighborhoods
 		for i in range(self.num_neighborhoods):
 			if self.logger is not None:
-				self.logger.debug('NEIGHBORHOOD {} SET-UP:'.format(i))
+				self.logger.debug('NEIGHBORHOOD %d SET-UP:', i)
 
-			neighborhood = ngh(i, self.num_homes, self.outside_temp, self.world_clock, self.logger)
-			neighborhood.generate(min_length, max_length, min_width, max_width, lower_t_, upper_t_)
+			first = i * self.num_homes
+			neighborhood = ngh(i, self.num_homes, self.outside_temp, self.world_clock, self.simulation_log,
+							   self.history_window, self.history_typecode, self.slab.section(first, self.num_homes),
+							   [self.storage.battery(first + h) for h in range(self.num_homes)], self.dt)
+			neighborhood.generate(min_length, max_length, min_width, max_width, lower_t_, upper_t_, draws[i])
 
 			self.neighborhoods.append(neighborhood)
 
-	# NO LONGER USED
-	def run_world(self):
-		num_events = 0
+		self.storage.record(0)
+		self.setup_run()
+		self.start_aggregates()
+		self.check_memory_budget()
+		self.auto_checkpoint()
 
-		for process in self.processes:
-			process.start()
+	def setup_run(self, resume=False) -> None:
+		"""Attach the history store, open the data logs and create the engine once every home exists
 
-		# waits for all the houses in each neighborhood to be created
-		while num_events < self.num_neighborhoods:
-			self.step_event.wait()
-			num_events += 1
+		:param resume: append to the data logs of a resumed run instead of starting new ones
+		:type resume: bool
+		:return: nothing
+		"""
+		if self.history_store is not None:
+			for neighborhood in self.neighborhoods:
+				for home in neighborhood.homes:
+					home.attach_store(self.history_store)
 
-		# signal that all neighborhoods have finished being created and
-		# that the world clock has begun counting
-		#print("Beginning world clock...")
-		self.clock_event.set()
-		while self.world_clock.value < self.num_steps:
-			time.sleep(0.001)
+		if self.log_interval:
+			self.data_logger = DataLogger(self.neighborhoods, self.log_columns, self.log_queue, self.data_dir,
+										  append=resume)
 
-			self.outside_temp.value = self.temp_change()
-			self.temp_history.append(self.outside_temp.value)
-			self.world_clock.value += 1
+		homes = [home for neighborhood in self.neighborhoods for home in neighborhood.homes]
+		self.device_names = sorted({name for home in homes for name in home.devices})
+
+		if self.engine_type == "vector":
+			from engine import VectorEngine
 
-			num_events = 0
-			while num_events < (self.num_homes * self.num_neighborhoods):
-				self.step_event.wait()
-				num_events += 1
+			self.engine = VectorEngine(homes, self.history_window, typecode=self.history_typecode,
+									   flows=self.record_energy, dt=self.dt)
 
-			self.clock_event.set()
+		elif self.engine_type == "parallel":
+			from parallel import ParallelEngine
+
+			self.engine = ParallelEngine(self.neighborhoods, self.history_window, self.workers,
+										 self.history_typecode, flows=self.record_energy, dt=self.dt)
+
+		if self.engine is not None:
+			# the batteries and their charge history now live in the banks of the engine
+			self.storage = None
+
+		elif self.record_energy:
+			self.energy = EnergyLedger(len(homes), self.device_names, self.history_window + 1, self.history_typecode,
+									   self.temp_history.start)
+
+		if self.record_energy and not resume:
+			# nothing flows before the first step
+			self.put_flows(0, np.zeros((1, len(homes), len(flow_names(self.device_names)))))
+
+	def close(self) -> None:
+		"""Release the resources held by the engine (worker processes, shared memory) and finish writing the data
+		logs
+
+		:return: nothing
+		"""
+		if self.engine is not None:
+			self.engine.close()
+
+		if self.data_logger is not None:
+			self.data_logger.close()
+
+		if self.history_store is not None:
+			self.history_store.close()
+
+		if self.simulation_log is not None:
+			self.simulation_log.close()
+
+		self.set_memory_tracing(False)
+
+	def flush_data(self) -> None:
+		"""Wait until every captured data log row is written to disk
+
+		:return: nothing
+		"""
+		if self.data_logger is not None:
+			self.data_logger.flush()
+
+	def sync_homes(self) -> None:
+		"""Write the state held by the vector engine back into the home objects
+
+		Does nothing when the world is stepped object by object.
+
+		:return: nothing
+		"""
+		if self.engine is not None:
+			self.engine.store()
+
+	def sync_engine(self) -> None:
+		"""Reload the vector engine from the home objects after they were modified directly
+
+		Does nothing when the world is stepped object by object.
+
+		:return: nothing
+		"""
+		if self.engine is not None:
+			self.engine.load()
+
+	def set_phase_timers(self, enabled) -> None:
+		"""Turn the phase timers on or off. Turning them off drops the histograms recorded so far
+
+		:param enabled: True to time the phases of the steps
+		:type enabled: bool
+		:return: nothing
+		"""
+		if not enabled:
+			self.timers = None
+		elif self.timers is None:
+			self.timers = PhaseTimers()
+
+	def memory_report(self, top=10) -> dict:
+		"""Account the memory held by the world to its subsystems, see memory.py
+
+		:param top: number of source lines reported when tracing allocations
+		:type top: int
+		:return: bytes held, recorded, recorded per step and projected at num_steps for the world and every
+			subsystem, with the allocations made since the previous report when tracing them
+		"""
+		# snapshot first, so the allocations of the report itself are not in it
+		allocations = None if self.memory_tracer is None else self.memory_tracer.diff(self.world_clock.value, top)
+
+		report = account(self)
+		if allocations is not None:
+			report["allocations"] = allocations
+
+		return report
+
+	def check_memory_budget(self) -> dict:
+		"""Warn if the run is projected to take more memory than memory_budget
+
+		:return: memory report of the world
+		"""
+		return check_budget(self)
+
+	def set_memory_tracing(self, enabled) -> None:
+		"""Turn the tracing of allocations with tracemalloc on or off. Memory reports then hold the allocations made
+		since the previous report, or since tracing was turned on
+
+		:param enabled: True to trace allocations
+		:type enabled: bool
+		:return: nothing
+		"""
+		if not enabled:
+			if self.memory_tracer is not None:
+				self.memory_tracer.close()
+			self.memory_tracer = None
+		elif self.memory_tracer is None:
+			self.memory_tracer = AllocationTracer(self.world_clock.value)
 
 	def step(self) -> None:
 		"""Steps every neighborhood in the world forward by one
@@ -210,23 +683,282 @@ class World:
 		:return: nothing
 		"""
 		self.world_clock.value += 1
+		ctx = StepContext.read(self.world_clock, self.outside_temp, self.dt, self.timers)
+		timers = self.timers or DISABLED
 
-		log_data = False
-		if self.data_log_time == (self.world_clock.value - 15):
-			self.data_log_time = self.world_clock.value
-			log_data = True
+		if self.engine is not None:
+			if self.logger is not None:
+				self.logger.debug('VECTOR ENGINE @ %d:', ctx.clock)
 
-		i = 0
+			with timers.phase("world.engine"):
+				self.engine.step(ctx.clock, ctx.outside_temp)
+			with timers.phase("world.aggregates"):
+				self.record_aggregates(ctx.clock + 1)
+
+		else:
+			i = 0
+
+			with timers.phase("world.homes"):
+				for neighborhood in self.neighborhoods:
+					if self.logger is not None:
+						self.logger.debug('NEIGHBORHOOD %d @ %d:', i, ctx.clock)
+
+					neighborhood.step(ctx)
+					i += 1
+
+			with timers.phase("world.battery"):
+				self.storage.dispatch(ctx.clock)
+			with timers.phase("world.aggregates"):
+				self.aggregates.record(ctx.clock, self.slab.column(TEMP)[None], self.get_loads()[None])
+
+			if self.energy is not None:
+				with timers.phase("world.energy"):
+					homes = (home for neighborhood in self.neighborhoods for home in neighborhood.homes)
+					self.energy.record(ctx.clock, np.array([[home_flows(home, self.device_names) for home in homes]]))
+
+		if self.data_logger is not None and self.data_log_time == (ctx.clock - self.log_interval):
+			with timers.phase("world.data_log"):
+				self.data_log_time = ctx.clock
+				if self.data_logger.live:
+					self.sync_homes()
+				self.data_logger.log(ctx.clock, ctx.outside_temp)
+
+		with timers.phase("world.temperature"):
+			self.outside_temp.value = self.temp_change()
+			self.temp_history.append(self.outside_temp.value)
+		with timers.phase("world.history_store"):
+			self.save_histories()
+		with timers.phase("world.checkpoint"):
+			self.auto_checkpoint()
+		timers.end_step()
+
+	def advance(self, num_steps, batch=60) -> None:
+		"""Steps the world forward num_steps times
+
+		With an engine, the world clock and temperature are advanced by the coordinator and the homes are
+		stepped a batch of steps at a time, which the parallel engine turns into one barrier round trip per batch.
+
+		:param num_steps: number of steps to take
+		:type num_steps: int
+		:param batch: number of steps handed to the engine at once
+		:type batch: int
+		:return: nothing
+		"""
+
+		if self.engine is None:
+			for i in range(num_steps):
+				self.step()
+			return
+
+		while num_steps > 0:
+			timers = self.timers or DISABLED
+			num_batch = min(batch, num_steps)
+			if self.data_logger is not None and self.data_logger.live:
+				# rows read the state of the homes, which the engine only holds at the end of a batch
+				num_batch = min(num_batch, self.data_log_time + self.log_interval - self.world_clock.value)
+			clock = self.world_clock.value + 1
+
+			# homes are stepped with the temperature of the previous step
+			outside_temps = list()
+			with timers.phase("world.temperature"):
+				for i in range(num_batch):
+					outside_temps.append(self.outside_temp.value)
+					self.world_clock.value += 1
+					self.outside_temp.value = self.temp_change()
+					self.temp_history.append(self.outside_temp.value)
 
-		for neighborhood in self.neighborhoods:
 			if self.logger is not None:
-				self.logger.debug('NEIGHBORHOOD {} @ {}:'.format(i, self.world_clock.value))
+				self.logger.debug('ENGINE BATCH %d --> %d:', clock, self.world_clock.value)
+
+			with timers.phase("world.engine"):
+				self.engine.step_batch(clock, outside_temps)
+			with timers.phase("world.aggregates"):
+				self.record_aggregates(self.world_clock.value + 1)
+			with timers.phase("world.data_log"):
+				self.write_data_ticks(self.world_clock.value)
+			with timers.phase("world.history_store"):
+				self.save_histories()
+			with timers.phase("world.checkpoint"):
+				self.auto_checkpoint()
+			# the phases of a batch are recorded per step
+			timers.end_step(num_batch)
+			num_steps -= num_batch
+
+	def save_histories(self) -> None:
+		"""Move every complete chunk of the histories held in memory to the history store
+
+		Chunks hold chunk_steps steps of the world temperature, and of the temperature and battery charge of every
+		home of a neighborhood. Does nothing without a history store.
 
-			neighborhood.step(log_data)
-			i += 1
+		:return: nothing
+		"""
+		store = self.history_store
+		if store is None:
+			return
+
+		chunk = self.chunk_steps
+		saved = store.end("temp", "world")
+		if saved + chunk > self.world_clock.value + 1:
+			return
+
+		while saved + chunk <= self.world_clock.value + 1:
+			stop = saved + chunk
+			store.write("temp", "world", saved, np.asarray(self.temp_history[saved:stop])[None])
+			flows = self.flow_rows(saved, stop) if self.record_energy else None
+
+			first = 0
+			for neighborhood in self.neighborhoods:
+				homes = neighborhood.homes
+				store.write("temp", neighborhood.id, saved,
+							np.array([home.temp_history[saved:stop] for home in homes]))
+				store.write("charge", neighborhood.id, saved,
+							np.array([home.battery.charge_history[saved:stop] for home in homes]))
+
+				if flows is not None:
+					# one column per flow of every home, home by home
+					block = flows[:, first:first + len(homes)].transpose(1, 2, 0)
+					store.write("energy", neighborhood.id, saved, block.reshape(-1, chunk))
+				first += len(homes)
+
+				if self.engine is None:
+					for home in homes:
+						home.temp_history.discard(stop)
+
+			saved = stop
+
+		self.temp_history.discard(saved)
+		if self.engine is not None:
+			self.engine.discard(saved)
+		else:
+			self.storage.discard(saved)
+		if self.energy is not None:
+			self.energy.discard(saved)
 
-		self.outside_temp.value = self.temp_change()
-		self.temp_history.append(self.outside_temp.value)
+	def write_data_ticks(self, step) -> None:
+		"""Log the neighborhood data of every data-log tick up to step from the recorded histories
+
+		Columns other than the temperature are read from the current state of the homes.
+
+		:param step: last step to log
+		:type step: int
+		:return: nothing
+		"""
+		if self.data_logger is None:
+			return
+
+		ticks = range(self.data_log_time + self.log_interval, step + 1, self.log_interval)
+		if ticks:
+			if self.data_logger.live:
+				self.sync_homes()
+
+			# homes are stepped with the temperature of the previous step, which is what the data logs record
+			for tick in ticks:
+				self.data_logger.log(tick, self.get_temp(tick - 1))
+			self.data_log_time = ticks[-1]
+
+	def run_until(self, step, passes=2) -> None:
+		"""Fast-forward the world to a step without stepping through every step
+
+		Every home is advanced from one discrete event to the next (HVAC end time, device run-time deadlines),
+		with the idle temperature computed in closed form in between. Temperature and charge histories are
+		filled for every skipped step and the neighborhood data logs are written for every data-log tick, so the
+		world looks the same as if it had been stepped up to step.
+
+		:param step: world clock value to advance to
+		:type step: int
+		:param passes: number of refinement passes of the idle temperature, more passes are closer to stepping
+		:type passes: int
+		:return: nothing
+		"""
+		from fastforward import Ambient, advance_home
+
+		clock = self.world_clock.value
+		if step <= clock:
+			return
+
+		if self.logger is not None:
+			self.logger.info('FAST-FORWARD %d --> %d', clock, step)
+
+		ambient = Ambient(self.lo_temp, self.hi_temp, clock, step + 1, self.dt)
+
+		# with a history store, jump a chunk at a time so the histories held in memory stay bounded
+		span = step - clock if self.history_store is None else self.chunk_steps
+		while clock < step:
+			target = min(step, clock + span)
+
+			self.sync_homes()
+			if self.engine is not None:
+				self.engine.reserve(target)
+
+			loads = np.zeros((target - clock, len(self.neighborhoods), 2))
+			flows = None
+			if self.record_energy:
+				flows = np.zeros((target - clock, self.slab.num_homes, len(flow_names(self.device_names))))
+
+			k = 0
+			for i, neighborhood in enumerate(self.neighborhoods):
+				for home in neighborhood.homes:
+					advance_home(home, clock, target, ambient, passes, loads[:, i],
+								 None if flows is None else flows[:, k], self.device_names)
+					k += 1
+
+			world_temps = ambient.window(clock + 1, target + 1).tolist()
+			self.temp_history.extend(world_temps)
+			self.outside_temp.value = world_temps[-1]
+			self.world_clock.value = target
+
+			self.sync_engine()
+			self.record_aggregates(target + 1, loads)
+			if flows is not None:
+				self.put_flows(clock + 1, flows)
+			self.write_data_ticks(target)
+			self.save_histories()
+			self.auto_checkpoint()
+			clock = target
+
+	def save_checkpoint(self, path=None, delta=False) -> None:
+		"""Save a binary snapshot of the world that load_checkpoint can resume from
+
+		A full checkpoint holds the configuration and state of every home and the histories held in memory. A
+		delta checkpoint only holds the state and the history steps recorded since the previous checkpoint, and
+		is applied on top of the full checkpoint and of every earlier delta when loading.
+
+		:param path: checkpoint directory. Default None, which means the checkpoint_dir of the world
+		:type path: str
+		:param delta: save a delta checkpoint instead of a full one
+		:type delta: bool
+		:return: nothing
+		"""
+		from checkpoint import save
+
+		save(self, path if path is not None else self.checkpoint_dir, delta)
+
+	@classmethod
+	def load_checkpoint(cls, path, **kwargs):
+		"""Resume a world from the checkpoints saved in a directory
+
+		:param path: checkpoint directory
+		:type path: str
+		:param kwargs: constructor arguments overriding the saved ones, e.g. engine="vector"
+		:return: resumed world
+		"""
+		from checkpoint import load
+
+		return load(cls, path, **kwargs)
+
+	def auto_checkpoint(self) -> None:
+		"""Save a checkpoint in checkpoint_dir if checkpoint_every steps went by since the last one: a full
+		checkpoint the first time, then delta checkpoints
+
+		:return: nothing
+		"""
+		if self.checkpoint_dir is None or not self.checkpoint_every:
+			return
+
+		if self.checkpoint_time is None:
+			self.save_checkpoint()
+		elif self.world_clock.value - self.checkpoint_time >= self.checkpoint_every:
+			self.save_checkpoint(delta=True)
 
 	def temp_change(self) -> float:
 		"""Return the temperature of the world at the next time step
@@ -236,7 +968,9 @@ class World:
 		temp_avg = (self.hi_temp + self.lo_temp) / 2
 		temp_amp = self.hi_temp - temp_avg
 
-		new_temp = temp_amp * math.sin((((2 * math.pi) / (24 * 60 * 60)) * self.world_clock.value)) + temp_avg
+		# the clock counts steps of dt seconds
+		seconds = self.world_clock.value * self.dt
+		new_temp = temp_amp * math.sin((((2 * math.pi) / (24 * 60 * 60)) * seconds)) + temp_avg
 		return new_temp
 
 
@@ -255,14 +989,14 @@ if __name__ == "__main__":
 	num_homes = int(float(sys.argv[2]))
 	run_time = int(float(sys.argv[3]))
 
-	world = World(num_neighborhoods, num_homes, run_time)
+	world = World(num_neighborhoods, num_homes, run_time, engine="vector")
 	world.make_world("spring", "sunny")
 
-	os.setpgrp()
+	start_time = time.time()
 	try:
-		world.run_world()
+		world.advance(world.num_steps)
 
 	finally:
-		final_time = world.get_time()
-		print("Final RunTime: {} minutes ({} s)".format(final_time/60, final_time))
-		os.killpg(0, signal.SIGKILL)
+		world.close()
+		final_time = world.get_time() * world.dt
+		print("Final RunTime: {} minutes ({} s) in {:.2f} s".format(final_time/60, final_time, time.time() - start_time))